@@ -0,0 +1,19 @@
+import pytest
+from typesense_orm import ApiCallerSync, Client, Node
+from .fake_typesense import FakeTypesense
+
+
+@pytest.fixture
+def typesense():
+    server = FakeTypesense()
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def client(typesense):
+    client = Client[ApiCallerSync](api_key="abcd", nodes=[Node(url=typesense.url)])
+    client.start()
+    yield client
+    client.api_caller.close_session()
@@ -0,0 +1,183 @@
+import asyncio
+import json
+import threading
+from typing import Any, Dict, List
+from aiohttp import web
+
+
+class FakeTypesense:
+    """
+    An in-memory stand-in of a Typesense node which implements the endpoints the client uses. It runs in a thread
+    with its own loop, and records every call in calls.
+    """
+    def __init__(self):
+        self.collections: Dict[str, Dict[str, Any]] = {}
+        self.docs: Dict[str, Dict[str, Any]] = {}
+        self.aliases: Dict[str, Dict[str, Any]] = {}
+        self.calls: List[Any] = []
+        self.stats: Dict[str, Any] = {"pending_write_batches": 0}
+        self.loop = asyncio.new_event_loop()
+        self.runner = None
+        self.url = None
+
+    def resolve(self, name: str) -> str:
+        return self.aliases.get(name, {}).get("collection_name", name)
+
+    async def health(self, r):
+        return web.json_response({"ok": True})
+
+    async def create_collection(self, r):
+        body = await r.json()
+        if body["name"] in self.collections:
+            return web.json_response({"message": f"A collection with name `{body['name']}` already exists."},
+                                     status=409)
+        body.setdefault("num_documents", 0)
+        body.setdefault("created_at", 1)
+        self.collections[body["name"]] = body
+        self.docs[body["name"]] = {}
+        return web.json_response(body, status=201)
+
+    async def get_collection(self, r):
+        name = self.resolve(r.match_info["name"])
+        self.calls.append(("get_collection", name))
+        await asyncio.sleep(float(r.query.get("sleep", 0)))
+        if name not in self.collections:
+            return web.json_response({"message": "Not Found"}, status=404)
+        return web.json_response(self.collections[name])
+
+    async def delete_collection(self, r):
+        name = r.match_info["name"]
+        self.calls.append(("delete", name))
+        collection = self.collections.pop(name, None)
+        self.docs.pop(name, None)
+        return web.json_response(collection or {})
+
+    async def add_document(self, r):
+        name = self.resolve(r.match_info["name"])
+        doc = await r.json()
+        doc.setdefault("id", str(len(self.docs[name])))
+        self.docs[name][doc["id"]] = doc
+        self.calls.append(("add", name, doc["id"]))
+        return web.json_response(doc, status=201)
+
+    async def import_documents(self, r):
+        name = self.resolve(r.match_info["name"])
+        body = await r.read()
+        self.calls.append(("import", name, dict(r.query)))
+        out = []
+        for line in body.split(b"\n"):
+            if not line.strip():
+                continue
+            try:
+                doc = json.loads(line)
+            except ValueError:
+                out.append({"success": False, "error": "Bad JSON.", "document": line.decode()})
+                continue
+            if doc.get("fail"):
+                out.append({"success": False, "error": "fail", "document": line.decode()})
+                continue
+            doc.setdefault("id", str(len(self.docs[name])))
+            self.docs[name][doc["id"]] = doc
+            res = {"success": True}
+            if r.query.get("return_id") == "true":
+                res["id"] = doc["id"]
+            if r.query.get("return_doc") == "true":
+                res["document"] = doc
+            out.append(res)
+        return web.Response(text="\n".join(map(json.dumps, out)))
+
+    def do_search(self, name: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        hits = list(self.docs[name].values())
+        filter_by = params.get("filter_by")
+        if filter_by and filter_by.startswith("id:["):
+            ids = filter_by[4:-1].replace("`", "").split(",")
+            hits = [h for h in hits if h["id"] in ids]
+        per_page = int(params.get("per_page", 10))
+        page = int(params.get("page", 1))
+        selected = hits[(page - 1) * per_page: page * per_page]
+        return {"facet_counts": [], "found": len(hits), "out_of": len(self.docs[name]), "page": page,
+                "request_params": {"collection_name": name, "per_page": per_page, "q": params.get("q", "")},
+                "search_time_ms": 1,
+                "hits": [{"highlights": [], "document": h, "text_match": 100 - i} for i, h in enumerate(selected)]}
+
+    async def search(self, r):
+        name = self.resolve(r.match_info["name"])
+        self.calls.append(("search", name, dict(r.query)))
+        return web.json_response(self.do_search(name, r.query))
+
+    async def multi_search(self, r):
+        body = await r.json()
+        self.calls.append(("multi_search", body))
+        return web.json_response({"results": [self.do_search(self.resolve(s["collection"]), s)
+                                              for s in body["searches"]]})
+
+    async def export(self, r):
+        name = self.resolve(r.match_info["name"])
+        self.calls.append(("export", name, dict(r.query)))
+        response = web.StreamResponse()
+        await response.prepare(r)
+        include = r.query["include_fields"].split(",") if "include_fields" in r.query else None
+        for doc in self.do_search(name, {**r.query, "per_page": len(self.docs[name]) or 1})["hits"]:
+            doc = doc["document"]
+            if include is not None:
+                doc = {k: v for k, v in doc.items() if k in include}
+            await response.write((json.dumps(doc) + "\n").encode())
+        await response.write_eof()
+        return response
+
+    async def upsert_alias(self, r):
+        body = await r.json()
+        self.calls.append(("alias", r.match_info["name"], body["collection_name"]))
+        self.aliases[r.match_info["name"]] = {"name": r.match_info["name"], **body}
+        return web.json_response(self.aliases[r.match_info["name"]])
+
+    async def get_alias(self, r):
+        alias = self.aliases.get(r.match_info["name"])
+        if not alias:
+            return web.json_response({"message": "Not Found"}, status=404)
+        return web.json_response(alias)
+
+    async def get_stats(self, r):
+        return web.json_response(self.stats)
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.add_routes([web.get("/health", self.health),
+                        web.post("/collections", self.create_collection),
+                        web.get("/collections/{name}", self.get_collection),
+                        web.delete("/collections/{name}", self.delete_collection),
+                        web.post("/collections/{name}/documents", self.add_document),
+                        web.post("/collections/{name}/documents/import", self.import_documents),
+                        web.get("/collections/{name}/documents/search", self.search),
+                        web.get("/collections/{name}/documents/export", self.export),
+                        web.post("/multi_search", self.multi_search),
+                        web.put("/aliases/{name}", self.upsert_alias),
+                        web.get("/aliases/{name}", self.get_alias),
+                        web.get("/stats.json", self.get_stats)])
+        return app
+
+    def start(self):
+        async def serve():
+            self.runner = web.AppRunner(self.app())
+            await self.runner.setup()
+            site = web.TCPSite(self.runner, "127.0.0.1", 0)
+            await site.start()
+            port = site._server.sockets[0].getsockname()[1]
+            self.url = f"http://127.0.0.1:{port}"
+
+        started = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            self.loop.run_until_complete(serve())
+            started.set()
+            self.loop.run_forever()
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+        started.wait()
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
@@ -0,0 +1,111 @@
+import asyncio
+from typesense_orm import ApiCallerSync, Node
+from typesense_orm.admission import AdmissionController
+
+
+def test_stream_holds_in_flight_slot_until_read(typesense):
+    typesense.collections["books"] = {"name": "books", "fields": []}
+    typesense.docs["books"] = {str(i): {"id": str(i)} for i in range(3)}
+    caller = ApiCallerSync(api_key="abcd", nodes=[Node(url=typesense.url)], max_in_flight=1)
+    try:
+        lines = caller.get("/collections/books/documents/export", multiline=True, handler=lambda i, d: d)
+        waiting = caller.get_task("/collections/books", schedule=False)
+        caller.loop.run_until_complete(asyncio.sleep(0.2))
+        assert not waiting.done()
+
+        assert [d["id"] for d in lines] == ["0", "1", "2"]
+        assert caller.loop.run_until_complete(waiting)["name"] == "books"
+    finally:
+        caller.close_session()
+
+
+def test_unread_stream_releases_slot_when_dropped(typesense):
+    typesense.collections["books"] = {"name": "books", "fields": []}
+    typesense.docs["books"] = {"0": {"id": "0"}}
+    caller = ApiCallerSync(api_key="abcd", nodes=[Node(url=typesense.url)], max_in_flight=1)
+    try:
+        lines = caller.get("/collections/books/documents/export", multiline=True)
+        del lines
+        assert caller.get("/collections/books")["name"] == "books"
+    finally:
+        caller.close_session()
+
+
+def back_off_time(admission: AdmissionController, node: str) -> float:
+    loop = asyncio.new_event_loop()
+    try:
+        start = loop.time()
+        loop.run_until_complete(admission._back_off(node, read=False))
+        return loop.time() - start
+    finally:
+        loop.close()
+
+
+def test_stale_pending_write_batches_are_ignored():
+    admission = AdmissionController(max_pending_write_batches=10, write_backoff=0.01)
+    admission.report_pending_write_batches("n", 100, ttl=0.05)
+    assert admission.overloaded("n")
+    assert back_off_time(admission, "n") < 0.5
+    assert not admission.overloaded("n")
+
+
+def test_write_back_off_is_capped():
+    admission = AdmissionController(max_pending_write_batches=10, write_backoff=0.01, max_write_backoff=0.05)
+    admission.report_pending_write_batches("n", 100, ttl=60)
+    assert 0.05 <= back_off_time(admission, "n") < 0.5
+
+
+def test_stopped_poller_clears_pending_write_batches(typesense):
+    typesense.stats["pending_write_batches"] = 100
+    caller = ApiCallerSync(api_key="abcd", nodes=[Node(url=typesense.url)], max_pending_write_batches=10)
+    try:
+        caller.loop.run_until_complete(caller.cluster_stats())
+        assert caller.admission.overloaded(typesense.url)
+        caller.stats_poller.stop()
+        assert not caller.admission.overloaded(typesense.url)
+    finally:
+        caller.close_session()
+
+
+def test_reads_are_admitted_while_write_slots_are_taken():
+    admission = AdmissionController(max_in_flight_reads=2, max_in_flight_writes=1)
+    loop = asyncio.new_event_loop()
+    try:
+        async def scenario():
+            write = await admission.acquire("n", read=False, loop=loop)
+            waiting_write = loop.create_task(admission.acquire("n", read=False, loop=loop))
+            reads = [await asyncio.wait_for(admission.acquire("n", read=True, loop=loop), 0.5) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            assert not waiting_write.done()
+            assert admission.stats["write"].waiting == 1
+
+            write.release()
+            (await asyncio.wait_for(waiting_write, 0.5)).release()
+            for read in reads:
+                read.release()
+
+        loop.run_until_complete(scenario())
+        assert admission.stats["read"].admitted == 2 and admission.stats["write"].admitted == 2
+    finally:
+        loop.close()
+
+
+def test_max_qps_spaces_requests_after_the_burst():
+    admission = AdmissionController(max_qps=20, qps_burst=2)
+    loop = asyncio.new_event_loop()
+    try:
+        async def admit_all():
+            admitted = []
+            start = loop.time()
+            for _ in range(6):
+                async with admission.admit("n", read=True, loop=loop):
+                    admitted.append(loop.time() - start)
+            return admitted
+
+        admitted = loop.run_until_complete(admit_all())
+    finally:
+        loop.close()
+    # the burst goes at once, then a request every 1/20s
+    assert admitted[1] < 0.02
+    assert 0.18 <= admitted[-1] < 0.5
+    assert all(b - a >= 0.04 for a, b in zip(admitted[1:], admitted[2:]))
@@ -0,0 +1,64 @@
+from typing import Optional
+import pytest
+from typesense_orm import create_base_model, Field
+from typesense_orm.change_tracker import ChangeTracker, FileHashStore, SqliteHashStore
+
+
+@pytest.fixture
+def Books(client):
+    BaseModel = create_base_model(client)
+
+    class Books(BaseModel):
+        title: str = Field(..., index=True)
+        fail: Optional[bool]
+
+    return Books
+
+
+def imports(typesense):
+    return [call for call in typesense.calls if call[0] == "import"]
+
+
+def test_unchanged_documents_are_not_imported_again(client, typesense, Books):
+    tracker = ChangeTracker()
+    books = [Books(id=str(i), title=f"book {i}") for i in range(3)]
+    client.import_objects(books, action="upsert", tracker=tracker)
+    assert len(imports(typesense)) == 1
+
+    client.import_objects([Books(id=str(i), title=f"book {i}") for i in range(3)], action="upsert", tracker=tracker)
+    assert len(imports(typesense)) == 1
+    assert tracker.skipped == 3
+
+    typesense.docs["books"].clear()
+    client.import_objects([Books(id="0", title="book 0"), Books(id="1", title="changed")], action="upsert",
+                          tracker=tracker)
+    assert len(imports(typesense)) == 2
+    assert set(typesense.docs["books"]) == {"1"}
+
+
+def test_refused_documents_are_sent_again(client, typesense, Books):
+    tracker = ChangeTracker()
+    client.import_objects([Books(id="0", title="a", fail=True)], action="upsert", tracker=tracker)
+    client.import_objects([Books(id="0", title="a", fail=True)], action="upsert", tracker=tracker)
+    assert len(imports(typesense)) == 2 and tracker.skipped == 0
+
+
+def test_upsert_skips_unchanged_document(client, typesense, Books):
+    tracker = ChangeTracker()
+    for _ in range(2):
+        assert client.upsert(Books(id="0", title="a"), tracker=tracker).id == "0"
+    assert len([call for call in typesense.calls if call[0] == "add"]) == 1
+
+
+@pytest.mark.parametrize("make_store", [FileHashStore, SqliteHashStore])
+def test_stores_persist_hashes(tmp_path, make_store):
+    path = str(tmp_path / "hashes")
+    tracker = ChangeTracker(make_store(path))
+    digest, = tracker.changed("books", [("0", '{"id":"0"}')])
+    tracker.update("books", [("0", digest)])
+    tracker.close()
+
+    tracker = ChangeTracker(make_store(path))
+    assert tracker.changed("books", [("0", '{"id":"0"}'), ("0", '{"id":"0","a":1}'), (None, "{}")])[0] is None
+    assert len(tracker.store) == 1
+    tracker.close()
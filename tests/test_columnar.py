@@ -0,0 +1,67 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from typesense_orm.columnar import check_dtype, check_ids, encode_column, iter_column_chunks, to_columns
+from typesense_orm.exceptions import InvalidColumn
+
+
+def decode(columns, types):
+    return [json.loads(line) for chunk in iter_column_chunks(columns, types) for line in chunk.decode().splitlines()]
+
+
+def test_string_array_rows_are_quoted():
+    tags = np.array([["a", 'b"c'], ["d", "é"]])
+    check_dtype("tags", tags, "string[]")
+    assert decode({"tags": tags}, {"tags": "string[]"}) == [{"tags": ["a", 'b"c']}, {"tags": ["d", "é"]}]
+
+
+def test_numeric_array_rows():
+    columns = {"scores": np.array([[1.5, 2.0], [0.1, -3.0]]), "counts": np.array([[1.0, 2.0], [3.0, 4.0]])}
+    types = {"scores": "float[]", "counts": "int32[]"}
+    for name, values in columns.items():
+        check_dtype(name, values, types[name])
+    assert decode(columns, types) == [{"scores": [1.5, 2.0], "counts": [1, 2]}, {"scores": [0.1, -3.0], "counts": [3, 4]}]
+
+
+def test_non_finite_array_values_are_rejected():
+    with pytest.raises(InvalidColumn):
+        check_dtype("scores", np.array([[1.0, np.nan]]), "float[]")
+
+
+def test_missing_float_scalars_are_omitted():
+    assert encode_column("rating", np.array([1.5, np.nan, np.inf]), "float") == ['"rating":1.5', None, None]
+
+
+def test_object_column_values_are_checked():
+    columns = to_columns(pd.DataFrame({"year": pd.Series(["1999", "x"], dtype=object)}))
+    with pytest.raises(InvalidColumn, match="row 0"):
+        check_dtype("year", columns["year"], "int32")
+
+
+def test_pandas_missing_values_are_omitted():
+    columns = to_columns(pd.DataFrame({"title": pd.Series(["a", pd.NA, None], dtype=object),
+                                       "tags": pd.Series([["x", "y"], None, [np.str_("z")]], dtype=object)}))
+    types = {"title": "string", "tags": "string[]"}
+    for name, values in columns.items():
+        check_dtype(name, values, types[name])
+    assert decode(columns, types) == [{"title": "a", "tags": ["x", "y"]}, {}, {"tags": ["z"]}]
+
+
+def test_object_arrays_of_numpy_scalars_are_encoded():
+    values = np.empty(1, dtype=object)
+    values[0] = [np.int64(1), np.int64(2)]
+    check_dtype("counts", values, "int64[]")
+    assert encode_column("counts", values, "int64[]") == ['"counts":[1, 2]']
+
+
+@pytest.mark.parametrize("ids", [np.array([1, 2]), np.array(["1", "2"]), np.array([1, "2"], dtype=object)])
+def test_ids_are_sent_as_strings(ids):
+    check_ids("id", ids)
+    assert decode({"id": ids}, {"id": "id"}) == [{"id": "1"}, {"id": "2"}]
+
+
+@pytest.mark.parametrize("ids", [np.array([1.0, 2.0]), np.array([True, False]), np.array([1.5, "2"], dtype=object)])
+def test_float_and_bool_ids_are_rejected(ids):
+    with pytest.raises(InvalidColumn):
+        check_ids("id", ids)
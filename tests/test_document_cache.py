@@ -0,0 +1,52 @@
+import json
+import numpy as np
+import pytest
+from typesense_orm import ApiCallerSync, Client, Node, create_base_model, Field
+
+
+@pytest.fixture
+def client(typesense):
+    client = Client[ApiCallerSync](api_key="abcd", nodes=[Node(url=typesense.url)], document_cache_size=100)
+    client.start()
+    yield client
+    client.api_caller.close_session()
+
+
+@pytest.fixture
+def Books(client):
+    BaseModel = create_base_model(client)
+
+    class Books(BaseModel):
+        title: str = Field(..., index=True)
+
+    return Books
+
+
+IMPORTS = {
+    "import_json": lambda client, Books, doc: list(client.import_json(Books, [json.dumps(doc)], action="upsert")),
+    "import_json_counts": lambda client, Books, doc: client.import_json(Books, [json.dumps(doc)], action="upsert",
+                                                                        result_mode="counts"),
+    "import_file": lambda client, Books, doc: client.import_file(Books, (json.dumps(doc) + "\n").encode(),
+                                                                 action="upsert"),
+    "import_columns": lambda client, Books, doc: client.import_columns(
+        Books, {"id": np.array([doc["id"]]), "title": np.array([doc["title"]])}, action="upsert"),
+    "import_documents": lambda client, Books, doc: client.import_documents(Books, [doc], action="upsert"),
+    "import_objects": lambda client, Books, doc: list(client.import_objects([Books(**doc)], action="upsert")),
+}
+
+
+def test_get_is_cached(client, typesense, Books):
+    client.import_objects([Books(id="1", title="old")])
+    assert client.get(Books, "1").title == "old"
+    searches = len(typesense.calls)
+    assert client.get(Books, "1").title == "old"
+    assert len(typesense.calls) == searches
+
+
+@pytest.mark.parametrize("import_path", IMPORTS)
+def test_import_refreshes_cached_document(client, typesense, Books, import_path):
+    client.import_objects([Books(id="1", title="old")])
+    assert client.get(Books, "1").title == "old"
+    IMPORTS[import_path](client, Books, {"id": "1", "title": "new"})
+    assert typesense.docs["books"]["1"]["title"] == "new"
+    assert client.get(Books, "1").title == "new"
@@ -0,0 +1,58 @@
+import json
+from typing import List, Optional
+import numpy as np
+import pytest
+from typesense_orm import create_base_model, Field, Vector, int32
+from typesense_orm.types import geo
+
+
+@pytest.fixture
+def Books(client):
+    BaseModel = create_base_model(client)
+
+    class Books(BaseModel):
+        title: str = Field(..., index=True)
+        year: Optional[int32]
+        rating: Optional[float]
+        scores: Optional[List[float]]
+        loc: Optional[geo]
+        embedding: Optional[Vector[3]]
+
+    return Books
+
+
+def test_document_json_matches_pydantic_json(Books):
+    book = Books(id="1", title='Harry "Potter"', year=1997, rating=4.5, scores=[0.1, 2.0], loc=(48.8, 2.3))
+    assert json.loads(book.document_json()) == json.loads(book.json(exclude_none=True))
+
+
+def test_numpy_floats_are_plain_json(Books):
+    book = Books(id="1", title="t", rating=np.float64(1.5), scores=[np.float64(0.5), 2.0],
+                 loc=(np.float64(1.0), 2.0), embedding=np.array([0.1, 0.2, 0.3], dtype=np.float32))
+    decoded = json.loads(book.document_json())
+    assert decoded["rating"] == 1.5
+    assert decoded["scores"] == [0.5, 2.0]
+    assert decoded["loc"] == [1.0, 2.0]
+    assert decoded["embedding"] == [0.1, 0.2, 0.3]
+
+    plain = book.document_dict()
+    assert type(plain["rating"]) is float
+    assert all(type(v) is float for v in plain["scores"] + plain["loc"] + plain["embedding"])
+    assert plain["embedding"] == pytest.approx(decoded.pop("embedding"))
+    assert json.loads(json.dumps(plain, allow_nan=False)) == dict(decoded, embedding=plain["embedding"])
+
+
+@pytest.mark.parametrize("field,value", [("rating", float("nan")), ("rating", np.float64("inf")),
+                                         ("scores", [1.0, float("nan")]),
+                                         ("embedding", np.array([0.1, np.nan, 0.3]))])
+def test_non_finite_floats_are_rejected(Books, field, value):
+    book = Books(id="1", title="t", **{field: value})
+    with pytest.raises(ValueError):
+        book.document_json()
+    with pytest.raises(ValueError):
+        book.document_dict()
+
+
+def test_none_values_are_excluded(Books):
+    assert json.loads(Books(id="1", title="t").document_json()) == {"id": "1", "title": "t"}
+    assert Books(title="t").document_dict() == {"title": "t"}
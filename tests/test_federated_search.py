@@ -0,0 +1,72 @@
+from datetime import timedelta
+from time import monotonic
+import pytest
+from typesense_orm import ApiCallerSync, Client, Node, create_base_model, Field
+from typesense_orm.search import SearchQuery, SearchRes, normalized_scores
+
+
+@pytest.fixture
+def client(typesense):
+    client = Client[ApiCallerSync](api_key="abcd", nodes=[Node(url=typesense.url)], max_pending_write_batches=10,
+                                   max_write_backoff=timedelta(seconds=5))
+    client.start()
+    yield client
+    client.api_caller.close_session()
+
+
+@pytest.fixture
+def models(client):
+    BaseModel = create_base_model(client)
+
+    class Books(BaseModel):
+        title: str = Field(..., index=True)
+
+    class Authors(BaseModel):
+        name: str = Field(..., index=True)
+
+    client.import_objects([Books(id=str(i), title=f"book {i}") for i in range(3)])
+    client.import_objects([Authors(id=str(i), name=f"author {i}") for i in range(2)])
+    return Books, Authors
+
+
+def test_hits_are_merged_by_normalized_text_match(client, typesense, models):
+    Books, Authors = models
+    res = client.federated_search([(Books, SearchQuery(q="*", query_by=[Books.title])),
+                                   (Authors, SearchQuery(q="*", query_by=[Authors.name]))])
+    assert typesense.calls[-1][0] == "multi_search"
+    assert res.found == 5
+    assert [(hit.collection, hit.hit.document.id) for hit in res.hits] == \
+        [(Books, "0"), (Authors, "0"), (Books, "1"), (Authors, "1"), (Books, "2")]
+    assert isinstance(res.hits[1].hit.document, Authors)
+    assert res.hits[0].score == res.hits[1].score == 1
+
+
+def test_custom_scorer_and_limit(client, models):
+    Books, Authors = models
+    res = client.federated_search([(Books, SearchQuery(q="*", query_by=[Books.title])),
+                                   (Authors, SearchQuery(q="*", query_by=[Authors.name]))],
+                                  scorer=lambda collection, hit: int(hit.document.id) + (collection is Authors),
+                                  limit=2)
+    assert [(hit.collection, hit.hit.document.id, hit.score) for hit in res.hits] == \
+        [(Books, "2", 2), (Authors, "1", 2)]
+
+
+def test_federated_search_is_not_backed_off_by_writes(client, models):
+    Books, Authors = models
+    node = client.api_caller.nearest_node.url
+    client.api_caller.admission.report_pending_write_batches(node, 100, ttl=60)
+    start = monotonic()
+    client.federated_search([(Books, SearchQuery(q="*", query_by=[Books.title]))])
+    assert monotonic() - start < 1
+
+
+def search_res(*hits) -> SearchRes:
+    return SearchRes[dict].parse_obj({"facet_counts": [], "found": len(hits), "out_of": len(hits), "page": 1,
+                                      "request_params": {"collection_name": "books", "per_page": 10, "q": "*"},
+                                      "search_time_ms": 1,
+                                      "hits": [{"highlights": [], "document": {}, **hit} for hit in hits]})
+
+
+def test_normalized_scores():
+    assert normalized_scores(search_res({"text_match": 200}, {"text_match": 50})) == [1.0, 0.25]
+    assert normalized_scores(search_res({"vector_distance": 0.25}, {})) == [0.75, 0.0]
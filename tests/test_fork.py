@@ -0,0 +1,60 @@
+import asyncio
+import os
+import pytest
+from typesense_orm import api_caller
+from typesense_orm import ApiCallerAsync, ApiCallerSync, Node
+
+
+def test_fork_keeps_only_the_loop_and_session(typesense, monkeypatch):
+    monkeypatch.setattr(api_caller, "_inherited", [])
+    parent_loop = asyncio.get_event_loop()
+    callers = [ApiCallerAsync(api_key="abcd", nodes=[Node(url=typesense.url)]) for _ in range(2)]
+    sessions = [caller.session for caller in callers]
+    try:
+        for caller in callers:
+            # as if the caller was used in a forked child
+            caller.pid = -1
+            caller.ensure_process()
+
+        assert len(api_caller._inherited) == 3
+        assert api_caller._inherited[0] is parent_loop
+        assert all(any(session is kept for kept in api_caller._inherited) for session in sessions)
+        # callers of the parent share a new loop
+        assert callers[0].loop is callers[1].loop is not parent_loop
+    finally:
+        for caller in callers:
+            caller.loop.run_until_complete(caller.close_session(schedule=False))
+        for session in sessions:
+            parent_loop.run_until_complete(session.close())
+        if callers[0].loop is not parent_loop:
+            callers[0].loop.close()
+        asyncio.set_event_loop(parent_loop)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="os.fork is not available")
+def test_caller_works_in_a_forked_child(typesense, monkeypatch):
+    monkeypatch.setattr(api_caller, "_inherited", [])
+    typesense.collections["books"] = {"name": "books", "fields": []}
+    caller = ApiCallerSync(api_key="abcd", nodes=[Node(url=typesense.url)])
+    try:
+        assert caller.get("/collections/books")["name"] == "books"
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            try:
+                parent_loop, parent_session = caller.loop, caller.session
+                ok = caller.get("/collections/books")["name"] == "books" and \
+                    caller.loop is not parent_loop and caller.session is not parent_session and \
+                    len(api_caller._inherited) == 2 and \
+                    api_caller._inherited[0] is parent_loop and api_caller._inherited[1] is parent_session
+                status = 0 if ok else 2
+            finally:
+                # the child never returns into pytest
+                os._exit(status)
+
+        _, status = os.waitpid(pid, 0)
+        assert os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
+        # the parent's loop and session are untouched by the child
+        assert caller.get("/collections/books")["name"] == "books"
+    finally:
+        caller.close_session()
@@ -0,0 +1,40 @@
+import pytest
+from typesense_orm import ApiCallerSync, Client, Node, create_base_model, Field
+from typesense_orm.sharded_client import ShardedClient
+
+
+def counting_source(model, count: int, read: list):
+    for i in range(count):
+        read.append(i)
+        yield model(id=str(i), title=f"book {i}")
+
+
+def failing_handler(i, entry):
+    raise RuntimeError("handler failed")
+
+
+def test_import_objects_stops_reading_source_after_failure(client):
+    BaseModel = create_base_model(client)
+
+    class Books(BaseModel):
+        title: str = Field(..., index=True)
+
+    read = []
+    with pytest.raises(RuntimeError):
+        client.import_objects(counting_source(Books, 10000, read), batch_size=10, entry_handler=failing_handler)
+    assert len(read) < 100
+
+
+def test_sharded_import_stops_reading_source_after_failure(typesense):
+    shards = [Client[ApiCallerSync](api_key="abcd", nodes=[Node(url=typesense.url)]) for _ in range(2)]
+    with ShardedClient(shards) as sharded:
+        BaseModel = create_base_model(sharded)
+
+        class Books(BaseModel):
+            title: str = Field(..., index=True)
+
+        read = []
+        with pytest.raises(RuntimeError):
+            sharded.import_objects(counting_source(Books, 10000, read), batch_size=10,
+                                   entry_handler=failing_handler)
+        assert len(read) < 200
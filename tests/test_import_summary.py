@@ -0,0 +1,44 @@
+import json
+import pytest
+from typesense_orm import create_base_model, Field
+
+
+@pytest.fixture
+def Books(client):
+    BaseModel = create_base_model(client)
+
+    class Books(BaseModel):
+        title: str = Field(..., index=True)
+
+    return Books
+
+
+def lines():
+    return [json.dumps({"id": str(i), "title": f"book {i}", **({"fail": True} if i % 3 == 1 else {})})
+            for i in range(6)]
+
+
+def test_failures_mode_keeps_only_failed_lines(client, typesense, Books):
+    summary = client.import_json(Books, lines(), result_mode="failures")
+    assert (summary.succeeded, summary.failed, summary.total) == (4, 2, 6)
+    assert [(f.index, f.error) for f in summary.failures] == [(1, "fail"), (4, "fail")]
+    assert json.loads(summary.failures[0].document)["id"] == "1"
+    # successful documents are not sent back
+    assert "return_doc" not in typesense.calls[-1][2]
+
+
+def test_counts_mode_only_counts(client, Books):
+    summary = client.import_json(Books, lines(), result_mode="counts")
+    assert (summary.succeeded, summary.failed) == (4, 2)
+    assert summary.failures == []
+
+
+def test_chunked_imports_number_lines_across_chunks(client, Books):
+    data = "".join(line + "\n" for line in lines()).encode()
+    summary = client.import_file(Books, data, chunk_size=40, result_mode="failures")
+    assert [f.index for f in summary.failures] == [1, 4]
+
+
+def test_unknown_result_mode(client, Books):
+    with pytest.raises(ValueError):
+        client.import_json(Books, lines(), result_mode="everything")
@@ -0,0 +1,50 @@
+import gzip
+import io
+import json
+import pytest
+from typesense_orm import create_base_model, Field
+from typesense_orm.exceptions import ImportValidationError
+from typesense_orm.jsonl import iter_jsonl_chunks
+
+
+@pytest.fixture
+def Books(client):
+    BaseModel = create_base_model(client)
+
+    class Books(BaseModel):
+        title: str = Field(..., index=True)
+
+    return Books
+
+
+def jsonl(count: int) -> bytes:
+    return "".join(json.dumps({"id": str(i), "title": f"book {i}"}) + "\n" for i in range(count)).encode()
+
+
+@pytest.mark.parametrize("make_source", [lambda data: data, lambda data: io.BytesIO(data),
+                                         lambda data: io.BytesIO(gzip.compress(data))])
+def test_chunks_end_on_line_boundaries(make_source):
+    data = jsonl(50)
+    chunks = list(iter_jsonl_chunks(make_source(data), chunk_size=100))
+    assert len(chunks) > 1
+    assert all(chunk.endswith(b"\n") for chunk in chunks)
+    assert b"".join(chunks) == data
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_import_file(client, typesense, Books, tmp_path, compress):
+    path = tmp_path / "books.jsonl"
+    data = jsonl(20)
+    path.write_bytes(gzip.compress(data) if compress else data)
+    results = client.import_file(Books, str(path), chunk_size=100, entry_handler=lambda i, resp: i)
+    assert results == list(range(20))
+    assert set(typesense.docs["books"]) == set(map(str, range(20)))
+    assert len([call for call in typesense.calls if call[0] == "import"]) > 1
+
+
+def test_sampled_validation_stops_the_import(client, typesense, Books):
+    data = jsonl(3) + b'{"id": "3"}\n'
+    with pytest.raises(ImportValidationError) as e:
+        client.import_file(Books, data, chunk_size=1000, validate_fraction=1.0)
+    assert e.value.line == 3
+    assert not typesense.docs["books"]
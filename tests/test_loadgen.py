@@ -0,0 +1,27 @@
+import pytest
+from typesense_orm import ApiCallerAsync, Node
+from typesense_orm.loadgen import LoadGenerator
+
+
+@pytest.fixture
+def caller(typesense):
+    caller = ApiCallerAsync(api_key="abcd", nodes=[Node(url=typesense.url)])
+    yield caller
+    caller.loop.run_until_complete(caller.close_session(schedule=False))
+
+
+def test_multi_search_has_no_collection(caller, typesense):
+    typesense.collections["books"] = {"name": "books"}
+    typesense.docs["books"] = {"1": {"id": "1", "title": "a"}}
+    res = caller.loop.run_until_complete(LoadGenerator.send(caller, {"op": "multi_search", "searches": [
+        {"collection": "books", "q": "*"}]}))
+    assert res["results"][0]["found"] == 1
+
+
+def test_unknown_operation(caller):
+    with pytest.raises(ValueError, match="unknown operation"):
+        caller.loop.run_until_complete(LoadGenerator.send(caller, {"op": "drop"}))
+
+
+def test_loop_debug_is_opt_in(caller):
+    assert not caller.debug and not caller.loop.get_debug()
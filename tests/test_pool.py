@@ -0,0 +1,64 @@
+import json
+import os
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Optional
+import pytest
+from typesense_orm import higher_client
+from typesense_orm import create_base_model, Field
+from typesense_orm.pool import encode_documents
+
+
+def test_bad_documents_are_reported_per_index(client):
+    BaseModel = create_base_model(client)
+
+    class Books(BaseModel):
+        title: str = Field(..., index=True)
+        rating: Optional[float]
+
+    documents = [{"id": "0", "title": "a"}, ["not", "a", "mapping"], {"id": "2"}, Books(id="3", title="b"),
+                 {"id": "4", "title": "c", "rating": float("nan")}]
+    data, encoded, errors = encode_documents(Books, documents)
+    assert encoded == [0, 3]
+    assert [json.loads(line)["id"] for line in data.decode().splitlines()] == ["0", "3"]
+    assert [index for index, _ in errors] == [1, 2, 4]
+    assert errors[0][1].startswith("TypeError")
+
+
+class WrappingExecutor(Executor):
+    """
+    An executor which has no private state of ThreadPoolExecutor like _max_workers.
+    """
+    def __init__(self):
+        self.pool = ThreadPoolExecutor(1)
+
+    def submit(self, fn, *args, **kwargs):
+        return self.pool.submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait=True, **kwargs):
+        self.pool.shutdown(wait)
+
+
+@pytest.mark.parametrize("workers, window", [(None, 2 * 3), (1, 2)])
+def test_import_documents_window_follows_workers(client, typesense, monkeypatch, workers, window):
+    BaseModel = create_base_model(client)
+
+    class Books(BaseModel):
+        title: str = Field(..., index=True)
+
+    monkeypatch.setattr(os, "cpu_count", lambda: 3)
+    pending = []
+    original = higher_client.encode_in_pool
+
+    def encode_in_pool(collection, data, executor, chunk_size, max_pending, loop):
+        pending.append(max_pending)
+        return original(collection, data, executor, chunk_size, max_pending, loop)
+
+    monkeypatch.setattr(higher_client, "encode_in_pool", encode_in_pool)
+    executor = WrappingExecutor()
+    try:
+        results = client.import_documents(Books, [{"id": str(i), "title": str(i)} for i in range(10)],
+                                          executor=executor, batch_size=2, workers=workers)
+    finally:
+        executor.shutdown()
+    assert pending == [window]
+    assert len(results) == 10 and len(typesense.docs["books"]) == 10
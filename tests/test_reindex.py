@@ -0,0 +1,44 @@
+from typing import Optional
+import pytest
+from typesense_orm import create_base_model, Field
+from typesense_orm.exceptions import ReindexFailed
+
+
+@pytest.fixture
+def Books(client):
+    BaseModel = create_base_model(client)
+
+    class Books(BaseModel):
+        title: str = Field(..., index=True)
+        fail: Optional[bool]
+
+        class Config:
+            use_alias = True
+
+    return Books
+
+
+def test_reindex_switches_alias_and_drops_old_version(client, typesense, Books):
+    client.reindex(Books, [Books(id=str(i), title=f"book {i}") for i in range(3)])
+    assert typesense.aliases["books"]["collection_name"] == "books_v2"
+    assert "books_v1" not in typesense.collections
+    assert set(typesense.docs["books_v2"]) == {"0", "1", "2"}
+
+
+def test_failed_reindex_keeps_current_version(client, typesense, Books):
+    client.import_objects([Books(id="0", title="good")])
+    errors = []
+    with pytest.raises(ReindexFailed) as e:
+        client.reindex(Books, [Books(id="1", title="a"), Books(id="2", title="b", fail=True)],
+                       error_handler=lambda i, resp: errors.append(i))
+    assert e.value.failures == 1 and errors == [1]
+    assert typesense.aliases["books"]["collection_name"] == "books_v1"
+    assert set(typesense.docs["books_v1"]) == {"0"}
+    # the incomplete version is kept for inspection
+    assert set(typesense.docs["books_v2"]) == {"1"}
+
+
+def test_reindex_tolerates_max_failures(client, typesense, Books):
+    client.reindex(Books, [Books(id="1", title="a"), Books(id="2", title="b", fail=True)], max_failures=1)
+    assert typesense.aliases["books"]["collection_name"] == "books_v2"
+    assert "books_v1" not in typesense.collections
@@ -0,0 +1,34 @@
+from typing import Optional
+import pytest
+from typesense_orm import create_base_model, Field
+from typesense_orm.search import FieldArgs, SearchQuery
+
+
+@pytest.fixture
+def Books(client):
+    BaseModel = create_base_model(client)
+
+    class Books(BaseModel):
+        title: str = Field(..., index=True)
+        year: Optional[int]
+
+    client.import_objects([Books(id=str(i), title=f"book {i}", year=2000 + i) for i in range(5)])
+    return Books
+
+
+def test_scan_streams_every_match(client, typesense, Books):
+    documents = list(client.scan(Books, filter_by=FieldArgs(name="id", type=str).in_seq(["1", "3"])))
+    assert [(d.id, d.title) for d in documents] == [("1", "book 1"), ("3", "book 3")]
+    assert all(isinstance(d, Books) for d in documents)
+    assert typesense.calls[-1] == ("export", "books", {"filter_by": "id:[`1`,`3`]"})
+
+
+def test_scan_with_fields_returns_partial_documents(client, Books):
+    documents = list(client.scan(Books, fields=[Books.title]))
+    assert [d.title for d in documents] == [f"book {i}" for i in range(5)]
+    assert all(d.year is None for d in documents)
+
+
+def test_search_pages_follow_per_page(client, typesense, Books):
+    pages = list(client.search(Books, SearchQuery(q="*", query_by=[Books.title], per_page=2)))
+    assert [len(page.hits) for page in pages] == [2, 2, 1]
@@ -0,0 +1,44 @@
+import pytest
+from typesense_orm.exceptions import IncompatibleSchemaChange
+from typesense_orm.schema import Schema, diff_schemas
+
+
+def schema(*fields, **options) -> Schema:
+    return Schema.from_dict({"name": "books", "fields": [dict(f) for f in fields], **options})
+
+
+TITLE = {"name": "title", "type": "string", "index": True, "facet": False, "optional": False}
+YEAR = {"name": "year", "type": "int32", "index": True, "facet": False, "optional": True}
+
+
+def test_equal_schemas_have_no_diff():
+    assert not diff_schemas(schema(TITLE, YEAR), schema(TITLE, YEAR))
+
+
+def test_added_and_dropped_fields():
+    diff = diff_schemas(schema(TITLE, YEAR), schema(TITLE, {**YEAR, "name": "pages"}))
+    assert [f.name for f in diff.add] == ["pages"]
+    assert diff.drop == ["year"]
+    assert not diff.incompatible
+    patch = diff.to_patch()["fields"]
+    assert patch[0] == {"name": "year", "drop": True}
+    assert patch[1]["name"] == "pages" and patch[1]["type"] == "int32"
+
+
+def test_changed_attribute_drops_and_adds_field():
+    diff = diff_schemas(schema(TITLE, YEAR), schema(TITLE, {**YEAR, "facet": True}))
+    assert diff.drop == ["year"]
+    assert [(f.name, f.facet) for f in diff.add] == [("year", True)]
+
+
+def test_type_change_is_incompatible():
+    diff = diff_schemas(schema(TITLE, YEAR), schema(TITLE, {**YEAR, "type": "string"}))
+    assert diff.incompatible and not diff.add and not diff.drop
+    with pytest.raises(IncompatibleSchemaChange):
+        diff.to_patch()
+
+
+def test_collection_level_change_is_incompatible():
+    diff = diff_schemas(schema(TITLE, token_separators=["-"]), schema(TITLE, token_separators=["-", "/"]))
+    assert len(diff.incompatible) == 1 and "token_separators" in diff.incompatible[0]
+    assert not diff_schemas(schema(TITLE, token_separators=[]), schema(TITLE))
@@ -0,0 +1,38 @@
+from datetime import timedelta
+from time import monotonic
+import pytest
+from typesense_orm import ApiCallerSync, Client, Node, create_base_model, Field
+from typesense_orm.search import SearchRes
+
+
+@pytest.fixture
+def client(typesense):
+    client = Client[ApiCallerSync](api_key="abcd", nodes=[Node(url=typesense.url)], max_pending_write_batches=10,
+                                   max_write_backoff=timedelta(seconds=5))
+    client.start()
+    yield client
+    client.api_caller.close_session()
+
+
+@pytest.fixture
+def Books(client):
+    BaseModel = create_base_model(client)
+
+    class Books(BaseModel):
+        title: str = Field(..., index=True)
+
+    return Books
+
+
+def test_long_search_is_not_backed_off_by_writes(client, typesense, Books):
+    client.import_objects([Books(id=str(i), title=f"book {i}") for i in range(3)])
+    node = client.api_caller.nearest_node.url
+    client.api_caller.admission.report_pending_write_batches(node, 100, ttl=60)
+    assert client.api_caller.admission.overloaded(node)
+
+    start = monotonic()
+    res = client._search_request(Books, {"q": "*", "filter_by": "id:[0,2]"}, False, None,
+                                 lambda resp: SearchRes[Books].parse_obj(resp), max_get_size=0)
+    assert monotonic() - start < 1
+    assert typesense.calls[-1][0] == "multi_search"
+    assert sorted(hit.document.id for hit in res.hits) == ["0", "2"]
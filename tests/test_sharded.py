@@ -0,0 +1,42 @@
+import pytest
+from typesense_orm.exceptions import UnsupportedSortClause
+from typesense_orm.search import SearchQuery, FacetRes
+from typesense_orm.sharded_client import parse_sort_by, merge_facet_counts, TEXT_MATCH
+
+
+def query(sort_by=None) -> SearchQuery:
+    return SearchQuery.construct(q="books", sort_by=sort_by, vector_query=None)
+
+
+def test_default_order_is_text_match():
+    assert parse_sort_by(query()) == [(TEXT_MATCH, True)]
+
+
+def test_sort_clauses():
+    assert parse_sort_by(query("year:desc, _text_match:DESC,title:asc")) == \
+        [("year", True), (TEXT_MATCH, True), ("title", False)]
+
+
+@pytest.mark.parametrize("sort_by", ["location(48.8, 2.3):asc", "year:desc,location(48.8,2.3):asc",
+                                     "_eval(in_stock:true):desc", "_eval([(a:1):3, (a:2):2]):desc",
+                                     "year(missing_values: first):desc", "_group_found:desc", "year", "year:up"])
+def test_clauses_which_cannot_be_merged_are_rejected(sort_by):
+    with pytest.raises(UnsupportedSortClause):
+        parse_sort_by(query(sort_by))
+
+
+def facet(*counts) -> FacetRes:
+    return FacetRes.parse_obj({"field_name": "genre",
+                               "counts": [{"value": v, "highlighted": v, "count": c} for v, c in counts],
+                               "stats": {"avg": 0.0, "max": 0.0, "min": 0.0, "sum": 0.0, "total_values": len(counts)}})
+
+
+def test_facet_counts_of_string_values_are_merged():
+    class Res:
+        def __init__(self, *facets):
+            self.facet_counts = facets
+
+    merged = merge_facet_counts([Res(facet(("drama", 2), ("poetry", 1))), Res(facet(("poetry", 3)))])
+    assert [(c.value, c.count, c.highlighted) for c in merged[0].counts] == [("poetry", 4, "poetry"),
+                                                                              ("drama", 2, "drama")]
+    assert merged[0].stats.total_values == 3
@@ -0,0 +1,35 @@
+import asyncio
+from typesense_orm.schema import Schema
+
+
+def test_concurrent_gets_share_one_request(client, typesense):
+    typesense.collections["books"] = {"name": "books", "fields": [{"name": "title", "type": "string"}]}
+    caller = client.api_caller
+    tasks = [caller.get_task("/collections/books", schedule=False, handler=Schema.from_dict) for _ in range(3)]
+    schemas = caller.loop.run_until_complete(asyncio.gather(*tasks))
+
+    assert typesense.calls.count(("get_collection", "books")) == 1
+    assert all(schema.name == "books" and list(schema.fields) == ["title"] for schema in schemas)
+
+
+def test_waiters_get_their_own_response(client, typesense):
+    typesense.collections["books"] = {"name": "books", "fields": []}
+
+    def mutate(resp):
+        resp["fields"].append("mutated")
+        return resp
+
+    caller = client.api_caller
+    tasks = [caller.get_task("/collections/books", schedule=False, handler=mutate) for _ in range(2)]
+    first, second = caller.loop.run_until_complete(asyncio.gather(*tasks))
+
+    assert first is not second
+    assert first["fields"] == second["fields"] == ["mutated"]
+
+
+def test_failure_is_shared_and_not_cached(client, typesense):
+    caller = client.api_caller
+    tasks = [caller.get_task("/collections/missing", schedule=False) for _ in range(2)]
+    results = caller.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+    assert all(getattr(r, "status_code", None) == 404 for r in results)
+    assert caller.shared_requests == {}
@@ -0,0 +1,53 @@
+from datetime import timedelta
+import pytest
+from typesense_orm import ApiCallerSync, Client, Node, create_base_model, Field
+from typesense_orm.search import SearchQuery
+from typesense_orm.slow_queries import RequestTrace, SlowQuery, SlowQueryLog
+
+
+@pytest.fixture
+def sink():
+    return []
+
+
+@pytest.fixture
+def client(typesense, sink):
+    client = Client[ApiCallerSync](api_key="abcd", nodes=[Node(url=typesense.url)],
+                                   slow_query_threshold=timedelta(0), slow_query_log_size=2, on_slow_query=sink.append)
+    client.start()
+    yield client
+    client.api_caller.close_session()
+
+
+def test_searches_over_the_threshold_are_logged(client, typesense, sink):
+    BaseModel = create_base_model(client)
+
+    class Books(BaseModel):
+        title: str = Field(..., index=True)
+
+    client.import_objects([Books(id=str(i), title=f"book {i}") for i in range(3)])
+    pages = list(client.search(Books, SearchQuery(q="*", query_by=[Books.title], per_page=1)))
+    assert len(pages) == 3
+
+    log = client.api_caller.slow_queries
+    assert len(sink) == 3 and len(log) == 2
+    assert list(log) == sink[1:]
+    entry = sink[0]
+    assert entry.collection == "books" and entry.node == typesense.url
+    assert entry.query["q"] == "*" and entry.server_ms == 1
+    assert entry.total_ms >= entry.queue_ms + entry.parse_ms
+
+
+def test_breakdown_excludes_server_time():
+    trace = RequestTrace()
+    trace.node, trace.queue, trace.network, trace.parse = "n", 0.01, 0.05, 0.02
+    entry = SlowQuery.from_trace("books", {"q": "*"}, trace, 0.1, server_ms=30)
+    assert entry.queue_ms == pytest.approx(10)
+    assert entry.network_ms == pytest.approx(20)
+    assert entry.parse_ms == pytest.approx(20)
+    assert entry.other_ms == pytest.approx(20)
+
+
+def test_nothing_is_slow_without_a_threshold():
+    assert not SlowQueryLog(None).is_slow(100)
+    assert SlowQueryLog(timedelta(milliseconds=100)).is_slow(0.2)
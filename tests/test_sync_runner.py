@@ -0,0 +1,58 @@
+import json
+from typing import Optional
+import pytest
+from typesense_orm import create_base_model, Field
+from typesense_orm.sync_runner import Checkpoint, SyncRunner
+
+
+@pytest.fixture
+def Books(client):
+    BaseModel = create_base_model(client)
+
+    class Books(BaseModel):
+        title: str = Field(..., index=True)
+        fail: Optional[bool]
+
+    return Books
+
+
+def dead_letters(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_failed_documents_go_to_dead_letters(client, typesense, Books, tmp_path):
+    source = [Books(id=str(i), title=f"book {i}", fail=i == 2) for i in range(5)]
+    runner = SyncRunner(client, source, str(tmp_path / "checkpoint.json"), str(tmp_path / "dead.jsonl"), batch_size=2)
+    checkpoint = runner.run()
+    assert checkpoint.finished and checkpoint.batches == 3
+    assert checkpoint.imported == 4 and checkpoint.failed == 1
+    assert set(typesense.docs["books"]) == {"0", "1", "3", "4"}
+    assert [(d["sync"], d["index"]) for d in dead_letters(tmp_path / "dead.jsonl")] == [(0, 2)]
+
+
+def test_replayed_batch_does_not_duplicate_dead_letters(client, typesense, Books, tmp_path):
+    source = [Books(id=str(i), title=f"book {i}", fail=i in (1, 3)) for i in range(4)]
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+    dead_letter_path = str(tmp_path / "dead.jsonl")
+    # a crash after the dead letters of the second batch were written, but before its checkpoint was saved
+    Checkpoint(batches=1, offset=2, imported=1, failed=1).save(checkpoint_path)
+    with open(dead_letter_path, "w") as f:
+        for index in (1, 3):
+            f.write(json.dumps({"sync": 0, "index": index}) + "\n")
+
+    checkpoint = SyncRunner(client, source, checkpoint_path, dead_letter_path, batch_size=2).run()
+    assert checkpoint.failed == 2
+    assert [d["index"] for d in dead_letters(dead_letter_path)] == [1, 3]
+
+
+def test_finished_sync_starts_the_next_one(client, typesense, Books, tmp_path):
+    source = [Books(id=str(i), title=f"book {i}", fail=i == 0) for i in range(2)]
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+    dead_letter_path = str(tmp_path / "dead.jsonl")
+    SyncRunner(client, source, checkpoint_path, dead_letter_path).run()
+
+    checkpoint = SyncRunner(client, source, checkpoint_path, dead_letter_path, action="upsert").run()
+    assert checkpoint.sync == 1 and checkpoint.finished
+    assert checkpoint.offset == 2 and checkpoint.imported == 1
+    assert [(d["sync"], d["index"]) for d in dead_letters(dead_letter_path)] == [(0, 0), (1, 0)]
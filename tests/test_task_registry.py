@@ -0,0 +1,31 @@
+import asyncio
+from typesense_orm.task_registry import TaskRegistry
+
+
+async def value(v):
+    return v
+
+
+def run_tasks(registry: TaskRegistry, count: int):
+    loop = asyncio.new_event_loop()
+    try:
+        for i in range(count):
+            registry[f"task{i}"] = loop.create_task(value(i))
+        loop.run_until_complete(asyncio.sleep(0))
+    finally:
+        loop.close()
+
+
+def test_registry_is_unbounded_by_default():
+    registry = TaskRegistry()
+    run_tasks(registry, 1000)
+    assert len(registry.done) == 1000
+    assert registry.spilled == 0
+
+
+def test_bounded_registry_spills_oldest_results():
+    spilled = []
+    registry = TaskRegistry(max_done=2, on_spill=lambda name, outcome: spilled.append((name, outcome)))
+    run_tasks(registry, 5)
+    assert list(registry.done) == ["task3", "task4"]
+    assert spilled == [("task0", 0), ("task1", 1), ("task2", 2)]
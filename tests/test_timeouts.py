@@ -0,0 +1,67 @@
+from datetime import timedelta
+import pytest
+from typesense_orm import ApiCallerSync, Node
+from typesense_orm.exceptions import DeadlineExceeded
+from typesense_orm.timeouts import Deadline, OperationTimeouts, default_timeouts, operation_class, current_deadline, \
+    SEARCH, WRITE, IMPORT, ADMIN
+
+
+@pytest.fixture
+def caller(typesense):
+    typesense.collections["books"] = {"name": "books", "fields": []}
+    caller = ApiCallerSync(api_key="abcd", nodes=[Node(url=typesense.url)],
+                           timeouts={SEARCH: OperationTimeouts(total=timedelta(milliseconds=500))})
+    yield caller
+    caller.close_session()
+
+
+def test_partial_timeouts_keep_defaults(caller):
+    defaults = default_timeouts()
+    assert caller.timeouts[SEARCH].total == timedelta(milliseconds=500)
+    assert caller.timeouts[IMPORT] == defaults[IMPORT]
+    assert caller.timeouts[WRITE] == defaults[WRITE] and caller.timeouts[ADMIN] == defaults[ADMIN]
+
+
+@pytest.mark.parametrize("method, url, operation", [
+    ("get", "/collections/books/documents/search?q=a", SEARCH),
+    ("post", "/multi_search", SEARCH),
+    ("post", "/collections/books/documents/import", IMPORT),
+    ("get", "/collections/books/documents/export", IMPORT),
+    ("get", "/collections/books/documents/1", SEARCH),
+    ("post", "/collections/books/documents", WRITE),
+    ("delete", "/collections/books/documents/1", WRITE),
+    ("get", "/collections/books", ADMIN),
+    ("post", "/aliases", ADMIN),
+])
+def test_operation_class(method, url, operation):
+    assert operation_class(method, url) == operation
+
+
+def test_sub_second_timeouts_and_deadline_cap():
+    timeouts = OperationTimeouts(connect=timedelta(milliseconds=250), total=timedelta(seconds=10))
+    assert timeouts.client_timeout().connect == 0.25
+    assert timeouts.client_timeout().total == 10
+    assert timeouts.client_timeout(Deadline(timedelta(seconds=2))).total <= 2
+
+
+def test_passed_deadline_fails_without_a_request(caller, typesense):
+    calls = len(typesense.calls)
+    with pytest.raises(DeadlineExceeded):
+        caller.get("/collections/books", deadline=Deadline(timedelta(0)))
+    assert len(typesense.calls) == calls
+
+
+def test_deadline_of_the_context_applies_to_tasks(caller, typesense):
+    assert caller.get("/collections/books")["name"] == "books"
+    with Deadline(timedelta(0)) as deadline:
+        assert current_deadline() is deadline
+        task = caller.get_task("/collections/books", schedule=False)
+    assert current_deadline() is None
+    with pytest.raises(DeadlineExceeded):
+        caller.loop.run_until_complete(task)
+
+
+def test_earliest_deadline_wins():
+    with Deadline(timedelta(seconds=1)) as outer:
+        with Deadline(timedelta(seconds=60)):
+            assert current_deadline() is outer
@@ -0,0 +1,65 @@
+from datetime import timedelta
+import pytest
+from typesense_orm import ApiCallerAsync, Client, Node, create_base_model, Field
+from typesense_orm.search import SearchQuery
+from typesense_orm.typeahead import Typeahead, TypeaheadSession, narrows
+
+
+@pytest.fixture
+def Books(client):
+    BaseModel = create_base_model(client)
+
+    class Books(BaseModel):
+        title: str = Field(..., index=True)
+
+    client.import_objects([Books(id=str(i), title=title) for i, title in enumerate(["dune", "dracula", "emma"])])
+    return Books
+
+
+def searches(typesense):
+    return [call for call in typesense.calls if call[0] == "search"]
+
+
+def test_narrowing_query_is_answered_locally(client, typesense, Books):
+    session = TypeaheadSession(client, Books, SearchQuery(q="*", query_by=[Books.title]))
+    assert session.search("d").found == 3
+    res = session.search("du")
+    assert [hit.document.id for hit in res.hits] == ["0"]
+    assert (session.sent, session.reused) == (1, 1)
+    assert len(searches(typesense)) == 1
+
+    session.search("e")
+    assert session.sent == 2 and len(searches(typesense)) == 2
+
+
+def test_narrows():
+    assert narrows("dun", "du") and narrows("Dune m", "dune")
+    assert not narrows("da", "du") and not narrows("d", " ")
+
+
+def test_superseded_search_is_cancelled_before_it_is_sent(typesense, Books):
+    client = Client[ApiCallerAsync](api_key="abcd", nodes=[Node(url=typesense.url)])
+    client.start()
+    loop = client.api_caller.loop
+    try:
+        session = TypeaheadSession(client, Books, SearchQuery(q="*", query_by=[Books.title]),
+                                   debounce=timedelta(milliseconds=20), reuse_prefix=False)
+        calls = len(searches(typesense))
+        first = session.search("d")
+        second = session.search("du")
+        res = loop.run_until_complete(second)
+        assert first.cancelled()
+        assert res.found == 3
+        assert (session.sent, session.cancelled) == (1, 1)
+        assert len(searches(typesense)) == calls + 1
+    finally:
+        loop.run_until_complete(client.api_caller.close_session(schedule=False))
+
+
+def test_least_recently_used_sessions_are_evicted(client, Books):
+    typeahead = Typeahead(client, Books, SearchQuery(q="*", query_by=[Books.title]), max_sessions=2)
+    first = typeahead.session("a")
+    typeahead.session("b")
+    assert typeahead.session("a") is first
+    typeahead.session("c")
+    assert list(typeahead.sessions) == ["a", "c"]
@@ -3,7 +3,7 @@ from .api_caller import Node, ApiCallerSync, ApiCallerAsync, ApiCaller
 from .higher_client import Client
 from .field import Field
 from .base_model import create_base_model
-from .types import int32, int64
+from .types import int32, int64, Vector
 from .search import SearchQuery, SearchRes
 
 nest_asyncio.apply()
@@ -0,0 +1,215 @@
+import asyncio
+from typing import Dict, List, Optional, Tuple
+from contextlib import asynccontextmanager
+from time import monotonic
+from pydantic import BaseModel, Field
+from .logging import logger
+
+
+class TokenBucket:
+    """
+    A token bucket used to cap the rate of requests a caller sends.
+    Attributes:
+        rate (float): number of tokens added per second
+        capacity (float): maximal number of tokens the bucket can hold, i.e. the allowed burst
+    """
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated: Optional[float] = None
+
+    def _refill(self, now: float):
+        if self.updated is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def take(self, loop: asyncio.AbstractEventLoop):
+        """
+        Wait until a token is available and take it.
+        Args:
+            loop (asyncio.AbstractEventLoop): a loop which clock is used to refill the bucket
+        """
+        while True:
+            self._refill(loop.time())
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class QueueStats(BaseModel):
+    """
+    Statistics of time requests spent waiting for admission.
+    Attributes:
+        admitted (int): number of admitted requests
+        waiting (int): number of requests currently waiting for admission
+        last_wait (float): seconds the last admitted request waited
+        max_wait (float): maximal number of seconds a request waited
+        total_wait (float): total number of seconds requests waited
+    """
+    admitted: int = Field(0)
+    waiting: int = Field(0)
+    last_wait: float = Field(0.0)
+    max_wait: float = Field(0.0)
+    total_wait: float = Field(0.0)
+
+    @property
+    def avg_wait(self) -> float:
+        return self.total_wait / self.admitted if self.admitted else 0.0
+
+
+class AdmissionController:
+    """
+    Limits requests which are in flight against every node and the rate they are sent with.
+    Attributes:
+        max_in_flight (int or None): maximal number of concurrent requests per node
+        max_in_flight_reads (int or None): maximal number of concurrent read requests per node
+        max_in_flight_writes (int or None): maximal number of concurrent write requests per node
+        max_qps (float or None): maximal number of requests per second
+        max_pending_write_batches (int or None): writes to a node wait while it reports more pending write batches
+        write_backoff (float): seconds a write waits before pending write batches are checked again
+        max_write_backoff (float): maximal number of seconds a write backs off in total, it's sent afterwards
+        pending_write_batches (dict of int): the last known number of pending write batches of every node, it's
+        updated by a stats poller
+        pending_expires (dict of float): moments on the monotonic clock when the known numbers become stale, stale
+        numbers are ignored
+        stats (dict of QueueStats): queue wait statistics of reads and writes
+    """
+    def __init__(self, max_in_flight: Optional[int] = None,
+                 max_in_flight_reads: Optional[int] = None,
+                 max_in_flight_writes: Optional[int] = None,
+                 max_qps: Optional[float] = None,
+                 qps_burst: Optional[float] = None,
+                 max_pending_write_batches: Optional[int] = None,
+                 write_backoff: float = 0.5,
+                 max_write_backoff: float = 30.0):
+        self.max_in_flight = max_in_flight
+        self.max_in_flight_reads = max_in_flight_reads
+        self.max_in_flight_writes = max_in_flight_writes
+        self.bucket = TokenBucket(max_qps, qps_burst) if max_qps else None
+        self.max_pending_write_batches = max_pending_write_batches
+        self.write_backoff = write_backoff
+        self.max_write_backoff = max_write_backoff
+        self.pending_write_batches: Dict[str, int] = {}
+        self.pending_expires: Dict[str, float] = {}
+        self.semaphores: Dict[Tuple[str, str], asyncio.Semaphore] = {}
+        self.stats: Dict[str, QueueStats] = {"read": QueueStats(), "write": QueueStats()}
+
+    def _semaphores(self, node: str, read: bool):
+        kind_limit = self.max_in_flight_reads if read else self.max_in_flight_writes
+        for kind, limit in (("all", self.max_in_flight), ("read" if read else "write", kind_limit)):
+            if limit is None:
+                continue
+            key = (node, kind)
+            if key not in self.semaphores:
+                # semaphores are created lazily, so they are bound to the loop which actually runs requests
+                self.semaphores[key] = asyncio.Semaphore(limit)
+            yield self.semaphores[key]
+
+    def report_pending_write_batches(self, node: str, count: int, ttl: float):
+        """
+        Record a number of pending write batches of a node.
+        Args:
+            node (str): a node url
+            count (int): the number of pending write batches
+            ttl (float): seconds the number is used for, e.g. a few poll intervals
+        """
+        self.pending_write_batches[node] = count
+        self.pending_expires[node] = monotonic() + ttl
+
+    def clear_pending_write_batches(self):
+        self.pending_write_batches.clear()
+        self.pending_expires.clear()
+
+    def overloaded(self, node: str) -> bool:
+        """
+        Whether a node recently reported more pending write batches than allowed.
+        """
+        return self.max_pending_write_batches is not None and \
+            self.pending_write_batches.get(node, 0) > self.max_pending_write_batches and \
+            monotonic() < self.pending_expires.get(node, 0.0)
+
+    async def _back_off(self, node: str, read: bool):
+        if read:
+            return
+        start = monotonic()
+        while self.overloaded(node):
+            if monotonic() - start >= self.max_write_backoff:
+                logger.warning(f"{node} is still overloaded after {self.max_write_backoff}s of back-off, "
+                               f"sending a write anyway")
+                return
+            logger.debug(f"{node} has {self.pending_write_batches[node]} pending write batches, backing off")
+            await asyncio.sleep(self.write_backoff)
+
+    async def acquire(self, node: str, read: bool, loop: asyncio.AbstractEventLoop) -> "Slot":
+        """
+        Wait until a request to a node may be sent and take its in-flight slots.
+        Args:
+            node (str): url of the node the request is sent to
+            read (bool): whether the request is a read
+            loop (asyncio.AbstractEventLoop): a loop which runs the request
+
+        Returns:
+            Slot: the taken slots, they should be released when the response is fully read
+        """
+        stats = self.stats["read" if read else "write"]
+        semaphores = list(self._semaphores(node, read))
+        start = loop.time()
+        stats.waiting += 1
+        acquired = []
+        try:
+            await self._back_off(node, read)
+            for semaphore in semaphores:
+                await semaphore.acquire()
+                acquired.append(semaphore)
+            if self.bucket:
+                await self.bucket.take(loop)
+        except BaseException:
+            for semaphore in acquired:
+                semaphore.release()
+            raise
+        finally:
+            stats.waiting -= 1
+
+        wait = loop.time() - start
+        stats.admitted += 1
+        stats.last_wait = wait
+        stats.total_wait += wait
+        stats.max_wait = max(stats.max_wait, wait)
+        if wait > 0.1:
+            logger.debug(f"request to {node} waited {wait:.3f}s for admission")
+        return Slot(acquired, wait)
+
+    @asynccontextmanager
+    async def admit(self, node: str, read: bool, loop: asyncio.AbstractEventLoop):
+        """
+        Wait until a request to a node may be sent, and hold its in-flight slots while it runs, see acquire.
+
+        Yields:
+            float: number of seconds the request has waited in the queue
+        """
+        slot = await self.acquire(node, read, loop)
+        try:
+            yield slot.wait
+        finally:
+            slot.release()
+
+
+class Slot:
+    """
+    In-flight slots taken by a request.
+    Attributes:
+        wait (float): number of seconds the request has waited in the queue
+    """
+    def __init__(self, semaphores: List[asyncio.Semaphore], wait: float):
+        self.semaphores = semaphores
+        self.wait = wait
+
+    def release(self):
+        """
+        Release the slots, it may be called more than once.
+        """
+        semaphores, self.semaphores = self.semaphores, []
+        for semaphore in semaphores:
+            semaphore.release()
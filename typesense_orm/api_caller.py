@@ -1,6 +1,6 @@
-from pydantic import BaseModel, Field, AnyHttpUrl
+from pydantic import BaseModel, Field, AnyHttpUrl, validator
 from pydantic.generics import GenericModel
-from typing import Sequence, Optional, Callable, TypeVar, Awaitable, Dict, Any, Type, Generic, Union, AsyncIterable, Iterable, ClassVar
+from typing import Sequence, Optional, Callable, TypeVar, Awaitable, Dict, Any, Type, Generic, Union, AsyncIterable, Iterable, ClassVar, List
 import aiohttp
 import asyncio
 from asyncio import Task, gather, all_tasks
@@ -11,8 +11,17 @@ from functools import wraps
 from abc import ABC, abstractmethod
 from pydantic.main import ModelMetaclass
 import inspect
+import os
+import weakref
+import nest_asyncio
 from .exception_dict import ExceptionDict
-from json import loads
+from .task_registry import TaskRegistry, task_outcome
+from .admission import AdmissionController
+from .stats import StatsSeries, StatsPoller, NodeStats
+from .slow_queries import RequestTrace, SlowQueryLog
+from .document_cache import DocumentCache
+from .timeouts import OperationTimeouts, Deadline, SEARCH, default_timeouts, operation_class, current_deadline
+from json import loads, dumps
 
 
 class Node(BaseModel):
@@ -27,6 +36,11 @@ V = TypeVar("V")
 Wrapper = TypeVar("Wrapper")
 Iterator = TypeVar("Iterator")
 
+# loops and sessions a forked process inherited from its parent. They are never used or closed in the child, since
+# their sockets and selector are shared with the parent, and they are kept here so that their finalizers don't run.
+# Every loop and session is kept once, callers created in the parent usually share a loop.
+_inherited: List[Any] = []
+
 
 def wrap_task(func: Callable[..., Awaitable[Any]]):
     """
@@ -52,7 +66,7 @@ def wrap_task(func: Callable[..., Awaitable[Any]]):
             asyncio.Task: a task in a caller loop which was created.
 
         """
-        print(f"created task {name}")
+        self.ensure_process()
         task = self.loop.create_task(func(self, *args, **kwargs), name=name)
         if schedule:
             self.tasks[task.get_name()] = task
@@ -62,11 +76,13 @@ def wrap_task(func: Callable[..., Awaitable[Any]]):
     return wrapper
 
 
-def retry(do_after_retries: Callable[[Cl], Any]):
+def retry(do_after_retries: Callable[[Cl], Any], retry_empty: bool = True):
     """
     A decorator to retry connection several times.
     Args:
         do_after_retries (): a callback that is applied when retries fail
+        retry_empty (bool): whether an empty result (like None) should be retried as well as a connection error.
+        Retries stop with DeadlineExceeded when a deadline passed to the function or set in the context has passed.
 
     Returns:
 
@@ -74,8 +90,11 @@ def retry(do_after_retries: Callable[[Cl], Any]):
     def decorator(func):
         @wraps(func)
         async def wrapper(self: Cl, *args, **kwargs):
+            deadline = current_deadline(kwargs.get("deadline"))
             while True:
                 for _ in range(self.num_retries):
+                    if deadline is not None:
+                        deadline.check()
                     try:
                         logger.info("trying")
                         res = func(self, *args, **kwargs)
@@ -84,14 +103,20 @@ def retry(do_after_retries: Callable[[Cl], Any]):
                         else:
                             ret = res
 
-                        if ret:
+                        if ret or not retry_empty:
                             return ret
 
                     except aiohttp.ClientConnectionError:
                         logger.debug("excepted connection")
 
-                    await asyncio.sleep(self.retry_interval.seconds)
+                    interval = self.retry_interval.total_seconds()
+                    if deadline is not None:
+                        # never sleep past the deadline, the next attempt fails fast instead
+                        interval = min(interval, deadline.remaining())
+                    await asyncio.sleep(interval)
 
+                if deadline is not None:
+                    deadline.check()
                 do_after_retries(self)
 
         return wrapper
@@ -103,15 +128,24 @@ class MethodAssigner(ModelMetaclass):
     """
     A metaclass for api callers, I have no wish to implement all request methods separately, so I've created a factory,
     and this metaclass implements it.
+    Apart from get, post, put, patch and delete it also assigns get_task, post_task, put_task, patch_task and
+    delete_task, which always
+    return a task whatever the caller is. They are used by pipelines that make several requests concurrently.
     """
     def __new__(mcs, *args, **kwargs):
         ret: Type[ApiCaller] = super().__new__(mcs, *args, **kwargs)
         sync = ret.sync()
-        ret.get = request_factory(aiohttp.ClientSession.get, sync)
+        ret.get = request_factory(aiohttp.ClientSession.get, sync, read=True)
         ret.post = request_factory(aiohttp.ClientSession.post, sync)
         ret.put = request_factory(aiohttp.ClientSession.put, sync)
         ret.delete = request_factory(aiohttp.ClientSession.delete, sync)
-        ret.__abstractmethods__ = frozenset(ret.__abstractmethods__ - {"delete", "post", "put", "get"})
+        ret.patch = request_factory(aiohttp.ClientSession.patch, sync)
+        ret.get_task = request_factory(aiohttp.ClientSession.get, False, read=True)
+        ret.post_task = request_factory(aiohttp.ClientSession.post, False)
+        ret.put_task = request_factory(aiohttp.ClientSession.put, False)
+        ret.delete_task = request_factory(aiohttp.ClientSession.delete, False)
+        ret.patch_task = request_factory(aiohttp.ClientSession.patch, False)
+        ret.__abstractmethods__ = frozenset(ret.__abstractmethods__ - {"delete", "post", "put", "get", "patch"})
         if sync:
             ret.WRAPPER = Union
             ret.ITERATOR = Iterable
@@ -148,22 +182,26 @@ def nearest_node_unhealthy(self: Cl):
     self.loop.run_until_complete(self.setup_session())
 
 
-def request_factory(method: Callable[..., Awaitable[aiohttp.ClientResponse]], sync: bool):
+def request_factory(method: Callable[..., Awaitable[aiohttp.ClientResponse]], sync: bool, read: bool = False):
     """
     A factory for request functions
     Args:
         method (): a coroutine function which implements the call
         sync (bool): whether an output function return a task or a ready result
+        read (bool): whether the method only reads data, it defines which in-flight limit is applied to a request
 
     Returns:
 
     """
     @wraps(method)
     @wrap_task
-    @retry(nearest_node_unhealthy)
+    @retry(nearest_node_unhealthy, retry_empty=False)
     async def make_request(self: Cl, url,
                            handler: Callable[[Dict[str, Any]], T] = lambda a: a,
                            multiline=False,
+                           trace: Optional[RequestTrace] = None,
+                           operation: Optional[str] = None,
+                           deadline: Optional[Deadline] = None,
                            **kwargs) \
             -> Union[Awaitable[T], AsyncIterable[T]]:
         """
@@ -174,31 +212,94 @@ def request_factory(method: Callable[..., Awaitable[aiohttp.ClientResponse]], sy
             handler (): a callback function which is used to handle response as json
             multiline (bool): if the response is expected to be multiline. If so, the callback will be called with two
             parameters - json and line index.
+            trace (RequestTrace or None): if set, it's filled with the node and timings of the request
+            operation (str or None): a class of the request which defines its timeouts: search, write, import or
+            admin. If None, it's inferred from the method and the url. A search is admitted as a read whatever its
+            method is, e.g. a search sent in a POST body.
+            deadline (Deadline or None): a deadline of the request, the timeout is capped by its remaining time,
+            a deadline of the current context applies either
             **kwargs (): additional keyword arguments passed to the request function.
 
         Returns:
             asyncio.Coroutine
 
         """
-        r = await method(self.session, url, **kwargs)
-        if r.status < 200 or r.status >= 300:
-            raise ApiResponseNotOk(await r.json(), r.status)
+        request_deadline = current_deadline(deadline)
+        timeouts = self.timeouts.get(operation or operation_class(method.__name__, url))
+        # searches sent with POST don't wait for write slots and aren't backed off from busy writers
+        admit_read = read or operation == SEARCH
+
+        async def send(wait: float) -> aiohttp.ClientResponse:
+            if trace is not None:
+                trace.node = self.nearest_node.url
+                trace.queue = wait
+            if request_deadline is not None:
+                request_deadline.check()
+            request_kwargs = kwargs
+            if "timeout" not in kwargs and timeouts is not None:
+                request_kwargs = dict(kwargs, timeout=timeouts.client_timeout(request_deadline))
+            response = await method(self.session, url, **request_kwargs)
+            if response.status < 200 or response.status >= 300:
+                raise ApiResponseNotOk(await response.json(), response.status)
+            return response
+
+        async def fetch_json() -> Dict[str, Any]:
+            # the in-flight slot is held until the body is read
+            async with self.admission.admit(self.nearest_node.url, admit_read, self.loop) as wait:
+                response = await send(wait)
+                json = await response.json()
+                response.close()
+            return json
+
+        async def fetch_body() -> bytes:
+            async with self.admission.admit(self.nearest_node.url, admit_read, self.loop) as wait:
+                response = await send(wait)
+                body = await response.read()
+                response.close()
+            return body
+
         if not multiline:
-            json = await r.json()
-            r.close()
-            return handler(json)
+            start = self.loop.time()
+            if read and self.single_flight:
+                key = (method.__name__, url, dumps(kwargs, sort_keys=True, default=str))
+                # the raw body is shared, every waiter parses its own copy which its handler may modify
+                json = loads(await self.share_in_flight(key, fetch_body))
+            else:
+                json = await fetch_json()
+            if trace is None:
+                return handler(json)
+
+            received = self.loop.time()
+            trace.network = received - start - trace.queue
+            ret = handler(json)
+            trace.parse = self.loop.time() - received
+            return ret
         else:
-            async def async_gen(response: aiohttp.ClientResponse):
-                i = 0
-                while True:
-                    line = await response.content.readline()
-                    if line == b"":
-                        break
-                    yield handler(i, loads(line))
-                    i += 1
-                response.close()
+            # a streamed response holds its in-flight slot until it's read to the end or dropped
+            slot = await self.admission.acquire(self.nearest_node.url, admit_read, self.loop)
+            try:
+                r = await send(slot.wait)
+            except BaseException:
+                slot.release()
+                raise
 
-            return async_gen(r)
+            async def async_gen(response: aiohttp.ClientResponse):
+                try:
+                    i = 0
+                    while True:
+                        line = await response.content.readline()
+                        if line == b"":
+                            break
+                        yield handler(i, loads(line))
+                        i += 1
+                finally:
+                    response.close()
+                    slot.release()
+
+            lines = async_gen(r)
+            # a generator which is never iterated doesn't run its finally clause
+            weakref.finalize(lines, slot.release)
+            return lines
 
     if sync:
         @wraps(make_request)
@@ -215,6 +316,7 @@ def request_factory(method: Callable[..., Awaitable[aiohttp.ClientResponse]], sy
                 you can still add a callback handler and make a caller to memorize the results.
 
             """
+            self.ensure_process()
             ret = self.loop.run_until_complete(make_request(self, url,
                                                             handler=handler,
                                                             schedule=schedule,
@@ -241,37 +343,144 @@ class ApiCaller(ABC, GenericModel, Generic[Wrapper, Iterator]):
     Attributes:
         api_key (str): An api key to make the requests
         nodes (list of Node): a list of nodes that this caller can use.
-        connection_timeout(timedelta): connection timeout
+        connection_timeout(timedelta): a total timeout of health checks and of requests without an operation class
+        timeouts (dict of OperationTimeouts): connect, read and total timeouts of search, write, import and admin
+        requests, classes which aren't given keep their default timeouts
         num_retries (int): number of retries it makes before considers node unhealthy.
         retry_interval (timedelta): retry interval
         healthcheck_interval (timedelta): interval after unsuccessful healthcheck before the next one
+        max_in_flight (int or None): maximal number of concurrent requests to a node, unlimited if None
+        max_in_flight_reads (int or None): maximal number of concurrent read requests to a node
+        max_in_flight_writes (int or None): maximal number of concurrent write requests to a node
+        max_qps (float or None): maximal number of requests per second the caller sends, unlimited if None
+        qps_burst (float or None): number of requests which can be sent at once before max_qps applies
+        single_flight (bool): whether identical concurrent GET requests share one request and its response body.
+        max_done_tasks (int or None): maximal number of finished scheduled tasks kept until they are retrieved,
+        unlimited if None
+        on_task_spill (callable or None): a callback which receives a name and a result (or an exception) of a
+        finished task which doesn't fit into the registry anymore. If None, such results are dropped with a warning.
+        max_pending_write_batches (int or None): writes wait while the node reports more pending write batches,
+        it requires the stats poller
+        write_backoff (timedelta): time a write waits before pending write batches are checked again
+        max_write_backoff (timedelta): maximal time a write backs off from an overloaded node, it's sent afterwards
+        stats_interval (timedelta or None): if set, node statistics are polled in the background with this interval
+        stats_samples (int): number of samples of every node kept in stats_series
+        slow_query_threshold (timedelta or None): searches which take longer are logged into slow_queries
+        slow_query_log_size (int): number of slow searches kept
+        on_slow_query (callable or None): a sink which receives every slow search
+        document_cache_size (int or None): if set, documents fetched by id are cached, up to this number
+        document_cache_ttl (timedelta or None): how long a cached document is used, unlimited if None
+        debug (bool): whether the loop runs in asyncio debug mode, it slows every task down
         nearest_node: (Node): a nearest node which is used by caller.
         loop: (asyncio.AbstractEventLoop): an event loop which is used by caller to perform tasks (synchronous caller either uses it)
-        tasks: (dict of Task): tasks which results can currently be retrieved by ApiCaller.wait_for_all()
+        pid: (int): a process the loop and the session belong to, see ApiCaller.ensure_process()
+        tasks: (TaskRegistry): tasks which results can currently be retrieved by ApiCaller.wait_all() or
+        ApiCaller.as_completed()
         session: (aiohttp.ClientSession or None): aiohttp client session used by caller.
+        shared_requests: (dict of Future): requests which are currently shared by single flight
+        admission: (AdmissionController): a controller which applies in-flight and rate limits, it also keeps
+        queue wait statistics.
+        stats_series: (StatsSeries): sampled statistics of the nodes
+        stats_poller: (StatsPoller): a poller which fills stats_series
+        slow_queries: (SlowQueryLog): a log of slow searches
+        document_cache: (DocumentCache or None): a cache of documents fetched by id
     """
     WRAPPER: ClassVar = None
     ITERATOR: ClassVar = None
     api_key: str
     nodes: Sequence[Node]
     connection_timeout: timedelta = Field(timedelta(seconds=3))
+    timeouts: Dict[str, OperationTimeouts] = Field(default_factory=default_timeouts)
     num_retries: int = Field(3)
     retry_interval: timedelta = Field(timedelta(seconds=1))
     healthcheck_interval: timedelta = Field(timedelta(seconds=60))
+    max_in_flight: Optional[int] = Field(None)
+    max_in_flight_reads: Optional[int] = Field(None)
+    max_in_flight_writes: Optional[int] = Field(None)
+    max_qps: Optional[float] = Field(None)
+    qps_burst: Optional[float] = Field(None)
+    single_flight: bool = Field(True)
+    max_done_tasks: Optional[int] = Field(None)
+    on_task_spill: Optional[Callable[[str, Any], Any]] = Field(None)
+    max_pending_write_batches: Optional[int] = Field(None)
+    write_backoff: timedelta = Field(timedelta(seconds=0.5))
+    max_write_backoff: timedelta = Field(timedelta(seconds=30))
+    stats_interval: Optional[timedelta] = Field(None)
+    stats_samples: int = Field(360)
+    slow_query_threshold: Optional[timedelta] = Field(None)
+    slow_query_log_size: int = Field(1000)
+    on_slow_query: Optional[Callable[[Any], Any]] = Field(None)
+    document_cache_size: Optional[int] = Field(None)
+    document_cache_ttl: Optional[timedelta] = Field(None)
+    debug: bool = Field(False)
     nearest_node: Optional[Node] = Field(None)
 
+    @validator("timeouts")
+    def merge_default_timeouts(cls, v):
+        return {**default_timeouts(), **v}
+
     def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None, **kwargs):
         super().__init__(**kwargs)
-        if loop:
-            self.loop = loop
-        else:
-            self.loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
+        self.setup_process(loop if loop else asyncio.get_event_loop())
 
-        self.loop.set_debug(True)
-        self.tasks = {}
+    def setup_process(self, loop: asyncio.AbstractEventLoop):
+        """
+        Create the state of the caller which belongs to one process: the loop, sessions, tasks, limits, statistics
+        and the nearest node.
+        Args:
+            loop (asyncio.AbstractEventLoop): an event loop the caller uses
+        """
+        self.pid = os.getpid()
+        self.loop: asyncio.AbstractEventLoop = loop
+        if self.debug:
+            self.loop.set_debug(True)
+        self.tasks = TaskRegistry(self.max_done_tasks, self.on_task_spill)
+        self.shared_requests: Dict[Any, asyncio.Future] = {}
+        self.admission = AdmissionController(max_in_flight=self.max_in_flight,
+                                             max_in_flight_reads=self.max_in_flight_reads,
+                                             max_in_flight_writes=self.max_in_flight_writes,
+                                             max_qps=self.max_qps,
+                                             qps_burst=self.qps_burst,
+                                             max_pending_write_batches=self.max_pending_write_batches,
+                                             write_backoff=self.write_backoff.total_seconds(),
+                                             max_write_backoff=self.max_write_backoff.total_seconds())
+        self.stats_series = StatsSeries(self.stats_samples)
+        self.stats_poller = StatsPoller(self, self.stats_interval or timedelta(seconds=10))
+        self.slow_queries = SlowQueryLog(self.slow_query_threshold, self.slow_query_log_size, self.on_slow_query)
+        self.document_cache = DocumentCache(self.document_cache_size, self.document_cache_ttl) \
+            if self.document_cache_size else None
 
         self.session: Optional[aiohttp.ClientSession] = None
         self.loop.run_until_complete(self.setup_session())
+        if self.stats_interval:
+            self.stats_poller.start()
+
+    def ensure_process(self):
+        """
+        Rebuild the caller if it's used in a process forked after it was created, e.g. by pre-fork servers like
+        gunicorn. The child gets a new loop and session, pending tasks and statistics of the parent are dropped and
+        the nearest node is selected again. Inherited loops and sessions are left untouched, since their sockets
+        are shared with the parent.
+        """
+        if self.pid == os.getpid():
+            return
+
+        logger.info(f"the caller is used in a forked process {os.getpid()}, rebuilding its loop and session")
+        for inherited in (self.loop, self.session):
+            if inherited is not None and not any(inherited is kept for kept in _inherited):
+                _inherited.append(inherited)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = asyncio.get_event_loop()
+            if any(loop is kept for kept in _inherited):
+                # callers created in the parent share a new loop of the child
+                loop = asyncio.new_event_loop()
+                nest_asyncio.apply(loop)
+                asyncio.set_event_loop(loop)
+
+        self.nearest_node = None
+        self.setup_process(loop)
 
     async def do_healthcheck(self, node: Node, session: aiohttp.ClientSession) -> Optional[timedelta]:
         now = datetime.now()
@@ -298,29 +507,104 @@ class ApiCaller(ABC, GenericModel, Generic[Wrapper, Iterator]):
         return best_node
 
     async def setup_session(self):
-        sel_session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.connection_timeout.seconds),
+        sel_session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.connection_timeout.total_seconds()),
                                             headers={API_KEY_HEADER_NAME: self.api_key})
         self.nearest_node = await self.select_new_node(sel_session)
         await sel_session.close()
         self.session = aiohttp.ClientSession(self.nearest_node.url,
-                                             timeout=aiohttp.ClientTimeout(total=self.connection_timeout.seconds),
+                                             timeout=aiohttp.ClientTimeout(total=self.connection_timeout.total_seconds()),
                                              headers={API_KEY_HEADER_NAME: self.api_key})
 
+    def stats_session(self) -> aiohttp.ClientSession:
+        """
+        A session without a base url, it's used to make requests to every node rather than the nearest one.
+        """
+        return aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.connection_timeout.total_seconds()),
+                                     headers={API_KEY_HEADER_NAME: self.api_key})
+
+    async def cluster_stats(self) -> Dict[str, NodeStats]:
+        """
+        Sample statistics of every node once, the samples are appended to stats_series.
+        Returns:
+            dict of NodeStats: samples of the nodes which have responded, by node url
+        """
+        async with self.stats_session() as session:
+            samples = await self.stats_poller.sample(session, list(map(lambda node: node.url, self.nodes)))
+        return {sample.node: sample for sample in samples}
+
+    async def share_in_flight(self, key: Any, fetch: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run fetch once for all concurrent callers with the same key, they all get its result or exception.
+        Args:
+            key (): a key which identifies equal requests
+            fetch (): a coroutine function which makes the request
+
+        Returns:
+            a result of fetch
+        """
+        while key in self.shared_requests:
+            future = self.shared_requests[key]
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # the caller which made the request was cancelled, so the request is made again
+
+        future = self.loop.create_future()
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self.shared_requests[key] = future
+        try:
+            ret = await fetch()
+            future.set_result(ret)
+            return ret
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            del self.shared_requests[key]
+
     def wait_all(self) -> ExceptionDict:
         """
         Retrieve results of all scheduled tasks.
+
+        Notes:
+            results of tasks which were spilled out of the registry are not included.
+
         Returns:
 
         """
         if len(self.tasks) == 0:
             return ExceptionDict({})
 
-        done, pending = self.loop.run_until_complete(asyncio.wait(self.tasks.values(),
-                                                                  loop=self.loop,
-                                                                  return_when=asyncio.ALL_COMPLETED))
-        self.tasks = {}
+        if self.tasks.pending:
+            self.loop.run_until_complete(asyncio.wait(list(self.tasks.pending.values()),
+                                                      return_when=asyncio.ALL_COMPLETED))
+
+        return ExceptionDict(dict(self.tasks.pop_done()))
+
+    async def _as_completed(self) -> AsyncIterable:
+        while len(self.tasks):
+            for name, task in self.tasks.pop_done():
+                yield name, task_outcome(task)
 
-        return ExceptionDict(dict(map(lambda t: (t.get_name(), t), done)))
+            if self.tasks.pending:
+                await asyncio.wait(list(self.tasks.pending.values()), return_when=asyncio.FIRST_COMPLETED)
+
+    def as_completed(self) -> Union[Iterable, AsyncIterable]:
+        """
+        Retrieve results of scheduled tasks as soon as they finish. Every yielded task is removed from the caller,
+        tasks scheduled during iteration are yielded either.
+        Returns:
+            Iterable or AsyncIterable of tuples: task names and results, or exceptions the tasks have raised
+        """
+        if self.sync():
+            return self.synchronise_iterator(self._as_completed())
+
+        return self._as_completed()
 
     def synchronise_iterator(self, ait: AsyncIterable[T]) -> Iterable[T]:
         async def get_next(aiterator: AsyncIterable):
@@ -331,7 +615,6 @@ class ApiCaller(ABC, GenericModel, Generic[Wrapper, Iterator]):
                 return True, None
 
         def iterator(aiterator: AsyncIterable):
-            print("IN ITERATOR")
             while True:
                 fin, obj = self.loop.run_until_complete(get_next(aiterator))
                 if fin:
@@ -366,6 +649,11 @@ class ApiCaller(ABC, GenericModel, Generic[Wrapper, Iterator]):
     def delete(self, url, *args, **kwargs) -> Wrapper:
         pass
 
+    @wraps(aiohttp.ClientSession.patch)
+    @abstractmethod
+    def patch(self, url, *args, **kwargs) -> Wrapper:
+        pass
+
     @classmethod
     @abstractmethod
     def sync(cls):
@@ -384,6 +672,7 @@ class ApiCallerAsync(ApiCaller[Task, AsyncIterable], metaclass=MethodAssigner):
 
     @wrap_task
     async def close_session(self):
+        self.stats_poller.stop()
         return await self.session.close()
 
 
@@ -395,4 +684,5 @@ class ApiCallerSync(ApiCaller[Any, Iterable], metaclass=MethodAssigner):
         return True
 
     def close_session(self):
+        self.stats_poller.stop()
         return self.loop.run_until_complete(self.session.close())
@@ -0,0 +1,157 @@
+import os
+import sqlite3
+from hashlib import blake2b
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+DIGEST_SIZE = 8
+
+
+def content_hash(document: str) -> bytes:
+    """
+    A compact hash of a serialized document.
+    """
+    return blake2b(document.encode("utf-8"), digest_size=DIGEST_SIZE).digest()
+
+
+class HashStore:
+    """
+    A map of document keys to content hashes, it keeps hashes in memory.
+    """
+    def __init__(self):
+        self.hashes: Dict[str, bytes] = {}
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, bytes]:
+        return {key: self.hashes[key] for key in keys if key in self.hashes}
+
+    def set_many(self, items: Iterable[Tuple[str, bytes]]):
+        self.hashes.update(items)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+    def __len__(self):
+        return len(self.hashes)
+
+
+class FileHashStore(HashStore):
+    """
+    A hash store which is loaded from a local file and written back on flush. The file is replaced atomically, so an
+    interrupted sync leaves the previous state.
+    Attributes:
+        path (str): a path to the file
+    """
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                data = f.read()
+            for line in data.splitlines():
+                key, _, digest = line.rpartition(b"\t")
+                if key:
+                    self.hashes[key.decode("utf-8")] = bytes.fromhex(digest.decode())
+        self.dirty = False
+
+    def set_many(self, items: Iterable[Tuple[str, bytes]]):
+        super().set_many(items)
+        self.dirty = True
+
+    def flush(self):
+        if not self.dirty:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            for key, digest in self.hashes.items():
+                f.write(f"{key}\t{digest.hex()}\n".encode("utf-8"))
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+
+class SqliteHashStore(HashStore):
+    """
+    A hash store in a SQLite database, hashes are not kept in memory, so it suits catalogs of any size.
+    Attributes:
+        path (str): a path to the database
+    """
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS hashes (key TEXT PRIMARY KEY, digest BLOB NOT NULL)")
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, bytes]:
+        ret = {}
+        # sqlite limits the number of parameters in a query
+        for start in range(0, len(keys), 500):
+            part = keys[start:start + 500]
+            placeholders = ",".join("?" * len(part))
+            rows = self.connection.execute(f"SELECT key, digest FROM hashes WHERE key IN ({placeholders})", part)
+            ret.update(rows)
+        return ret
+
+    def set_many(self, items: Iterable[Tuple[str, bytes]]):
+        self.connection.executemany("INSERT OR REPLACE INTO hashes (key, digest) VALUES (?, ?)", items)
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM hashes").fetchone()[0]
+
+
+class ChangeTracker:
+    """
+    Remembers content hashes of documents which were sent, so unchanged documents can be skipped by the next sync.
+    A hash is stored only after the server has accepted the document.
+    Attributes:
+        store (HashStore): a store of the hashes, in memory by default
+    """
+    def __init__(self, store: Optional[HashStore] = None):
+        self.store = store if store is not None else HashStore()
+        self.skipped = 0
+
+    @staticmethod
+    def key(collection_name: str, document_id: str) -> str:
+        return f"{collection_name}/{document_id}"
+
+    def changed(self, collection_name: str, documents: Sequence[Tuple[Optional[str], str]]) \
+            -> List[Optional[bytes]]:
+        """
+        Find documents which have changed since they were sent.
+        Args:
+            collection_name (str): a collection name
+            documents (list of tuples): ids and serialized documents, documents without an id are always changed
+
+        Returns:
+            list of bytes or None: a content hash of every changed document, None for unchanged ones
+        """
+        digests = list(map(lambda d: content_hash(d[1]), documents))
+        keys = [self.key(collection_name, document_id) for document_id, _ in documents if document_id is not None]
+        known = self.store.get_many(keys) if keys else {}
+        ret = []
+        for (document_id, _), digest in zip(documents, digests):
+            if document_id is not None and known.get(self.key(collection_name, document_id)) == digest:
+                self.skipped += 1
+                ret.append(None)
+            else:
+                ret.append(digest)
+        return ret
+
+    def update(self, collection_name: str, sent: Iterable[Tuple[str, bytes]]):
+        """
+        Remember hashes of documents the server has accepted.
+        Args:
+            collection_name (str): a collection name
+            sent (): ids and content hashes of the documents
+        """
+        self.store.set_many(map(lambda s: (self.key(collection_name, s[0]), s[1]), sent))
+
+    def flush(self):
+        self.store.flush()
+
+    def close(self):
+        self.store.close()
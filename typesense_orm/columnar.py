@@ -0,0 +1,280 @@
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Type
+from json import dumps
+from math import isfinite
+from json.encoder import encode_basestring_ascii
+from .exceptions import InvalidColumn
+from .types import allowed_types, get_from_opt
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+COLUMNS_CHUNK_ROWS = 10000
+
+INT_RANGES = {"int32": (-pow(2, 31), pow(2, 31) - 1), "int64": (-pow(2, 63), pow(2, 63) - 1)}
+
+
+def to_columns(table: Any) -> Dict[str, Any]:
+    """
+    Convert a table to a dict of numpy arrays.
+    Args:
+        table (): a pandas DataFrame, a pyarrow Table or a mapping of column names to array-likes
+
+    Returns:
+        dict of numpy.ndarray
+    """
+    if np is None:
+        raise ImportError("numpy is required to import columnar data")
+
+    if hasattr(table, "column_names") and hasattr(table, "column"):
+        # pyarrow.Table
+        return {name: table.column(name).to_numpy(zero_copy_only=False) for name in table.column_names}
+
+    if hasattr(table, "columns") and hasattr(table, "to_numpy") and not isinstance(table, Mapping):
+        # pandas.DataFrame
+        return {str(name): table[name].to_numpy() for name in table.columns}
+
+    if isinstance(table, Mapping):
+        return {name: np.asarray(values) for name, values in table.items()}
+
+    raise TypeError(f"cannot import columns from {type(table)}")
+
+
+def column_types(collection: Type, columns: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Find typesense types of columns and check that the columns fit the collection schema.
+    Args:
+        collection (): a model the rows should conform
+        columns (dict of numpy.ndarray): the columns
+
+    Returns:
+        dict of str: typesense type of every column
+
+    Raises:
+        InvalidColumn: when a column is unknown, missing or has an incompatible dtype
+    """
+    fields = collection.schema.fields
+    types = {}
+    for name, values in columns.items():
+        if name == "id":
+            types[name] = "id"
+            check_ids(name, values)
+            continue
+        if name not in fields:
+            raise InvalidColumn(name, "there is no such field in the collection")
+        types[name] = allowed_types[get_from_opt(fields[name].type)[1]]
+        check_dtype(name, values, types[name])
+
+    for name, field in fields.items():
+        if name not in columns and collection.__fields__[name].required:
+            raise InvalidColumn(name, "the field is required, but there is no such column")
+
+    return types
+
+
+def _is_missing(value: Any) -> bool:
+    # None, NaN and pandas NA or NaT stand for a missing value
+    return value is None or (isinstance(value, float) and value != value) or \
+        type(value).__name__ in ("NAType", "NaTType")
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) or \
+        (np is not None and isinstance(value, np.number))
+
+
+def _valid_scalar(value: Any, ts_type: str) -> bool:
+    if ts_type == "string":
+        return isinstance(value, str)
+    if ts_type == "bool":
+        return isinstance(value, bool) or (np is not None and isinstance(value, np.bool_))
+    if not _is_number(value) or not isfinite(value):
+        return False
+    if ts_type in INT_RANGES:
+        low, high = INT_RANGES[ts_type]
+        return value == int(value) and low <= value <= high
+    return True
+
+
+def _is_sequence(value: Any) -> bool:
+    return isinstance(value, (list, tuple)) or (np is not None and isinstance(value, np.ndarray))
+
+
+def _valid_object(value: Any, ts_type: str) -> bool:
+    if ts_type == "geopoint":
+        return _is_sequence(value) and len(value) == 2 and all(map(lambda v: _valid_scalar(v, "float"), value))
+    if ts_type.endswith("[]"):
+        return _is_sequence(value) and all(map(lambda v: _valid_object(v, ts_type[:-2]), value))
+    return _valid_scalar(value, ts_type)
+
+
+def check_objects(name: str, values: Any, ts_type: str):
+    """
+    Check values of an object column one by one, missing values are allowed.
+    Raises:
+        InvalidColumn: when a value doesn't fit the typesense type
+    """
+    for i, value in enumerate(values):
+        if not _is_missing(value) and not _valid_object(value, ts_type):
+            raise InvalidColumn(name, f"value {value!r} of row {i} is not a valid {ts_type}")
+
+
+def check_ids(name: str, values: Any):
+    """
+    Check an id column, ids are strings or integers, which are sent as strings. A missing id is generated by the
+    server.
+    Raises:
+        InvalidColumn: when the column has another dtype, or a value which isn't a string or an integer
+    """
+    if values.ndim != 1:
+        raise InvalidColumn(name, "id column should be one-dimensional")
+    kind = values.dtype.kind
+    if kind == "O":
+        for i, value in enumerate(values):
+            if value is not None and not isinstance(value, str) and (isinstance(value, bool) or not isinstance(value, (int, np.integer))):
+                raise InvalidColumn(name, f"id {value!r} of row {i} is not a string or an integer")
+    elif kind not in "iuUS":
+        raise InvalidColumn(name, f"dtype {values.dtype} is not compatible with ids, they should be strings or integers")
+
+
+def _encode_ids(values: Any) -> List[Optional[str]]:
+    return [None if v is None else encode_basestring_ascii(str(v)) for v in values.tolist()]
+
+
+def check_dtype(name: str, values: Any, ts_type: str):
+    kind = values.dtype.kind
+    if ts_type in ("auto", "string*"):
+        return
+    if kind == "O":
+        check_objects(name, values if values.ndim == 1 else list(values), ts_type)
+        return
+
+    if ts_type.endswith("[]") or ts_type == "geopoint":
+        if values.ndim != 2:
+            raise InvalidColumn(name, f"{ts_type} column should be two-dimensional or hold sequences")
+        if ts_type == "geopoint" and values.shape[1] != 2:
+            raise InvalidColumn(name, "geopoint column should have two values in a row")
+        ts_type = "float" if ts_type.startswith("geopoint") else ts_type[:-2]
+    elif values.ndim != 1:
+        raise InvalidColumn(name, f"{ts_type} column should be one-dimensional")
+
+    allowed_kinds = {"string": "USO", "int32": "iu", "int64": "iu", "float": "fiu", "bool": "b"}[ts_type]
+    if kind == "f" and values.ndim == 2 and not np.isfinite(values).all():
+        # arrays have no missing values
+        raise InvalidColumn(name, f"{name} column has non-finite values in arrays")
+    if kind == "f" and ts_type in INT_RANGES:
+        finite = values[np.isfinite(values)]
+        if not np.array_equal(finite, np.round(finite)):
+            raise InvalidColumn(name, f"{ts_type} column has non-integer values")
+        kind = "i"
+    if kind not in allowed_kinds:
+        raise InvalidColumn(name, f"dtype {values.dtype} is not compatible with {ts_type}")
+
+    if ts_type in INT_RANGES and values.size:
+        low, high = INT_RANGES[ts_type]
+        if values.dtype.itemsize >= (4 if ts_type == "int32" else 8) or kind == "f":
+            finite = values[np.isfinite(values)] if kind == "f" else values
+            if finite.size and (finite.min() < low or finite.max() > high):
+                raise InvalidColumn(name, f"values are out of {ts_type} range")
+
+
+def _encode_scalars(values: Any, ts_type: str) -> List[Optional[str]]:
+    kind = values.dtype.kind
+    if kind == "b":
+        return np.where(values, "true", "false").tolist()
+
+    if kind in "iu":
+        return values.astype(str).tolist()
+
+    if kind == "f":
+        finite = np.isfinite(values)
+        if ts_type in INT_RANGES:
+            encoded = np.where(finite, values, 0).astype(np.int64).astype(str)
+        else:
+            encoded = values.astype(str)
+        ret = encoded.tolist()
+        if not finite.all():
+            for i in np.flatnonzero(~finite).tolist():
+                ret[i] = None
+        return ret
+
+    if kind in "US":
+        return [encode_basestring_ascii(v) for v in values.astype(str).tolist()]
+
+    return [_encode_object(v) for v in values.tolist()]
+
+
+def _plain(value: Any) -> Any:
+    if np is not None and isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value)} is not JSON serializable")
+
+
+def _encode_object(value: Any) -> Optional[str]:
+    if _is_missing(value):
+        return None
+    if isinstance(value, str):
+        return encode_basestring_ascii(value)
+    if np is not None and isinstance(value, np.ndarray):
+        value = value.tolist()
+    return dumps(value, default=_plain, allow_nan=False)
+
+
+def _encode_rows(values: Any, ts_type: str) -> List[Optional[str]]:
+    kind = values.dtype.kind
+    if kind == "b":
+        encoded = np.where(values, "true", "false").tolist()
+    elif kind in "iu":
+        encoded = values.astype(str).tolist()
+    elif kind == "f" and ts_type in ("int32[]", "int64[]"):
+        encoded = values.astype(np.int64).astype(str).tolist()
+    elif kind == "f":
+        encoded = values.astype(str).tolist()
+    elif kind in "US":
+        encoded = [list(map(encode_basestring_ascii, row)) for row in values.astype(str).tolist()]
+    else:
+        return [_encode_object(row) for row in values]
+    return list(map(lambda row: "[" + ",".join(row) + "]", encoded))
+
+
+def encode_column(name: str, values: Any, ts_type: str) -> List[Optional[str]]:
+    """
+    Encode a column into JSON members, i.e. '"name":value' strings, None stands for a null value.
+    Args:
+        name (str): a column name
+        values (numpy.ndarray): column values
+        ts_type (str): typesense type of the column
+
+    Returns:
+        list of str or None
+    """
+    if values.ndim == 2:
+        encoded = _encode_rows(values, ts_type)
+    elif ts_type == "id":
+        encoded = _encode_ids(values)
+    else:
+        encoded = _encode_scalars(values, ts_type)
+
+    prefix = encode_basestring_ascii(name) + ":"
+    return [None if v is None else prefix + v for v in encoded]
+
+
+def iter_column_chunks(columns: Dict[str, Any], types: Dict[str, str],
+                       chunk_rows: int = COLUMNS_CHUNK_ROWS) -> Iterator[bytes]:
+    """
+    Serialize columns into JSONL chunks, every column is serialized as a whole.
+    Args:
+        columns (dict of numpy.ndarray): the columns
+        types (dict of str): typesense types of the columns
+        chunk_rows (int): number of rows in a chunk
+
+    Returns:
+        Iterator of bytes
+    """
+    rows = len(next(iter(columns.values()))) if columns else 0
+    for start in range(0, rows, chunk_rows):
+        members = [encode_column(name, values[start:start + chunk_rows], types[name])
+                   for name, values in columns.items()]
+        lines = map(lambda row: "{" + ",".join(filter(None, row)) + "}", zip(*members))
+        yield ("\n".join(lines) + "\n").encode("utf-8")
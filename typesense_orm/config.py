@@ -7,4 +7,5 @@ class BaseConfig(PydanticBaseConfig):
     symbols_to_index: Sequence[str] = None
     default_sorting_field: Optional[str] = None
     typesense_mode: bool = False
+    use_alias: bool = False
 
@@ -0,0 +1,74 @@
+from collections import OrderedDict
+from datetime import timedelta
+from time import monotonic
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+CacheKey = Tuple[str, str]
+
+
+class DocumentCache:
+    """
+    An LRU cache of documents by collection and id. Writes through the client invalidate documents they touch, imports
+    of raw JSON or columns invalidate the whole collection.
+    Attributes:
+        max_size (int): maximal number of cached documents
+        ttl (timedelta or None): how long a document stays cached, unlimited if None
+        version (int): a counter of invalidations, documents fetched before an invalidation are not cached
+        hits (int): number of documents found in the cache
+        misses (int): number of documents not found in the cache
+    """
+    def __init__(self, max_size: int, ttl: Optional[timedelta] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.documents: Dict[CacheKey, Tuple[float, Any]] = OrderedDict()
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, collection_name: str, document_id: str) -> Optional[Any]:
+        key = (collection_name, document_id)
+        cached = self.documents.get(key)
+        if cached is None or (self.ttl is not None and monotonic() - cached[0] > self.ttl.total_seconds()):
+            self.documents.pop(key, None)
+            self.misses += 1
+            return None
+        self.documents.move_to_end(key)
+        self.hits += 1
+        return cached[1].copy()
+
+    def put(self, collection_name: str, document: Any, version: Optional[int] = None):
+        """
+        Cache a document.
+        Args:
+            collection_name (str): a collection name
+            document (): a document with an id
+            version (int or None): the cache version when the document was requested. If anything was invalidated
+            since then, the document may be stale and it's not cached.
+        """
+        if version is not None and version != self.version:
+            return
+        key = (collection_name, document.id)
+        self.documents[key] = (monotonic(), document.copy())
+        self.documents.move_to_end(key)
+        while len(self.documents) > self.max_size:
+            self.documents.popitem(last=False)
+
+    def invalidate(self, collection_name: str, document_ids: Iterable[Optional[str]]):
+        self.version += 1
+        for document_id in document_ids:
+            self.documents.pop((collection_name, document_id), None)
+
+    def invalidate_collection(self, collection_name: str):
+        """
+        Invalidate all documents of a collection, e.g. after an import which ids aren't known to the client.
+        """
+        self.version += 1
+        for key in [key for key in self.documents if key[0] == collection_name]:
+            del self.documents[key]
+
+    def clear(self):
+        self.version += 1
+        self.documents.clear()
+
+    def __len__(self):
+        return len(self.documents)
@@ -0,0 +1,120 @@
+from json import dumps
+from json.encoder import encode_basestring_ascii
+from math import isfinite
+from typing import Any, Callable, Dict, Tuple, Type
+from pydantic.json import pydantic_encoder
+from .types import allowed_types, get_from_opt, np
+
+DocumentEncoder = Callable[[Any], str]
+DictEncoder = Callable[[Any], Dict[str, Any]]
+
+
+def _finite(v) -> float:
+    # numpy floats are float subclasses with their own repr, they are converted to plain floats
+    v = float(v)
+    if not isfinite(v):
+        raise ValueError(f"{v} cannot be encoded, typesense floats should be finite")
+    return v
+
+
+def _float(v) -> str:
+    return repr(_finite(v))
+
+
+def _float_ndarray(v) -> bool:
+    """
+    Whether a value is a numpy float array, such an array is checked to be finite.
+    """
+    if np is None or not isinstance(v, np.ndarray) or v.dtype.kind != "f":
+        return False
+    if not np.isfinite(v).all():
+        raise ValueError("an array cannot be encoded, typesense floats should be finite")
+    return True
+
+
+def _float_list(v) -> list:
+    if _float_ndarray(v):
+        return v.tolist()
+    return list(map(_finite, v))
+
+
+def _float_array(v) -> str:
+    if _float_ndarray(v):
+        # the shortest representation of the array dtype, so float32 vectors are not widened
+        return "[" + ",".join(v.astype(str).tolist()) + "]"
+    return "[" + ",".join(map(_float, v)) + "]"
+
+
+def _any(v) -> str:
+    return dumps(v, default=pydantic_encoder)
+
+
+# expressions which encode a value v of a typesense type into JSON
+JSON_EXPRESSIONS = {
+    "string": "_str(v)",
+    "string[]": "'[' + ','.join(map(_str, v)) + ']'",
+    "int32": "'%d' % v",
+    "int32[]": "'[' + ','.join(map('%d'.__mod__, v)) + ']'",
+    "int64": "'%d' % v",
+    "int64[]": "'[' + ','.join(map('%d'.__mod__, v)) + ']'",
+    "float": "_float(v)",
+    "float[]": "_float_array(v)",
+    "bool": "('true' if v else 'false')",
+    "bool[]": "'[' + ','.join(map(lambda b: 'true' if b else 'false', v)) + ']'",
+    "geopoint": "'[' + _float(v[0]) + ',' + _float(v[1]) + ']'",
+    "geopoint[]": "'[' + ','.join(map(lambda p: '[' + _float(p[0]) + ',' + _float(p[1]) + ']', v)) + ']'",
+}
+
+# expressions which convert a value v of a typesense type into a plain python value
+DICT_EXPRESSIONS = {
+    "int32": "int(v)",
+    "int32[]": "list(map(int, v))",
+    "int64": "int(v)",
+    "int64[]": "list(map(int, v))",
+    "float": "_finite(v)",
+    "float[]": "_float_list(v)",
+    "geopoint": "_float_list(v)",
+    "geopoint[]": "list(map(_float_list, v))",
+    "string[]": "list(v)",
+    "bool[]": "list(v)",
+}
+
+NAMESPACE = {"_str": encode_basestring_ascii, "_float": _float, "_float_array": _float_array, "_any": _any,
+             "_finite": _finite, "_float_list": _float_list}
+
+
+def _typesense_type(field) -> str:
+    try:
+        return allowed_types[get_from_opt(field.outer_type_)[1]]
+    except KeyError:
+        return "auto"
+
+
+def compile_encoders(model: Type) -> Tuple[DocumentEncoder, DictEncoder]:
+    """
+    Generate functions which encode documents of a model into JSON and into dicts. Fields are encoded according to
+    their typesense types, None values are excluded as with json(exclude_none=True).
+    Args:
+        model (): a model class
+
+    Returns:
+        tuple: a JSON encoder and a dict encoder, both take a model instance
+    """
+    json_lines = ["def encode_json(obj):", "    d = obj.__dict__", "    parts = []"]
+    dict_lines = ["def encode_dict(obj):", "    d = obj.__dict__", "    ret = {}"]
+    for field in model.__fields__.values():
+        ts_type = _typesense_type(field)
+        key = encode_basestring_ascii(field.name) + ":"
+        json_lines += [f"    v = d.get({field.name!r})",
+                       "    if v is not None:",
+                       f"        parts.append({key!r} + {JSON_EXPRESSIONS.get(ts_type, '_any(v)')})"]
+        dict_lines += [f"    v = d.get({field.name!r})",
+                       "    if v is not None:",
+                       f"        ret[{field.name!r}] = {DICT_EXPRESSIONS.get(ts_type, 'v')}"]
+
+    json_lines.append("    return '{' + ','.join(parts) + '}'")
+    dict_lines.append("    return ret")
+
+    namespace = dict(NAMESPACE)
+    exec("\n".join(json_lines + [""] + dict_lines), namespace)
+    return namespace["encode_json"], namespace["encode_dict"]
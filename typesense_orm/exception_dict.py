@@ -33,7 +33,7 @@ class ExceptionDict(UserDict):
             return ret.task.result()
 
     def __iter__(self):
-        with_exc = List[Task]()
+        with_exc: List[Task] = []
         for k, v in self.data.items():
             if v.has_error:
                 with_exc.append(v.task)
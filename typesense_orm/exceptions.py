@@ -1,3 +1,6 @@
+from typing import List
+
+
 class NoHealthyNode(Exception):
     pass
 
@@ -42,3 +45,43 @@ class NotOptional(Exception):
 class CollectionUnregistered(Exception):
     def __init__(self, collection_name: str):
         super().__init__(f"collection {collection_name} is not registered")
+
+
+class ImportValidationError(Exception):
+    def __init__(self, line: int, error: Exception):
+        self.line = line
+        self.error = error
+        super().__init__(f"line {line} is not a valid document: {error}")
+
+
+class InvalidColumn(Exception):
+    def __init__(self, column: str, reason: str):
+        self.column = column
+        super().__init__(f"Column {column} cannot be imported: {reason}")
+
+
+class IncompatibleSchemaChange(Exception):
+    def __init__(self, changes: List[str]):
+        self.changes = changes
+        super().__init__(f"schema cannot be changed in place: {'; '.join(changes)}")
+
+
+class ReindexFailed(Exception):
+    def __init__(self, collection_name: str, failures: int, results: List):
+        self.collection_name = collection_name
+        self.failures = failures
+        self.results = results
+        super().__init__(f"{failures} documents failed to import into {collection_name}, the alias is not switched "
+                         f"and {collection_name} is kept for inspection")
+
+
+class UnsupportedSortClause(Exception):
+    def __init__(self, clause: str):
+        self.clause = clause
+        super().__init__(f"hits of shards cannot be merged by sort clause {clause}")
+
+
+class DeadlineExceeded(TimeoutError):
+    def __init__(self, deadline):
+        self.deadline = deadline
+        super().__init__("the deadline of the request has passed")
@@ -1,24 +1,46 @@
-from .lower_client import LowerClient
-from typing import Sequence, Type, Dict, Callable, TypeVar, Union, Iterable, AsyncIterable, Any
+from .lower_client import LowerClient, COLLECTIONS_PATH, ALIASES_PATH
+from typing import Sequence, Type, Dict, Callable, TypeVar, Union, Iterable, AsyncIterable, Any, List, Tuple, Optional
 from .logging import logger
 from typing_extensions import Unpack
 from .api_caller import Node, ApiCaller
-from .base_model import BaseModel
-from .search import SearchQuery, SearchRes, Hit, PaginatedQuery
+from .base_model import BaseModel, documents_path
+from .lower_client import versioned_name, collection_version
+from .schema import Schema
+from .slow_queries import RequestTrace, SlowQuery
+from .timeouts import Deadline, SEARCH
+from .change_tracker import ChangeTracker
+from .import_summary import ImportSummary, RESULT_DOCUMENTS, RESULT_FAILURES, check_result_mode
+from .search import SearchQuery, SearchRes, Hit, PaginatedQuery, FilterExpression, AtomicFilterExpr, FieldArgs, \
+    FederatedHit, FederatedRes, normalized_scores, GetManyRes, filter_value
 from collections import defaultdict
 from typing_inspect import get_bound
 from functools import singledispatchmethod
-from .exceptions import CollectionUnregistered
+from .exceptions import CollectionUnregistered, ApiResponseNotOk, ReindexFailed
+from .jsonl import iter_jsonl_chunks, validate_sample, JsonlSource, CHUNK_SIZE
+from .pool import encode_in_pool
+from concurrent.futures import Executor
+from .columnar import to_columns, column_types, iter_column_chunks, COLUMNS_CHUNK_ROWS
 from asyncstdlib import groupby, chain
 from asyncstdlib import map as as_map
+from asyncstdlib import enumerate as aenumerate
+from asyncstdlib import zip as azip
+import os
 import random
 import string
 from asyncio import Task
+import asyncio
 import itertools
 import math
+import aiohttp
+from urllib.parse import urlencode
 
 ADD_ENDPOINT = "add/"
 SEARCH_ENDPOINT = "/search"
+MULTI_SEARCH_PATH = "/multi_search"
+# typical servers and proxies limit a request line to 4-8 KiB
+MAX_GET_PARAMS_SIZE = 4000
+IMPORT_BATCH_SIZE = 1000
+GET_MANY_BATCH_SIZE = 250
 
 EntryType = TypeVar("EntryType", bound=BaseModel)
 HandlerRetType = TypeVar("HandlerRetType")
@@ -27,29 +49,172 @@ C = TypeVar("C")
 
 
 class Client(LowerClient[C]):
+    def _invalidate(self, collection: Type[EntryType], document_ids: Iterable[Optional[str]]):
+        if self.api_caller.document_cache is not None:
+            self.api_caller.document_cache.invalidate(collection.schema_name, document_ids)
+
+    def _invalidate_collection(self, collection: Type[EntryType]):
+        if self.api_caller.document_cache is not None:
+            self.api_caller.document_cache.invalidate_collection(collection.schema_name)
+
     def add(self, entry: EntryType, schedule=False, name=None,
             on_added: Callable[[EntryType], HandlerRetType] = lambda a: a):
+        self._invalidate(entry.__class__, [entry.id])
+
         def handler(resp: Dict[str, Any]):
             entry.id = resp["id"]
+            self._invalidate(entry.__class__, [entry.id])
             return on_added(entry)
 
-        return self.api_caller.post(f"{entry.__class__.endpoint_path}", data=entry.json(exclude_none=True),
+        return self.api_caller.post(f"{entry.__class__.endpoint_path}", data=entry.document_json(),
                                     schedule=schedule, name=name, handler=handler)
 
     def upsert(self, entry: EntryType, schedule=False, name=None,
-               on_upsert: Callable[[EntryType], HandlerRetType] = lambda a: a):
+               on_upsert: Callable[[EntryType], HandlerRetType] = lambda a: a,
+               tracker: Optional[ChangeTracker] = None):
+        """
+        Create a document or replace it if a document with the same id exists.
+        Args:
+            entry (): a document
+            schedule (bool): whether a caller should memorize a task
+            name (str): a name of the task
+            on_upsert (): a callback applied to the document when it's upserted
+            tracker (ChangeTracker or None): if set, the document isn't sent when its content hash hasn't changed since
+            the last upsert, on_upsert is still applied.
+
+        Returns:
+            a result of on_upsert or Task
+        """
+        document = entry.document_json()
+        digest = None
+        if tracker is not None:
+            collection_name = entry.__class__.schema_name
+            digest, = tracker.changed(collection_name, [(entry.id, document)])
+            if digest is None:
+                task = self.api_caller.loop.create_task(asyncio.sleep(0, result=on_upsert(entry)), name=name)
+                if schedule:
+                    self.api_caller.tasks[task.get_name()] = task
+                return self._wait(task) if self.api_caller.sync() else task
+
+        self._invalidate(entry.__class__, [entry.id])
+
         def handler(resp: Dict[str, Any]):
             entry.id = resp["id"]
+            self._invalidate(entry.__class__, [entry.id])
+            if digest is not None:
+                tracker.update(collection_name, [(entry.id, digest)])
             return on_upsert(entry)
 
-        return self.api_caller.post(f"{entry.__class__.endpoint_path}", data=entry.json(exclude_none=True),
+        return self.api_caller.post(f"{entry.__class__.endpoint_path}", data=document,
                                     schedule=schedule, name=name, handler=handler, params={"action": "upsert"})
 
+    def get(self, collection: Type[EntryType], document_id: str, schedule=False, name=None):
+        """
+        Fetch a document by id, the document cache is used if the caller has one.
+        Args:
+            collection (): a collection of the document
+            document_id (str): an id of the document
+            schedule (bool): whether a caller should memorize a task
+            name (str): a name of the task
+
+        Returns:
+            a document or None if there is no such document, or Task
+        """
+        async def get_one():
+            res = await self._get_many(collection, [document_id], GET_MANY_BATCH_SIZE)
+            return res.documents[0]
+
+        task = self.api_caller.loop.create_task(get_one(), name=name)
+        if schedule:
+            self.api_caller.tasks[task.get_name()] = task
+
+        if self.api_caller.sync():
+            return self.api_caller.loop.run_until_complete(task)
+        else:
+            return task
+
+    async def _get_many(self, collection: Type[EntryType], document_ids: Sequence[str],
+                        batch_size: int) -> GetManyRes:
+        cache = self.api_caller.document_cache
+        found = {}
+        unique_ids = list(dict.fromkeys(document_ids))
+        if cache is not None:
+            for document_id in unique_ids:
+                document = cache.get(collection.schema_name, document_id)
+                if document is not None:
+                    found[document_id] = document
+
+        def handler(resp: Dict[str, Any]):
+            return SearchRes[collection].parse_obj(resp)
+
+        requested = [document_id for document_id in unique_ids if document_id not in found]
+        version = cache.version if cache is not None else None
+        results = await asyncio.gather(*(self._search_request(
+            collection, {"q": "*", "filter_by": f"id:[{','.join(map(filter_value, chunk))}]",
+                         "per_page": len(chunk)},
+            False, None, handler, MAX_GET_PARAMS_SIZE, as_task=True)
+            for chunk in map(lambda start: requested[start:start + batch_size],
+                             range(0, len(requested), batch_size))))
+
+        for res in results:
+            for hit in res.hits:
+                found[hit.document.id] = hit.document
+                if cache is not None:
+                    cache.put(collection.schema_name, hit.document, version)
+
+        return GetManyRes[collection].construct(documents=[found.get(document_id) for document_id in document_ids],
+                                                missing=[document_id for document_id in unique_ids
+                                                         if document_id not in found])
+
+    def get_many(self, collection: Type[EntryType], document_ids: Sequence[str], schedule=False, name=None,
+                 batch_size: int = GET_MANY_BATCH_SIZE):
+        """
+        Fetch documents by ids. Ids which aren't cached are fetched with id:[...] filter searches of batch_size ids,
+        which are made concurrently.
+        Args:
+            collection (): a collection of the documents
+            document_ids (list of str): ids of the documents
+            schedule (bool): whether a caller should memorize a task
+            name (str): a name of the task
+            batch_size (int): number of ids in one search, typesense returns at most 250 hits in a page
+
+        Returns:
+            GetManyRes or Task: documents in order of the ids and missing ids
+        """
+        task = self.api_caller.loop.create_task(self._get_many(collection, document_ids, batch_size), name=name)
+        if schedule:
+            self.api_caller.tasks[task.get_name()] = task
+
+        if self.api_caller.sync():
+            return self.api_caller.loop.run_until_complete(task)
+        else:
+            return task
+
     def import_json(self, collection: Type[EntryType], data: Union[AsyncIterable[str], Iterable[str]],
                     schedule=False, name=None,
                     error_handler: Callable[[int, Dict[str, Any]], HandlerRetType] = lambda i, a: (i, a),
                     action: str = "create",
-                    entry_handler: Callable[[int, EntryType], HandlerRetType] = lambda i, a: (i, a)):
+                    entry_handler: Callable[[int, EntryType], HandlerRetType] = lambda i, a: (i, a),
+                    result_mode: str = RESULT_DOCUMENTS):
+        """
+        Import documents serialized to JSON.
+        Args:
+            collection (): a collection to import the documents to
+            data (): an iterable or an async iterable of JSON strings, one document each
+            schedule (bool): whether a caller should memorize a task
+            name (str): a name of the task
+            error_handler (): a callback applied to an index of a failed document and the server response
+            action (str): import action: create, upsert, update or emplace
+            entry_handler (): a callback applied to an index of an imported document and the document parsed back
+            into the model
+            result_mode (str): "documents" returns handler results for every line, the server sends every imported
+            document back. "failures" and "counts" only request success flags and return ImportSummary, with failed
+            lines or only counters, handlers are not called.
+
+        Returns:
+            Iterable, AsyncIterable, ImportSummary or Task: handler results for every line or a summary
+        """
+        check_result_mode(result_mode)
         if isinstance(data, Iterable):
             async def as_gen(iterable: Iterable):
                 for i in iterable:
@@ -59,69 +224,674 @@ class Client(LowerClient[C]):
 
         async def iter_byte(iter_json: AsyncIterable[str]):
             async for i in iter_json:
-                print(i)
                 yield (i + "\n").encode("utf-8")
 
-        def handler(i: int, resp: Dict[str, Any]):
+        # ids of the documents are only known from the responses, documents fetched meanwhile aren't cached
+        self._invalidate_collection(collection)
+        if result_mode == RESULT_DOCUMENTS:
+            def handler(i: int, resp: Dict[str, Any]):
+                if not resp["success"]:
+                    return error_handler(i, resp)
+                else:
+                    entry = collection(**resp["document"])
+                    self._invalidate(collection, [entry.id])
+                    return entry_handler(i, entry)
+
+            return self.api_caller.post(f"{collection.endpoint_path}/import", data=iter_byte(data),
+                                        schedule=schedule, name=name, handler=handler, multiline=True,
+                                        params={"action": action, "return_doc": "true"})
+
+        async def summarize():
+            summary = ImportSummary()
+            responses = await self.api_caller.post_task(f"{collection.endpoint_path}/import", data=iter_byte(data),
+                                                        schedule=False, handler=lambda i, resp: resp,
+                                                        multiline=True, params={"action": action})
+            async for i, resp in aenumerate(responses):
+                summary.add(i, resp, keep_failures=result_mode == RESULT_FAILURES)
+            self._invalidate_collection(collection)
+            return summary
+
+        task = self.api_caller.loop.create_task(summarize(), name=name)
+        if schedule:
+            self.api_caller.tasks[task.get_name()] = task
+
+        if self.api_caller.sync():
+            return self.api_caller.loop.run_until_complete(task)
+        else:
+            return task
+
+    def import_file(self, collection: Type[EntryType], source: JsonlSource, schedule=False, name=None,
+                    error_handler: Callable[[int, Dict[str, Any]], HandlerRetType] = lambda i, a: (i, a),
+                    action: str = "create",
+                    entry_handler: Callable[[int, Dict[str, Any]], HandlerRetType] = lambda i, a: (i, a),
+                    chunk_size: int = CHUNK_SIZE,
+                    validate_fraction: float = 0.0,
+                    result_mode: str = RESULT_DOCUMENTS):
+        """
+        Import a JSONL file as is. Plain files are memory-mapped, gzipped files and streams are read in chunks, and every
+        chunk is sent to the server in a separate request without decoding the documents.
+        Args:
+            collection (): a collection to import the documents to
+            source (): a path to a plain or gzipped JSONL file, a binary file object, or a buffer (bytes or mmap)
+            schedule (bool): whether a caller should memorize a task
+            name (str): a name of the task
+            error_handler (): a callback applied to an index of a failed line and the server response
+            action (str): import action: create, upsert, update or emplace
+            entry_handler (): a callback applied to an index of an imported line and the server response
+            chunk_size (int): an approximate size of chunks the file is sent in
+            validate_fraction (float): a fraction of lines which are validated against the collection model before
+            they are sent. If a picked line is invalid, the import stops with ImportValidationError, the chunks sent
+            before it stay imported.
+            result_mode (str): "documents" returns handler results for every line, "failures" and "counts" return
+            ImportSummary with failed lines or only counters, handlers are not called.
+
+        Returns:
+            list, ImportSummary or Task: handler results for every line or a summary
+        """
+        def chunks():
+            first_line = 0
+            for chunk in iter_jsonl_chunks(source, chunk_size):
+                if validate_fraction > 0:
+                    validate_sample(collection, chunk, validate_fraction, first_line)
+                    first_line += chunk.count(b"\n")
+                yield chunk
+
+        return self._import_chunks(collection, chunks(), schedule=schedule, name=name, error_handler=error_handler,
+                                   action=action, entry_handler=entry_handler, result_mode=result_mode)
+
+    def import_columns(self, collection: Type[EntryType], table: Any, schedule=False, name=None,
+                       error_handler: Callable[[int, Dict[str, Any]], HandlerRetType] = lambda i, a: (i, a),
+                       action: str = "create",
+                       entry_handler: Callable[[int, Dict[str, Any]], HandlerRetType] = lambda i, a: (i, a),
+                       chunk_rows: int = COLUMNS_CHUNK_ROWS,
+                       result_mode: str = RESULT_DOCUMENTS):
+        """
+        Import columnar data without creating a model instance per row. Column dtypes are checked against the
+        collection schema, then every column is serialized at once with numpy.
+        Args:
+            collection (): a collection to import the rows to
+            table (): a pandas DataFrame, a pyarrow Table or a dict of numpy arrays, column names are field names
+            schedule (bool): whether a caller should memorize a task
+            name (str): a name of the task
+            error_handler (): a callback applied to an index of a failed row and the server response
+            action (str): import action: create, upsert, update or emplace
+            entry_handler (): a callback applied to an index of an imported row and the server response
+            chunk_rows (int): number of rows sent in one import request
+            result_mode (str): "documents" returns handler results for every row, "failures" and "counts" return
+            ImportSummary with failed rows or only counters, handlers are not called.
+
+        Raises:
+            InvalidColumn: when a column doesn't fit the collection schema
+
+        Returns:
+            list, ImportSummary or Task: handler results for every row or a summary
+        """
+        columns = to_columns(table)
+        types = column_types(collection, columns)
+        return self._import_chunks(collection, iter_column_chunks(columns, types, chunk_rows),
+                                   schedule=schedule, name=name, error_handler=error_handler,
+                                   action=action, entry_handler=entry_handler, result_mode=result_mode)
+
+    def import_documents(self, collection: Type[EntryType],
+                         data: Union[AsyncIterable[Union[Dict[str, Any], EntryType]],
+                                     Iterable[Union[Dict[str, Any], EntryType]]],
+                         schedule=False, name=None,
+                         error_handler: Callable[[int, Dict[str, Any]], HandlerRetType] = lambda i, a: (i, a),
+                         action: str = "create",
+                         entry_handler: Callable[[int, Dict[str, Any]], HandlerRetType] = lambda i, a: (i, a),
+                         executor: Optional[Executor] = None,
+                         batch_size: int = IMPORT_BATCH_SIZE,
+                         max_pending: Optional[int] = None,
+                         workers: Optional[int] = None):
+        """
+        Import documents of one collection, validating and encoding them in an executor. With a ProcessPoolExecutor
+        chunks of documents are validated and encoded on all cores, while encoded chunks are sent in order.
+
+        Notes:
+            the collection model is pickled by reference, so it should be importable in worker processes.
+
+        Args:
+            collection (): a collection to import the documents to
+            data (): an iterable or an async iterable of dicts or model instances
+            schedule (bool): whether a caller should memorize a task
+            name (str): a name of the task
+            error_handler (): a callback applied to an index of a failed document and the server response, invalid
+            documents get a response with success false and a validation error
+            action (str): import action: create, upsert, update or emplace
+            entry_handler (): a callback applied to an index of an imported document and the server response
+            executor (Executor or None): an executor to encode documents in, if None they are encoded in the caller
+            loop
+            batch_size (int): number of documents in a chunk
+            max_pending (int or None): number of chunks encoded at once, twice the number of workers by default
+            workers (int or None): number of workers of the executor, os.cpu_count() by default
+
+        Returns:
+            list or Task: handler results in order of the input stream
+        """
+        if max_pending is None:
+            if workers is None:
+                workers = (os.cpu_count() or 1) if executor is not None else 1
+            max_pending = 2 * workers
+
+        async def import_encoded():
+            results = []
+            async for first, (chunk, encoded, errors) in encode_in_pool(collection, data, executor, batch_size,
+                                                                        max_pending, self.api_caller.loop):
+                chunk_results = dict(map(lambda e: (first + e[0], error_handler(first + e[0], {"success": False,
+                                                                                                 "error": e[1]})),
+                                         errors))
+                if chunk:
+                    self._invalidate_collection(collection)
+                    responses = await self.api_caller.post_task(f"{collection.endpoint_path}/import", data=chunk,
+                                                                schedule=False, handler=lambda i, resp: resp,
+                                                                multiline=True, params={"action": action})
+                    async for index, resp in azip(encoded, responses):
+                        if not resp["success"]:
+                            chunk_results[first + index] = error_handler(first + index, resp)
+                        else:
+                            chunk_results[first + index] = entry_handler(first + index, resp)
+                    self._invalidate_collection(collection)
+
+                results.extend(map(lambda k: chunk_results[k], sorted(chunk_results)))
+
+            return results
+
+        task = self.api_caller.loop.create_task(import_encoded(), name=name)
+        if schedule:
+            self.api_caller.tasks[task.get_name()] = task
+
+        if self.api_caller.sync():
+            return self.api_caller.loop.run_until_complete(task)
+        else:
+            return task
+
+    def _import_chunks(self, collection: Type[EntryType], chunks: Iterable[bytes], schedule=False, name=None,
+                       error_handler: Callable[[int, Dict[str, Any]], HandlerRetType] = lambda i, a: (i, a),
+                       action: str = "create",
+                       entry_handler: Callable[[int, Dict[str, Any]], HandlerRetType] = lambda i, a: (i, a),
+                       result_mode: str = RESULT_DOCUMENTS):
+        check_result_mode(result_mode)
+
+        async def import_chunks():
+            results = [] if result_mode == RESULT_DOCUMENTS else ImportSummary()
+            first_line = 0
+            for chunk in chunks:
+                # documents aren't decoded, so their ids are unknown
+                self._invalidate_collection(collection)
+                responses = await self.api_caller.post_task(f"{collection.endpoint_path}/import", data=chunk,
+                                                            schedule=False, handler=lambda i, resp: resp,
+                                                            multiline=True, params={"action": action})
+                async for i, resp in aenumerate(responses):
+                    if result_mode != RESULT_DOCUMENTS:
+                        results.add(first_line + i, resp, keep_failures=result_mode == RESULT_FAILURES)
+                    elif not resp["success"]:
+                        results.append(error_handler(first_line + i, resp))
+                    else:
+                        results.append(entry_handler(first_line + i, resp))
+                self._invalidate_collection(collection)
+                first_line += chunk.count(b"\n")
+
+            return results
+
+        task = self.api_caller.loop.create_task(import_chunks(), name=name)
+        if schedule:
+            self.api_caller.tasks[task.get_name()] = task
+
+        if self.api_caller.sync():
+            return self.api_caller.loop.run_until_complete(task)
+        else:
+            return task
+
+    async def _import_batch(self, path: str, batch: List[Tuple[int, EntryType]], action: str,
+                            error_handler: Callable[[int, Dict[str, Any]], HandlerRetType],
+                            entry_handler: Callable[[int, EntryType], HandlerRetType],
+                            tracker: Optional[ChangeTracker] = None) \
+            -> List[Tuple[int, HandlerRetType]]:
+        documents = list(map(lambda e: e[1].document_json(), batch))
+        results = []
+        if tracker is not None:
+            collection_name = batch[0][1].__class__.schema_name
+            digests = tracker.changed(collection_name, list(map(lambda e, d: (e[1].id, d), batch, documents)))
+            # unchanged documents are already in the index
+            results = [(index, entry_handler(index, entry))
+                       for (index, entry), digest in zip(batch, digests) if digest is None]
+            changed = [i for i, digest in enumerate(digests) if digest is not None]
+            batch = [batch[i] for i in changed]
+            documents = [documents[i] for i in changed]
+            digests = [digests[i] for i in changed]
+            if not batch:
+                return results
+
+        collection = batch[0][1].__class__
+        self._invalidate(collection, map(lambda e: e[1].id, batch))
+        data = "".join(map(lambda d: d + "\n", documents)).encode("utf-8")
+        responses = await self.api_caller.post_task(f"{path}/import", data=data,
+                                                    schedule=False, handler=lambda i, resp: resp, multiline=True,
+                                                    params={"action": action, "return_id": "true"})
+        accepted = []
+        async for i, ((index, entry), resp) in aenumerate(azip(batch, responses)):
             if not resp["success"]:
-                return error_handler(i, resp)
+                results.append((index, error_handler(index, resp)))
             else:
-                return entry_handler(i, collection(**resp["document"]))
+                if resp.get("id"):
+                    entry.id = resp["id"]
+                if tracker is not None and entry.id is not None:
+                    accepted.append((entry.id, digests[i]))
+                results.append((index, entry_handler(index, entry)))
 
-        return self.api_caller.post(f"{collection.endpoint_path}/import", data=iter_byte(data),
-                                    schedule=schedule, name=name, handler=handler, multiline=True,
-                                    params={"action": action, "return_res": "true", "return_id": "false"})
+        self._invalidate(collection, map(lambda e: e[1].id, batch))
+        if accepted:
+            tracker.update(collection_name, accepted)
+        return results
+
+    async def _import_pipeline(self, path: str, queue: asyncio.Queue, batch_size: int, action: str,
+                               error_handler: Callable[[int, Dict[str, Any]], HandlerRetType],
+                               entry_handler: Callable[[int, EntryType], HandlerRetType],
+                               tracker: Optional[ChangeTracker] = None,
+                               failed: Optional[asyncio.Event] = None) \
+            -> List[Tuple[int, HandlerRetType]]:
+        results = []
+        batch = []
+        error = None
+        while True:
+            item = await queue.get()
+            if error is not None:
+                # keep draining the queue, so the router is never blocked by a failed pipeline
+                if item is None:
+                    raise error
+                continue
+
+            if item is not None:
+                batch.append(item)
+            if batch and (item is None or len(batch) >= batch_size):
+                try:
+                    results.extend(await self._import_batch(path, batch, action, error_handler, entry_handler,
+                                                            tracker))
+                except Exception as e:
+                    error = e
+                    if failed is not None:
+                        failed.set()
+                    if item is None:
+                        raise error
+                batch = []
+
+            if item is None:
+                return results
+
+    async def _route_import(self, data: Union[AsyncIterable[EntryType], Iterable[EntryType]], batch_size: int,
+                            action: str,
+                            error_handler: Callable[[int, Dict[str, Any]], HandlerRetType],
+                            entry_handler: Callable[[int, EntryType], HandlerRetType],
+                            collection_names: Optional[Dict[Type[EntryType], str]] = None,
+                            tracker: Optional[ChangeTracker] = None) -> List[HandlerRetType]:
+        queues: Dict[Type[EntryType], asyncio.Queue] = {}
+        pipelines: List[Task] = []
+        failed = asyncio.Event()
+        try:
+            async for index, entry in aenumerate(data):
+                if failed.is_set():
+                    # the import fails anyway, the rest of the source is not read
+                    break
+                collection = type(entry)
+                if collection not in queues:
+                    queues[collection] = asyncio.Queue(maxsize=2 * batch_size)
+                    if collection_names and collection in collection_names:
+                        path = documents_path(collection_names[collection])
+                    else:
+                        path = collection.endpoint_path
+                    pipelines.append(self.api_caller.loop.create_task(
+                        self._import_pipeline(path, queues[collection], batch_size, action,
+                                              error_handler, entry_handler, tracker, failed)))
+                await queues[collection].put((index, entry))
+        finally:
+            for queue in queues.values():
+                await queue.put(None)
+
+        results = await asyncio.gather(*pipelines)
+        return list(map(lambda r: r[1], sorted(itertools.chain(*results), key=lambda r: r[0])))
 
     def import_objects(self, data: Union[AsyncIterable[EntryType], Iterable[EntryType]], schedule=False, name=None,
                        error_handler: Callable[[int, Dict[str, Any]], HandlerRetType] = lambda i, a: (i, a),
                        action: str = "create",
-                       entry_handler: Callable[[int, EntryType], HandlerRetType] = lambda i, a: (i, a)):
-        if isinstance(data, Iterable):
-            async def as_gen(iterable: Iterable):
-                for i in iterable:
-                    yield i
+                       entry_handler: Callable[[int, EntryType], HandlerRetType] = lambda i, a: (i, a),
+                       batch_size: int = IMPORT_BATCH_SIZE,
+                       tracker: Optional[ChangeTracker] = None):
+        """
+        Import a stream of documents which may belong to different collections. The stream is split into a queue per
+        collection, and every collection is imported concurrently in chunks of batch_size documents.
+        Args:
+            data (): an iterable or an async iterable of documents
+            schedule (bool): whether a caller should memorize a task
+            name (str): a name of the task
+            error_handler (): a callback applied to an index of a failed document and the server response
+            action (str): import action: create, upsert, update or emplace
+            entry_handler (): a callback applied to an index of an imported document and the document
+            batch_size (int): number of documents sent in one import request
+            tracker (ChangeTracker or None): if set, documents whose content hash hasn't changed since they were
+            imported are not sent, entry_handler is still applied to them. Hashes are stored when the server has
+            accepted a document, and the tracker should be flushed after the import to persist them.
 
-            data: AsyncIterable[EntryType] = as_gen(data)
-
-            async def import_everything(as_generator: AsyncIterable[EntryType]):
-                tasks_or_its: Sequence[Union[Task, Iterable]] = []
-                async for k, g in groupby(as_generator, key=lambda e: type(e)):
-                    res = self.import_json(k,
-                                           as_map(lambda e: e.json(exclude_none=True), g),
-                                           schedule=False, error_handler=error_handler, entry_handler=entry_handler,
-                                           action=action)
-                    tasks_or_its.append(res)
-                    if self.api_caller.sync():
-                        return itertools.chain(*tasks_or_its)
-                    else:
-                        return chain.from_iterable((await part_task for part_task in tasks_or_its))
+        Returns:
+            list or Task: handler results in order of the input stream
+        """
+        task = self.api_caller.loop.create_task(self._route_import(data, batch_size, action,
+                                                                   error_handler, entry_handler,
+                                                                   tracker=tracker), name=name)
+        if schedule:
+            self.api_caller.tasks[task.get_name()] = task
+
+        if self.api_caller.sync():
+            return self.api_caller.loop.run_until_complete(task)
+        else:
+            return task
+
+    def import_batch(self, batch: Sequence[EntryType], schedule=False, name=None,
+                     error_handler: Callable[[int, Dict[str, Any]], HandlerRetType] = lambda i, a: (i, a),
+                     action: str = "create",
+                     entry_handler: Callable[[int, EntryType], HandlerRetType] = lambda i, a: (i, a),
+                     tracker: Optional[ChangeTracker] = None):
+        """
+        Import documents of one collection with a single import request.
+        Args:
+            batch (): documents of one collection
+            schedule (bool): whether a caller should memorize a task
+            name (str): a name of the task
+            error_handler (): a callback applied to an index of a failed document in the batch and the server response
+            action (str): import action: create, upsert, update or emplace
+            entry_handler (): a callback applied to an index of an imported document in the batch and the document
+            tracker (ChangeTracker or None): if set, documents whose content hash hasn't changed are not sent
+
+        Returns:
+            list or Task: handler results in order of the batch
+        """
+        async def import_one() -> List[HandlerRetType]:
+            if not batch:
+                return []
+            results = await self._import_batch(type(batch[0]).endpoint_path, list(enumerate(batch)), action,
+                                               error_handler, entry_handler, tracker)
+            return list(map(lambda r: r[1], sorted(results, key=lambda r: r[0])))
+
+        task = self.api_caller.loop.create_task(import_one(), name=name)
+        if schedule:
+            self.api_caller.tasks[task.get_name()] = task
+
+        if self.api_caller.sync():
+            return self.api_caller.loop.run_until_complete(task)
+        else:
+            return task
+
+    async def _reindex(self, collection: Type[EntryType], source: Union[AsyncIterable[EntryType], Iterable[EntryType]],
+                       batch_size: int, action: str, drop_old: bool,
+                       error_handler: Callable[[int, Dict[str, Any]], HandlerRetType],
+                       entry_handler: Callable[[int, EntryType], HandlerRetType],
+                       max_failures: int) -> List[HandlerRetType]:
+        alias = collection.schema_name
+        try:
+            current = await self.api_caller.get_task(f"{ALIASES_PATH}/{alias}", schedule=False,
+                                                     handler=lambda d: d["collection_name"])
+        except ApiResponseNotOk as e:
+            if e.status_code != 404:
+                raise e
+            current = None
+
+        new_name = versioned_name(alias, collection_version(current) + 1)
+        try:
+            # a leftover of an interrupted reindex, nobody reads from it
+            await self.api_caller.delete_task(f"{COLLECTIONS_PATH}/{new_name}", schedule=False)
+        except ApiResponseNotOk as e:
+            if e.status_code != 404:
+                raise e
+
+        schema = collection.schema.copy(update={"name": new_name})
+        await self.api_caller.post_task(COLLECTIONS_PATH, data=schema.json(exclude_unset=True), schedule=False)
+        logger.info(f"reindexing {alias} into {new_name}")
+        failures = 0
+
+        def count_failure(i: int, resp: Dict[str, Any]):
+            nonlocal failures
+            failures += 1
+            return error_handler(i, resp)
+
+        results = await self._route_import(source, batch_size, action, count_failure, entry_handler,
+                                           collection_names={collection: new_name})
+        if failures > max_failures:
+            # the new version is incomplete, readers stay on the current one
+            raise ReindexFailed(new_name, failures, results)
+
+        if current is None:
+            # the alias replaces a plain collection with the same name, it has to be dropped first
+            try:
+                await self.api_caller.delete_task(f"{COLLECTIONS_PATH}/{alias}", schedule=False)
+            except ApiResponseNotOk as e:
+                if e.status_code != 404:
+                    raise e
 
-            task = self.api_caller.loop.create_task(import_everything(data), name=name)
-            if schedule:
-                self.api_caller.tasks[task.get_name()] = task
+        await self.api_caller.put_task(f"{ALIASES_PATH}/{alias}", json={"collection_name": new_name},
+                                       schedule=False)
+        if drop_old and current is not None and current != new_name:
+            await self.api_caller.delete_task(f"{COLLECTIONS_PATH}/{current}", schedule=False)
 
-            if self.api_caller.sync():
-                return self.api_caller.loop.run_until_complete(task)
+        return results
+
+    def reindex(self, collection: Type[EntryType], source: Union[AsyncIterable[EntryType], Iterable[EntryType]],
+                schedule=False, name=None,
+                error_handler: Callable[[int, Dict[str, Any]], HandlerRetType] = lambda i, a: (i, a),
+                action: str = "create",
+                entry_handler: Callable[[int, EntryType], HandlerRetType] = lambda i, a: (i, a),
+                batch_size: int = IMPORT_BATCH_SIZE,
+                drop_old: bool = True,
+                max_failures: int = 0):
+        """
+        Rebuild a collection without downtime. Documents are imported into a new version of the collection
+        (like books_v7), which is not read by anyone, then the alias named after the collection is switched to it
+        atomically, and the old version is dropped.
+
+        Notes:
+            the model should have use_alias in its config to read through the alias. If there was a plain collection
+            with the alias name, it's dropped right before the alias is created, once.
+
+        Args:
+            collection (): a model to reindex
+            source (): an iterable or an async iterable of documents
+            schedule (bool): whether a caller should memorize a task
+            name (str): a name of the task
+            error_handler (): a callback applied to an index of a failed document and the server response
+            action (str): import action
+            entry_handler (): a callback applied to an index of an imported document and the document
+            batch_size (int): number of documents sent in one import request
+            drop_old (bool): whether the previous version should be dropped
+            max_failures (int): maximal number of documents which may fail to import. If more fail, the alias is not
+            switched, and the new version is kept for inspection.
+
+        Returns:
+            list or Task: handler results in order of the input stream
+
+        Raises:
+            ReindexFailed: when more than max_failures documents have failed to import
+        """
+        task = self.api_caller.loop.create_task(self._reindex(collection, source, batch_size, action, drop_old,
+                                                              error_handler, entry_handler, max_failures), name=name)
+        if schedule:
+            self.api_caller.tasks[task.get_name()] = task
+
+        if self.api_caller.sync():
+            return self.api_caller.loop.run_until_complete(task)
+        else:
+            return task
+
+    def migrate(self, collection: Type[EntryType],
+                source: Optional[Union[AsyncIterable[EntryType], Iterable[EntryType]]] = None,
+                batch_size: int = IMPORT_BATCH_SIZE, drop_old: bool = True) -> Optional[Schema]:
+        """
+        Bring a live collection in line with a model schema. Field additions, drops and attribute changes are applied
+        in place with a single PATCH request, documents are not re-sent. Incompatible changes, like a field type
+        change, fall back to reindex from the source.
+        Args:
+            collection (): a model whose schema is applied
+            source (): documents to reindex the collection with when the change cannot be applied in place
+            batch_size (int): number of documents sent in one import request of the reindex
+            drop_old (bool): whether the previous version should be dropped after the reindex
+
+        Returns:
+            Schema or None: the live schema after the migration, None if it was reindexed
+
+        Raises:
+            IncompatibleSchemaChange: when the change cannot be applied in place and there is no source
+        """
+        diff = self.diff_collection(collection.schema)
+        if diff is None:
+            self.create_collection(collection.schema)
+        elif diff.incompatible and source is not None:
+            logger.info(f"schema of {collection.schema_name} cannot be changed in place, reindexing: "
+                        f"{'; '.join(diff.incompatible)}")
+            self._wait(self.reindex(collection, source, batch_size=batch_size, drop_old=drop_old))
+            return None
+
+        return self.update_collection(collection.schema)
+
+    def _search_request(self, collection: Type[EntryType], params: Dict[str, Any], schedule: bool, name: Optional[str],
+                        handler: Callable[[Dict[str, Any]], Any], max_get_size: int, as_task: bool = False,
+                        deadline: Optional[Deadline] = None):
+        """
+        Make a search request. When the encoded parameters are larger than max_get_size bytes, which happens with long
+        filters like id:[...] with thousands of ids, the query is sent in a body of a single-search /multi_search POST
+        instead, so the URL doesn't overflow server and proxy limits.
+        If the caller has a slow query threshold, searches which take longer are recorded into its slow query log.
+        If as_task is True, a task is returned whatever the caller is.
+        """
+        get = self.api_caller.get_task if as_task else self.api_caller.get
+        post = self.api_caller.post_task if as_task else self.api_caller.post
+        slow_queries = self.api_caller.slow_queries
+        trace = RequestTrace() if slow_queries.threshold is not None else None
+        start = self.api_caller.loop.time()
+
+        def record(res: Any):
+            total = self.api_caller.loop.time() - start
+            if slow_queries.is_slow(total):
+                slow_queries.record(SlowQuery.from_trace(collection.schema_name, params, trace, total,
+                                                         getattr(res, "search_time_ms", None)))
+
+        if len(urlencode(params)) <= max_get_size:
+            res = get(f"{collection.endpoint_path}{SEARCH_ENDPOINT}", params=params,
+                      schedule=schedule, name=name, handler=handler, trace=trace, deadline=deadline)
+        else:
+            def multi_handler(resp: Dict[str, Any]):
+                single = resp["results"][0]
+                if "error" in single:
+                    raise ApiResponseNotOk(single, single.get("code", 400))
+                return handler(single)
+
+            res = post(MULTI_SEARCH_PATH, json={"searches": [{"collection": collection.schema_name, **params}]},
+                       schedule=schedule, name=name, handler=multi_handler, trace=trace, operation=SEARCH,
+                       deadline=deadline)
+
+        if trace is not None:
+            if self.api_caller.sync() and not as_task:
+                record(res)
             else:
-                return task
+                res.add_done_callback(lambda task: task.cancelled() or task.exception() or record(task.result()))
+        return res
+
+    def search(self, collection: Type[EntryType], query: SearchQuery, schedule=False, name=None,
+               max_get_size: int = MAX_GET_PARAMS_SIZE, deadline: Optional[Deadline] = None):
+        """
+        Search a collection, page by page.
+        Args:
+            collection (): a collection to search in
+            query (SearchQuery): a query
+            schedule (bool): whether a caller should memorize tasks
+            name (str): a name of the tasks
+            max_get_size (int): maximal size of url-encoded parameters in bytes, larger queries are sent in a POST body
+            deadline (Deadline or None): a deadline all pages should be fetched by
 
-    def search(self, collection: Type[EntryType], query: SearchQuery, schedule=False, name=None):
+        Yields:
+            SearchRes or Task: a result of every page
+        """
         def handler(resp: Dict[str, Any]):
-            print(resp)
             return SearchRes[collection].parse_obj(resp)
 
-        first_res = self.api_caller.get(f"{collection.endpoint_path}/search",
-                                        params=query.dict(exclude_none=True),
-                                        schedule=schedule, name=name, handler=handler)
+        first_res = self._search_request(collection, query.dict(exclude_none=True), schedule, name, handler,
+                                         max_get_size, deadline=deadline)
         yield first_res
         if self.api_caller.sync():
-            pages = math.ceil(first_res.found/first_res.out_of)
+            pages = math.ceil(first_res.found/query.per_page)
         else:
             first_res_sync = self.api_caller.loop.run_until_complete(first_res)
-            pages = math.ceil(first_res_sync.found/first_res_sync.out_of)
+            pages = math.ceil(first_res_sync.found/query.per_page)
 
-        for i in range(1, pages):
+        for i in range(2, pages + 1):
             params = PaginatedQuery(page=i, **query.__dict__)
-            yield self.api_caller.get(f"{collection.endpoint_path}/search",
-                                      params=params.dict(exclude_none=True, exclude_defaults=True),
-                                      schedule=schedule, name=name, handler=handler)
+            yield self._search_request(collection, params.dict(exclude_none=True, exclude_defaults=True), schedule,
+                                       name, handler, max_get_size, deadline=deadline)
+
+    def federated_search(self, searches: Sequence[Tuple[Type[EntryType], SearchQuery]], schedule=False, name=None,
+                         scorer: Optional[Callable[[Type[EntryType], Hit], float]] = None,
+                         limit: Optional[int] = None):
+        """
+        Search several collections in one /multi_search request and rank all hits together.
+        Args:
+            searches (list of tuples): models of collections and queries
+            schedule (bool): whether a caller should memorize a task
+            name (str): a name of the task
+            scorer (): a function of a model and a hit which returns a score, hits with higher scores come first.
+            If None, text match is normalized within every search, so the top hit of every search scores 1.
+            limit (int or None): maximal number of merged hits
+
+        Returns:
+            FederatedRes or Task: results of the searches and the ranked hits, every hit keeps its model
+
+        Raises:
+            ApiResponseNotOk: when any of the searches has failed
+        """
+        def handler(resp: Dict[str, Any]):
+            results = []
+            hits = []
+            for (collection, _), single in zip(searches, resp["results"]):
+                if "error" in single:
+                    raise ApiResponseNotOk(single, single.get("code", 400))
+                res = SearchRes[collection].parse_obj(single)
+                results.append(res)
+                if scorer is None:
+                    scores = normalized_scores(res)
+                else:
+                    scores = list(map(lambda hit: scorer(collection, hit), res.hits))
+                hits.extend(map(lambda h: FederatedHit.construct(collection=collection, hit=h[0], score=h[1]),
+                                zip(res.hits, scores)))
+
+            hits.sort(key=lambda hit: -hit.score)
+            return FederatedRes.construct(results=results, hits=hits[:limit])
+
+        body = {"searches": [{"collection": collection.schema_name, **query.dict(exclude_none=True)}
+                             for collection, query in searches]}
+        return self.api_caller.post(MULTI_SEARCH_PATH, json=body, schedule=schedule, name=name, handler=handler,
+                                    operation=SEARCH)
+
+    def scan(self, collection: Type[EntryType], filter_by: Optional[Union[FilterExpression, AtomicFilterExpr]] = None,
+             fields: Optional[Sequence[FieldArgs]] = None, schedule=False, name=None):
+        """
+        Iterate over all documents matching a filter. Documents are streamed from the export endpoint, so memory use
+        and throughput don't depend on how many documents there are, unlike deep search pagination.
+        Args:
+            collection (): a collection to scan
+            filter_by (): a filter documents should match, all documents are returned if None
+            fields (list of FieldArgs): fields to return, all fields if None. Partial documents are not validated.
+            schedule (bool): whether a caller should memorize a task
+            name (str): a name of the task
+
+        Returns:
+            Iterable or Task of AsyncIterable: documents
+        """
+        params = {}
+        if filter_by is not None:
+            params["filter_by"] = filter_by.to_string()
+        if fields is not None:
+            params["include_fields"] = ",".join(map(lambda f: f.name, fields))
+
+        def handler(i: int, doc: Dict[str, Any]):
+            if fields is None:
+                return collection(**doc)
+            return collection.construct(**doc)
+
+        # an export lasts as long as it takes to stream the documents, it has timeouts of the import class
+        return self.api_caller.get(f"{collection.endpoint_path}/export", params=params,
+                                   schedule=schedule, name=name, handler=handler, multiline=True)
@@ -0,0 +1,61 @@
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+
+RESULT_DOCUMENTS = "documents"
+RESULT_FAILURES = "failures"
+RESULT_COUNTS = "counts"
+RESULT_MODES = (RESULT_DOCUMENTS, RESULT_FAILURES, RESULT_COUNTS)
+
+
+class ImportFailure(BaseModel):
+    """
+    A line which the server has refused to import.
+    Attributes:
+        index (int): an index of the line in the input
+        error (str): an error message
+        code (int or None): an http-like error code, if the server reports it
+        document (str or None): the line as the server has received it
+    """
+    index: int
+    error: str
+    code: Optional[int]
+    document: Optional[str]
+
+
+class ImportSummary(BaseModel):
+    """
+    Aggregated results of an import, successful documents are only counted.
+    Attributes:
+        succeeded (int): number of imported lines
+        failed (int): number of failed lines
+        failures (list of ImportFailure): failed lines, empty in counts mode
+    """
+    succeeded: int = Field(0)
+    failed: int = Field(0)
+    failures: List[ImportFailure] = Field([])
+
+    def add(self, index: int, resp: Dict[str, Any], keep_failures: bool = True):
+        """
+        Account a line of an import response.
+        Args:
+            index (int): an index of the line in the input
+            resp (dict): a response line
+            keep_failures (bool): whether a failed line should be kept, or only counted
+        """
+        if resp["success"]:
+            self.succeeded += 1
+            return
+
+        self.failed += 1
+        if keep_failures:
+            self.failures.append(ImportFailure(index=index, error=resp.get("error", ""), code=resp.get("code"),
+                                               document=resp.get("document")))
+
+    @property
+    def total(self) -> int:
+        return self.succeeded + self.failed
+
+
+def check_result_mode(result_mode: str):
+    if result_mode not in RESULT_MODES:
+        raise ValueError(f"result_mode should be one of {', '.join(RESULT_MODES)}, got {result_mode}")
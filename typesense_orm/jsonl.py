@@ -0,0 +1,108 @@
+import gzip
+import mmap
+import os
+import random
+from typing import Union, BinaryIO, Iterator, Optional, Type
+from pydantic import ValidationError
+from .exceptions import ImportValidationError
+
+GZIP_MAGIC = b"\x1f\x8b"
+CHUNK_SIZE = 4 * 1024 * 1024
+
+JsonlSource = Union[str, os.PathLike, BinaryIO, bytes, bytearray, mmap.mmap]
+
+
+def _split_buffer(buffer: Union[bytes, bytearray, mmap.mmap], chunk_size: int) -> Iterator[bytes]:
+    start = 0
+    size = len(buffer)
+    while start < size:
+        end = min(start + chunk_size, size)
+        if end < size:
+            newline = buffer.rfind(b"\n", start, end)
+            if newline == -1:
+                newline = buffer.find(b"\n", end)
+            end = size if newline == -1 else newline + 1
+        yield buffer[start:end]
+        start = end
+
+
+def _split_stream(stream: BinaryIO, chunk_size: int) -> Iterator[bytes]:
+    rest = b""
+    while True:
+        block = stream.read(chunk_size)
+        if not block:
+            break
+        newline = block.rfind(b"\n")
+        if newline == -1:
+            rest += block
+            continue
+        yield rest + block[:newline + 1]
+        rest = block[newline + 1:]
+
+    if rest:
+        yield rest
+
+
+def _is_gzip(stream: BinaryIO) -> bool:
+    if not stream.seekable():
+        return False
+    position = stream.tell()
+    magic = stream.read(len(GZIP_MAGIC))
+    stream.seek(position)
+    return magic == GZIP_MAGIC
+
+
+def iter_jsonl_chunks(source: JsonlSource, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Split a JSONL source into chunks of about chunk_size bytes which end on a line boundary. Documents are not decoded.
+    Args:
+        source (): a path to a plain or gzipped JSONL file, a binary file object, or a buffer (bytes or mmap)
+        chunk_size (int): an approximate size of a chunk in bytes
+
+    Returns:
+        Iterator of bytes
+    """
+    if isinstance(source, (bytes, bytearray, mmap.mmap)):
+        yield from _split_buffer(source, chunk_size)
+        return
+
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            if _is_gzip(f):
+                with gzip.GzipFile(fileobj=f) as gz:
+                    yield from _split_stream(gz, chunk_size)
+            elif os.fstat(f.fileno()).st_size > 0:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    yield from _split_buffer(mapped, chunk_size)
+        return
+
+    if _is_gzip(source):
+        source = gzip.GzipFile(fileobj=source)
+    yield from _split_stream(source, chunk_size)
+
+
+def validate_sample(collection: Type, chunk: bytes, fraction: float, first_line: int = 0,
+                    rng: Optional[random.Random] = None):
+    """
+    Validate a random fraction of lines of a JSONL chunk against a model.
+    Args:
+        collection (): a model the documents should conform
+        chunk (bytes): a chunk of JSONL lines
+        fraction (float): a fraction of lines to validate, from 0 to 1
+        first_line (int): an index of the first line of the chunk in the whole source, used in error messages
+        rng (random.Random): a random generator used to pick the lines
+
+    Raises:
+        ImportValidationError: when a picked line is not a valid document
+    """
+    rng = rng or random
+    lines = chunk.splitlines()
+    expected = len(lines) * fraction
+    picked = int(expected) + (rng.random() < expected - int(expected))
+    for index in sorted(rng.sample(range(len(lines)), min(picked, len(lines)))):
+        if not lines[index].strip():
+            continue
+        try:
+            collection.parse_raw(lines[index])
+        except ValidationError as e:
+            raise ImportValidationError(first_line + index, e)
@@ -0,0 +1,276 @@
+"""
+Replay of captured traffic against a Typesense server.
+
+A log is a JSONL file of operations:
+    {"op": "search", "collection": "books", "params": {"q": "harry", "query_by": "title"}, "ts": 12.5}
+    {"op": "upsert", "collection": "books", "document": {"id": "1", "title": "Harry Potter"}}
+    {"op": "import", "collection": "books", "documents": [...], "action": "upsert"}
+ts is an optional arrival time in seconds, used by the recorded arrival mode. Search parameters are sent as they
+are, so entries of the slow query log can be replayed either.
+
+Usage:
+    python -m typesense_orm.loadgen queries.jsonl --node http://localhost:8108 --api-key xyz --rate 200 --duration 60
+"""
+import argparse
+import asyncio
+import json
+import random
+from datetime import timedelta
+from typing import Any, AsyncIterable, Dict, Iterable, Iterator, List, Optional, Sequence
+from pydantic import BaseModel, Field
+from asyncstdlib import iter as aiter
+from .api_caller import ApiCallerAsync, Node
+from .base_model import documents_path
+from .logging import logger
+
+CONSTANT = "constant"
+POISSON = "poisson"
+RECORDED = "recorded"
+ARRIVALS = (CONSTANT, POISSON, RECORDED)
+
+
+def read_log(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    """
+    A nearest-rank percentile of sorted values, 0 if there are none.
+    """
+    if not values:
+        return 0.0
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+
+class LatencyStats(BaseModel):
+    """
+    Throughput and latency of operations which finished within a time window.
+    Attributes:
+        start (float): seconds since the run has started
+        duration (float): length of the window in seconds
+        completed (int): number of successful operations
+        errors (int): number of failed operations
+        throughput (float): successful operations per second
+        p50, p90, p99, max (float): latency percentiles in milliseconds
+    """
+    start: float
+    duration: float
+    completed: int = Field(0)
+    errors: int = Field(0)
+    throughput: float = Field(0.0)
+    p50: float = Field(0.0)
+    p90: float = Field(0.0)
+    p99: float = Field(0.0)
+    max: float = Field(0.0)
+
+    @classmethod
+    def from_latencies(cls, start: float, duration: float, latencies: List[float], errors: int) -> "LatencyStats":
+        latencies = sorted(latencies)
+        return cls(start=start, duration=duration, completed=len(latencies), errors=errors,
+                   throughput=len(latencies) / duration if duration > 0 else 0.0,
+                   p50=percentile(latencies, 0.5) * 1000, p90=percentile(latencies, 0.9) * 1000,
+                   p99=percentile(latencies, 0.99) * 1000, max=(latencies[-1] if latencies else 0.0) * 1000)
+
+
+class LoadReport(BaseModel):
+    """
+    Results of a load run.
+    Attributes:
+        windows (list of LatencyStats): statistics of every report interval
+        total (LatencyStats): statistics of the whole run
+        by_op (dict of LatencyStats): statistics of every operation type
+        dropped (int): operations which were not sent since max_outstanding operations were in flight
+    """
+    windows: List[LatencyStats]
+    total: LatencyStats
+    by_op: Dict[str, LatencyStats]
+    dropped: int = Field(0)
+
+
+class LoadGenerator:
+    """
+    Replays operations with several async callers, each with its own connection pool. Operations are sent open-loop:
+    they start at their arrival times whether earlier ones have finished or not, and latency is measured from the
+    arrival time, so a saturated server shows up as growing latency rather than a lower send rate.
+    Attributes:
+        api_key (str): an api key
+        nodes (list of Node): nodes of the target
+        workers (int): number of callers
+        caller_options (dict): other options of the callers
+    """
+    def __init__(self, api_key: str, nodes: Sequence[Node], workers: int = 8, **caller_options):
+        self.api_key = api_key
+        self.nodes = nodes
+        self.workers = workers
+        self.caller_options = caller_options
+        self.callers: List[ApiCallerAsync] = []
+
+    def start(self):
+        # caller load is not a part of the replayed traffic
+        options = dict(self.caller_options)
+        options.setdefault("single_flight", False)
+        self.callers = [ApiCallerAsync(api_key=self.api_key, nodes=self.nodes, **options)
+                        for _ in range(self.workers)]
+
+    async def close(self):
+        for caller in self.callers:
+            await caller.close_session(schedule=False)
+
+    @staticmethod
+    async def send(caller: ApiCallerAsync, operation: Dict[str, Any]):
+        op = operation["op"]
+        if op == "multi_search":
+            return await caller.post("/multi_search", json={"searches": operation["searches"]}, schedule=False)
+        if op not in ("search", "add", "upsert", "update", "import"):
+            raise ValueError(f"unknown operation {op}")
+        path = documents_path(operation["collection"])
+        if op == "search":
+            return await caller.get(f"{path}/search", params=operation["params"], schedule=False)
+        if op in ("add", "upsert", "update"):
+            return await caller.post(path, data=json.dumps(operation["document"]), schedule=False,
+                                     params={} if op == "add" else {"action": op})
+        if op == "import":
+            data = "".join(map(lambda d: json.dumps(d) + "\n", operation["documents"]))
+            lines = await caller.post(f"{path}/import", data=data, schedule=False, multiline=True,
+                                      params={"action": operation.get("action", "create")},
+                                      handler=lambda i, resp: resp)
+            # an import is done when its whole response is read
+            failed = [resp async for resp in lines if not resp.get("success", True)]
+            if failed:
+                raise ValueError(f"{len(failed)} documents of an import failed, the first: {failed[0]}")
+
+    @staticmethod
+    async def arrivals(operations: AsyncIterable[Dict[str, Any]], arrival: str, rate: Optional[float],
+                       speed: float, seed: Optional[int]) -> AsyncIterable[Any]:
+        rng = random.Random(seed)
+        at = 0.0
+        first_ts = None
+        async for operation in operations:
+            if arrival == RECORDED:
+                if first_ts is None:
+                    first_ts = operation.get("ts", 0.0)
+                at = (operation.get("ts", first_ts) - first_ts) / speed
+            yield at, operation
+            if arrival == CONSTANT:
+                at += 1 / rate
+            elif arrival == POISSON:
+                at += rng.expovariate(rate)
+
+    async def run(self, operations: Iterable[Dict[str, Any]], arrival: str = CONSTANT, rate: Optional[float] = None,
+                  speed: float = 1.0, duration: Optional[timedelta] = None,
+                  report_interval: timedelta = timedelta(seconds=1), max_outstanding: int = 10000,
+                  seed: Optional[int] = None) -> LoadReport:
+        """
+        Replay operations and measure them.
+        Args:
+            operations (): an iterable or an async iterable of operations, e.g. read_log(path)
+            arrival (str): "constant" sends at a fixed rate, "poisson" with exponential gaps of the same mean rate,
+            "recorded" at the recorded ts of the operations divided by speed
+            rate (float or None): operations per second of constant and poisson arrivals
+            speed (float): a speedup of recorded arrivals
+            duration (timedelta or None): stop sending after this time, all operations are sent if None
+            report_interval (timedelta): length of report windows
+            max_outstanding (int): operations in flight above this number are dropped and counted
+            seed (int or None): a seed of poisson arrivals
+
+        Returns:
+            LoadReport
+        """
+        if arrival not in ARRIVALS:
+            raise ValueError(f"arrival should be one of {', '.join(ARRIVALS)}, got {arrival}")
+        if arrival != RECORDED and not rate:
+            raise ValueError(f"{arrival} arrival needs a rate")
+        if not self.callers:
+            self.start()
+
+        loop = asyncio.get_event_loop()
+        start = loop.time()
+        interval = report_interval.total_seconds()
+        results: List[Any] = []
+        pending = set()
+        dropped = 0
+
+        def done(op: str, scheduled: float, task: asyncio.Task):
+            pending.discard(task)
+            finished = loop.time() - start
+            failed = task.cancelled() or task.exception() is not None
+            if failed and not task.cancelled():
+                logger.debug(f"{op} failed: {task.exception()!r}")
+            results.append((finished, op, finished - scheduled, failed))
+
+        index = 0
+        async for at, operation in self.arrivals(aiter(operations), arrival, rate, speed, seed):
+            if duration is not None and at > duration.total_seconds():
+                break
+            delay = start + at - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if len(pending) >= max_outstanding:
+                dropped += 1
+                continue
+            task = loop.create_task(self.send(self.callers[index % len(self.callers)], operation))
+            index += 1
+            pending.add(task)
+            task.add_done_callback(lambda t, op=operation["op"], scheduled=at: done(op, scheduled, t))
+
+        if pending:
+            await asyncio.wait(list(pending))
+
+        return self.report(results, interval, dropped)
+
+    @staticmethod
+    def report(results: List[Any], interval: float, dropped: int) -> LoadReport:
+        end = max((r[0] for r in results), default=0.0)
+        windows = []
+        for window_start in [i * interval for i in range(int(end // interval) + 1)]:
+            window = [r for r in results if window_start <= r[0] < window_start + interval]
+            windows.append(LatencyStats.from_latencies(window_start, interval, [r[2] for r in window if not r[3]],
+                                                       sum(1 for r in window if r[3])))
+
+        def stats(selected: List[Any]) -> LatencyStats:
+            return LatencyStats.from_latencies(0.0, end, [r[2] for r in selected if not r[3]],
+                                               sum(1 for r in selected if r[3]))
+
+        ops = sorted(set(r[1] for r in results))
+        return LoadReport(windows=windows, total=stats(results),
+                          by_op={op: stats([r for r in results if r[1] == op]) for op in ops}, dropped=dropped)
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Replay a JSONL operation log against Typesense")
+    parser.add_argument("log", help="a JSONL file of operations")
+    parser.add_argument("--node", action="append", required=True, help="a node url, can be repeated")
+    parser.add_argument("--api-key", required=True)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--arrival", choices=ARRIVALS, default=CONSTANT)
+    parser.add_argument("--rate", type=float, help="operations per second")
+    parser.add_argument("--speed", type=float, default=1.0, help="a speedup of recorded arrivals")
+    parser.add_argument("--duration", type=float, help="seconds to send for")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds in a report window")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    generator = LoadGenerator(args.api_key, [Node(url=url) for url in args.node], workers=args.workers)
+    generator.start()
+    loop = asyncio.get_event_loop()
+    try:
+        report = loop.run_until_complete(generator.run(
+            read_log(args.log), arrival=args.arrival, rate=args.rate, speed=args.speed,
+            duration=timedelta(seconds=args.duration) if args.duration else None,
+            report_interval=timedelta(seconds=args.interval), seed=args.seed))
+    finally:
+        loop.run_until_complete(generator.close())
+
+    for window in report.windows:
+        print(f"{window.start:8.1f}s {window.throughput:9.1f} op/s  p50 {window.p50:8.1f}ms  p90 {window.p90:8.1f}ms  "
+              f"p99 {window.p99:8.1f}ms  errors {window.errors}")
+    print(report.total.json(indent=2))
+    if report.dropped:
+        print(f"dropped {report.dropped} operations")
+
+
+if __name__ == "__main__":
+    main()
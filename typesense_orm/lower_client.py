@@ -1,26 +1,61 @@
 from .api_caller import ApiCaller, Node, ApiCallerSync, ApiCallerAsync
-from typing import Sequence, Dict, Any, Generic, TypeVar, Type, Optional, Iterable, AsyncIterable, Union
-from .schema import Schema
+from typing import Sequence, Dict, Any, Generic, TypeVar, Type, Optional, Iterable, AsyncIterable, Union, Callable
+from .schema import Schema, SchemaDiff, diff_schemas
+from .stats import NodeStats, StatsPoller
+from datetime import timedelta
 from .exceptions import ApiResponseNotOk
 from .logging import logger
 from gc import get_referrers
 from typing_extensions import Unpack
-from asyncio import Task
+from asyncio import Task, isfuture
 from abc import abstractmethod, ABC
+import re
 
 COLLECTIONS_PATH = "/collections"
+ALIASES_PATH = "/aliases"
 
 C = TypeVar("C", bound=ApiCaller)
 
 
+def versioned_name(name: str, version: int) -> str:
+    return f"{name}_v{version}"
+
+
+def collection_version(collection_name: Optional[str]) -> int:
+    match = re.search(r"_v(\d+)$", collection_name or "")
+    return int(match.group(1)) if match else 0
+
+
 class LowerClient(Generic[C], ABC):
-    def __init__(self, api_key: str, nodes: Sequence[Node]):
+    def __init__(self, api_key: str, nodes: Sequence[Node], **caller_options):
+        """
+        Args:
+            api_key (str): An api key to make the requests
+            nodes (list of Node): a list of nodes that the client can use.
+            **caller_options (): other options passed to the api caller, like retries or in-flight limits
+        """
         self._api_key = api_key
         self._nodes = nodes
-        self.api_caller: Optional[ApiCaller] = None
+        self._caller_options = caller_options
+        self._api_caller: Optional[ApiCaller] = None
+
+    @property
+    def api_caller(self) -> Optional[ApiCaller]:
+        """
+        The api caller of the client. In a process forked after the client has started, it's rebuilt on first use, so
+        clients can be created at import time of pre-fork servers.
+        """
+        if self._api_caller is not None:
+            self._api_caller.ensure_process()
+        return self._api_caller
+
+    @api_caller.setter
+    def api_caller(self, api_caller: Optional[ApiCaller]):
+        self._api_caller = api_caller
 
     def start(self):
-        self.api_caller = self.__orig_class__.__args__[0](api_key=self._api_key, nodes=self._nodes)
+        self.api_caller = self.__orig_class__.__args__[0](api_key=self._api_key, nodes=self._nodes,
+                                                          **self._caller_options)
 
     def __enter__(self):
         self.start()
@@ -34,7 +69,7 @@ class LowerClient(Generic[C], ABC):
                                         handler=lambda d: Schema.from_dict(d),
                                         data=schema.json(exclude_unset=True),
                                         schedule=False, name=task_name)
-            if isinstance(resp, Task):
+            if isfuture(resp):
                 return self.api_caller.loop.run_until_complete(resp)
             else:
                 return resp
@@ -50,14 +85,134 @@ class LowerClient(Generic[C], ABC):
 
     def delete_collection(self, name: str):
         resp = self.api_caller.delete(f"{COLLECTIONS_PATH}/{name}", schedule=False)
-        if isinstance(resp, Task):
+        if isfuture(resp):
             return self.api_caller.loop.run_until_complete(resp)
         else:
             return resp
 
-    async def update_collection(self, schema: Schema) -> Schema:
-        # I'll implement it in several days, when the current version will support it.
-        pass
+    def _wait(self, resp):
+        if isfuture(resp):
+            return self.api_caller.loop.run_until_complete(resp)
+        return resp
+
+    def get_collection(self, name: str) -> Optional[Schema]:
+        try:
+            return self._wait(self.api_caller.get(f"{COLLECTIONS_PATH}/{name}", schedule=False,
+                                                  handler=lambda d: Schema.from_dict(d)))
+        except ApiResponseNotOk as e:
+            if e.status_code == 404:
+                return None
+            raise e
+
+    def upsert_alias(self, name: str, collection_name: str) -> Dict[str, Any]:
+        """
+        Point an alias to a collection, the switch is atomic for readers.
+        """
+        return self._wait(self.api_caller.put(f"{ALIASES_PATH}/{name}", json={"collection_name": collection_name},
+                                              schedule=False))
+
+    def get_alias(self, name: str) -> Optional[str]:
+        """
+        Get a name of a collection an alias points to, None if there is no such alias.
+        """
+        try:
+            return self._wait(self.api_caller.get(f"{ALIASES_PATH}/{name}", schedule=False,
+                                                  handler=lambda d: d["collection_name"]))
+        except ApiResponseNotOk as e:
+            if e.status_code == 404:
+                return None
+            raise e
+
+    def delete_alias(self, name: str):
+        return self._wait(self.api_caller.delete(f"{ALIASES_PATH}/{name}", schedule=False))
+
+    def cluster_stats(self, schedule=False, name=None) -> Union[Dict[str, NodeStats], Task]:
+        """
+        Read /stats.json, /metrics.json and /debug of every node. The samples are appended to the caller's
+        stats_series and update pending write batches used by admission control.
+        Args:
+            schedule (bool): whether a caller should memorize a task
+            name (str): a name of the task
+
+        Returns:
+            dict of NodeStats or Task: samples of the nodes which have responded, by node url
+        """
+        task = self.api_caller.loop.create_task(self.api_caller.cluster_stats(), name=name)
+        if schedule:
+            self.api_caller.tasks[task.get_name()] = task
+        return self._wait(task) if self.api_caller.sync() else task
+
+    def start_stats_poller(self, interval: timedelta = timedelta(seconds=10),
+                           on_sample: Optional[Callable[[NodeStats], Any]] = None) -> StatsPoller:
+        """
+        Start sampling node statistics in the background into the caller's stats_series.
+        Args:
+            interval (timedelta): time between samples
+            on_sample (): a callback called with every sample
+
+        Returns:
+            StatsPoller: the running poller
+        """
+        poller = self.api_caller.stats_poller
+        poller.stop()
+        poller.interval = interval
+        poller.on_sample = on_sample
+        poller.start()
+        return poller
+
+    def stop_stats_poller(self):
+        self.api_caller.stats_poller.stop()
+
+    def ensure_alias(self, schema: Schema):
+        """
+        Make sure an alias named after a schema exists. If there is neither an alias nor a collection with this name,
+        the first version of the collection is created and the alias points to it.
+        """
+        if self.get_alias(schema.name) is not None or self.get_collection(schema.name) is not None:
+            return
+
+        collection_name = versioned_name(schema.name, 1)
+        self.create_collection(schema.copy(update={"name": collection_name}))
+        self.upsert_alias(schema.name, collection_name)
+
+    def diff_collection(self, schema: Schema) -> Optional[SchemaDiff]:
+        """
+        Compare a schema with a live collection, an alias is resolved to the collection it points to.
+        Returns:
+            SchemaDiff or None: changes which turn the live collection into the schema, None if there is no collection
+        """
+        live = self.get_collection(self.get_alias(schema.name) or schema.name)
+        return None if live is None else diff_schemas(live, schema)
+
+    def update_collection(self, schema: Schema) -> Optional[Schema]:
+        """
+        Migrate a live collection to a schema in place. New fields are added, missing fields are dropped and fields
+        with changed attributes are dropped and added again, all in a single PATCH request. An alias is resolved to
+        the collection it points to.
+        Args:
+            schema (Schema): a desired schema
+
+        Returns:
+            Schema or None: the updated collection schema, None if there is no such collection
+
+        Raises:
+            IncompatibleSchemaChange: when the change cannot be applied in place, e.g. a field type changes.
+            Such collections should be reindexed.
+        """
+        collection_name = self.get_alias(schema.name) or schema.name
+        live = self.get_collection(collection_name)
+        if live is None:
+            return None
+
+        diff = diff_schemas(live, schema)
+        if not diff:
+            return live
+
+        logger.info(f"migrating collection {collection_name}: dropping {diff.drop}, "
+                    f"adding {[field.name for field in diff.add]}")
+        self._wait(self.api_caller.patch(f"{COLLECTIONS_PATH}/{collection_name}", json=diff.to_patch(),
+                                         schedule=False))
+        return self.get_collection(collection_name)
 
     def close(self):
         self.wait_for_all()
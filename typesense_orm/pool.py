@@ -0,0 +1,88 @@
+import asyncio
+from collections import deque
+from concurrent.futures import Executor
+from typing import Any, AsyncIterable, Dict, Iterable, List, Optional, Tuple, Type, Union
+from pydantic import ValidationError
+from asyncstdlib import iter as aiter
+
+EncodedChunk = Tuple[bytes, List[int], List[Tuple[int, str]]]
+
+
+def encode_documents(collection: Type, documents: List[Union[Dict[str, Any], Any]]) -> EncodedChunk:
+    """
+    Validate and encode a chunk of documents, it's run in worker processes, so it should stay a module-level function.
+    Args:
+        collection (): a model of the documents
+        documents (list): dicts or model instances
+
+    Returns:
+        tuple: JSONL bytes, indices of encoded documents within the chunk and (index, error message) of invalid ones
+    """
+    lines = []
+    encoded = []
+    errors = []
+    for index, document in enumerate(documents):
+        try:
+            if not isinstance(document, collection):
+                document = collection(**document)
+            line = document.document_json()
+        except ValidationError as e:
+            errors.append((index, str(e)))
+            continue
+        except Exception as e:
+            # a bad document fails alone rather than the whole chunk
+            errors.append((index, f"{type(e).__name__}: {e}"))
+            continue
+        lines.append(line)
+        encoded.append(index)
+
+    data = ("\n".join(lines) + "\n").encode("utf-8") if lines else b""
+    return data, encoded, errors
+
+
+async def encode_in_pool(collection: Type, data: Union[AsyncIterable, Iterable], executor: Optional[Executor],
+                         chunk_size: int, max_pending: int, loop: asyncio.AbstractEventLoop) \
+        -> AsyncIterable[Tuple[int, EncodedChunk]]:
+    """
+    Split a document stream into chunks and encode them in an executor. Up to max_pending chunks are encoded at once,
+    and the chunks are yielded in order of the stream.
+    Args:
+        collection (): a model of the documents
+        data (): an iterable or an async iterable of dicts or model instances
+        executor (Executor or None): an executor, usually ProcessPoolExecutor. If None, chunks are encoded in the loop
+        thread.
+        chunk_size (int): number of documents in a chunk
+        max_pending (int): maximal number of chunks which are encoded at once
+        loop (asyncio.AbstractEventLoop): a loop the stream is consumed in
+
+    Yields:
+        tuple: an index of the first document of a chunk in the stream, and the encoded chunk
+    """
+    pending = deque()
+    first = 0
+    chunk = []
+
+    def submit():
+        nonlocal first, chunk
+        if executor is None:
+            future = loop.create_future()
+            future.set_result(encode_documents(collection, chunk))
+        else:
+            future = loop.run_in_executor(executor, encode_documents, collection, chunk)
+        pending.append((first, future))
+        first += len(chunk)
+        chunk = []
+
+    async for document in aiter(data):
+        chunk.append(document)
+        if len(chunk) >= chunk_size:
+            submit()
+            if len(pending) >= max_pending:
+                index, future = pending.popleft()
+                yield index, await future
+
+    if chunk:
+        submit()
+    while pending:
+        index, future = pending.popleft()
+        yield index, await future
@@ -1,16 +1,29 @@
 from pydantic import BaseModel, Field
-from typing import Any, Sequence, Optional, Dict
+from typing import Any, Sequence, Optional, Dict, List
 import json
-from .types import get_from_opt, allowed_types, allowed_types_rev
+from .types import get_from_opt, allowed_types, allowed_types_rev, Vector
 from .search import FieldArgs
+from .exceptions import IncompatibleSchemaChange
 
+FIELD_ATTRIBUTES = ("facet", "index", "infix", "optional")
+
+
+def field_type(field: Dict[str, Any]):
+    if field.get("num_dim"):
+        return Vector[field["num_dim"]]
+    return allowed_types_rev[field["type"]]
+
+
+def dump_field(field: Dict[str, Any]) -> Dict[str, Any]:
+    _, python_type = get_from_opt(field["type"])
+    field["type"] = allowed_types[python_type]
+    if field.get("num_dim") is None:
+        field.pop("num_dim", None)
+    return field
 
-def json_dumper(v, *, default):
-    for field in v["fields"].values():
-        _, field_type = get_from_opt(field["type"])
-        field["type"] = allowed_types[field_type]
 
-    v["fields"] = list(v["fields"].values())
+def json_dumper(v, *, default):
+    v["fields"] = list(map(dump_field, v["fields"].values()))
     return json.dumps(v)
 
 
@@ -18,7 +31,7 @@ def json_loader(js_string):
     js_dict = json.loads(js_string)
     fields = {}
     for field in js_dict["fields"]:
-        field["type"] = allowed_types_rev[field["type"]]
+        field["type"] = field_type(field)
         fields.update({field["name"]: FieldArgs(**field)})
 
     js_dict["fields"] = fields
@@ -38,7 +51,7 @@ class Schema(BaseModel):
     def from_dict(cls, dict_schema: Dict[str, Any]):
         fields = []
         for field in dict_schema["fields"]:
-            field["type"] = allowed_types_rev[field["type"]]
+            field["type"] = field_type(field)
             fields.append(FieldArgs(**field))
 
         dict_schema["fields"] = dict(map(lambda f: (f["name"], f), dict_schema["fields"]))
@@ -48,3 +61,72 @@ class Schema(BaseModel):
         extra = "ignore"
         json_dumps = json_dumper
         json_loads = json_loader
+
+
+class SchemaDiff(BaseModel):
+    """
+    Changes which turn one schema into another.
+    Attributes:
+        add (list of FieldArgs): fields which should be added, including changed fields
+        drop (list of str): names of fields which should be dropped, including changed fields
+        incompatible (list of str): changes which cannot be applied in place, like a field type change
+    """
+    add: List[FieldArgs] = Field([])
+    drop: List[str] = Field([])
+    incompatible: List[str] = Field([])
+
+    def __bool__(self):
+        return bool(self.add or self.drop or self.incompatible)
+
+    def to_patch(self) -> Dict[str, Any]:
+        """
+        A body of a collection PATCH request which applies the changes.
+
+        Raises:
+            IncompatibleSchemaChange: when there are incompatible changes
+        """
+        if self.incompatible:
+            raise IncompatibleSchemaChange(self.incompatible)
+        fields = list(map(lambda name: {"name": name, "drop": True}, self.drop))
+        fields += list(map(lambda field: dump_field(field.dict()), self.add))
+        return {"fields": fields}
+
+
+def diff_schemas(live: Schema, target: Schema) -> SchemaDiff:
+    """
+    Compute changes which turn a live collection schema into a target one. Fields with changed attributes are dropped
+    and added again, type changes and collection-level changes are incompatible.
+    Args:
+        live (Schema): a current collection schema
+        target (Schema): a desired schema
+
+    Returns:
+        SchemaDiff
+    """
+    diff = SchemaDiff()
+    for name, field in target.fields.items():
+        current = live.fields.get(name)
+        if current is None:
+            diff.add.append(field)
+            continue
+
+        current_type = allowed_types[get_from_opt(current.type)[1]]
+        target_type = allowed_types[get_from_opt(field.type)[1]]
+        if current_type != target_type or current.num_dim != field.num_dim:
+            diff.incompatible.append(f"type of {name} changes from {current_type} to {target_type}")
+        elif any(getattr(current, attr) != getattr(field, attr) for attr in FIELD_ATTRIBUTES):
+            diff.drop.append(name)
+            diff.add.append(field)
+
+    for name in live.fields:
+        if name not in target.fields:
+            diff.drop.append(name)
+
+    for attr in ("default_sorting_field", "token_separators", "symbols_to_index"):
+        current, desired = getattr(live, attr) or None, getattr(target, attr) or None
+        if isinstance(desired, Sequence) and not isinstance(desired, str):
+            current, desired = list(current or []) or None, list(desired) or None
+        if current != desired:
+            diff.incompatible.append(f"{attr} changes from {current} to {desired}")
+
+    return diff
@@ -2,7 +2,7 @@ from pydantic import BaseModel, Field, validator, root_validator
 from pydantic.generics import GenericModel
 from typing import List, Any, Union, Sequence, Optional, Generic, TypeVar, Tuple, Dict
 from enum import Enum
-from .types import int32, int64
+from .types import int32, int64, np
 import json
 
 
@@ -40,8 +40,16 @@ class FilterExpression(BaseModel):
             self.__root__.append(other)
             return self
 
-    def to_sting(self):
-        return "&".join(map(lambda a: a.to_string(), self.__root__))
+    def to_string(self):
+        return " && ".join(map(lambda a: a.to_string(), self.__root__))
+
+    to_sting = to_string
+
+
+def filter_value(value: Any) -> str:
+    if isinstance(value, str):
+        return f"`{value}`"
+    return str(value)
 
 
 numeric = [int, float, int32, int64]
@@ -118,7 +126,11 @@ class AtomicFilterExpr(BaseModel):
             return FilterExpression(__root__=[self, other])
 
     def to_string(self):
-        return f"{self.column.name}: {self.condition.value} {self.parameter}"
+        if self.condition == Condition.IN:
+            return f"{self.column.name}:[{','.join(map(filter_value, self.parameter))}]"
+        if self.condition == Condition.IN_RANGE:
+            return f"{self.column.name}:[{self.parameter[0]}..{self.parameter[1]}]"
+        return f"{self.column.name}:{self.condition.value}{filter_value(self.parameter)}"
 
 
 FilterExpression.update_forward_refs()
@@ -131,6 +143,12 @@ class FieldArgs(BaseModel):
     index: bool = Field(False)
     infix: bool = Field(False)
     optional: bool = Field(False)
+    num_dim: Optional[int]
+
+    def nearest(self, vector: Any, k: int = 10, distance_threshold: Optional[float] = None) -> 'VectorQuery':
+        if self.num_dim is None:
+            raise ValueError(f"field {self.name} is not a vector field")
+        return VectorQuery(field=self, vector=vector, k=k, distance_threshold=distance_threshold)
 
     def in_seq(self, arr: Sequence[Any]):
         return AtomicFilterExpr(column=self, condition=Condition.IN, parameter=arr)
@@ -160,6 +178,34 @@ class FieldArgs(BaseModel):
 AtomicFilterExpr.update_forward_refs()
 
 
+class VectorQuery(BaseModel):
+    field: FieldArgs
+    vector: Any
+    k: int = Field(10)
+    distance_threshold: Optional[float]
+
+    @validator("vector")
+    def validate_vector(cls, v, values):
+        if np is not None:
+            v = np.asarray(v, dtype=np.float32)
+        else:
+            v = list(map(float, v))
+        field: Optional[FieldArgs] = values.get("field")
+        if field is not None and field.num_dim is not None and len(v) != field.num_dim:
+            raise ValueError(f"vector should have {field.num_dim} dimensions, got {len(v)}")
+        return v
+
+    def to_string(self):
+        if np is not None:
+            values = ",".join(self.vector.astype(str).tolist())
+        else:
+            values = ",".join(map(repr, self.vector))
+        params = [f"k:{self.k}"]
+        if self.distance_threshold is not None:
+            params.append(f"distance_threshold:{self.distance_threshold}")
+        return f"{self.field.name}:([{values}], {', '.join(params)})"
+
+
 def json_dumper(v, *, default):
 
     return json.dumps(v)
@@ -175,12 +221,15 @@ class SearchQuery(BaseModel):
     pre_segmented_query: bool = Field(False)
 
     per_page: int = Field(10)
+    sort_by: Optional[str]
 
     facet_by: Optional[Sequence[FieldArgs]]
     max_facet_values: Optional[int]
     facet_query: Optional[Dict[FieldArgs, str]]
     facet_query_num_typos: Optional[int]
 
+    vector_query: Optional[VectorQuery]
+
     @root_validator
     def validate_len(cls, v):
         if type(v.get("prefix")) in [list, tuple]:
@@ -217,13 +266,16 @@ class SearchQuery(BaseModel):
 
     def dict(self, *args, **kwargs) -> Dict[str, Any]:
         ret = super().dict(*args, **kwargs)
-        ret["query_by"] = list(map(lambda field: field.name, self.query_by))
+        ret["query_by"] = ",".join(map(lambda field: field.name, self.query_by))
         if "filter_by" in ret:
-            ret["filter_by"] = self.filter_by.to_sting()
+            ret["filter_by"] = self.filter_by.to_string()
         if "facet_by" in ret:
-            ret["facet_by"] = list(map(lambda a: a.name, self.facet_by))
+            ret["facet_by"] = ",".join(map(lambda a: a.name, self.facet_by))
+        if "vector_query" in ret:
+            ret["vector_query"] = self.vector_query.to_string()
         if "facet_query" in ret:
-            ret["facet_query"] = ",".join(map(lambda fargs, q: ":".join([fargs.name, q]), self.facet_query.items()))
+            ret["facet_query"] = ",".join(map(lambda item: ":".join([item[0].name, item[1]]),
+                                              self.facet_query.items()))
 
         for k, v in ret.items():
             if isinstance(v, bool):
@@ -270,13 +322,14 @@ T = TypeVar("T", bound=BaseModel)
 class Hit(GenericModel, Generic[T]):
     highlights: Sequence[Union[Highlight, ArrayHighlight]]
     document: T
-    text_match: int
+    text_match: Optional[int]
+    vector_distance: Optional[float]
 
 
 class Count(BaseModel):
     count: int
-    highlighted: int
-    value: int
+    highlighted: str
+    value: str
 
 
 class Stats(BaseModel):
@@ -303,3 +356,67 @@ class SearchRes(GenericModel, Generic[T]):
     hits: Sequence[Hit[T]]
 
 
+
+
+def normalized_scores(res: SearchRes) -> List[float]:
+    """
+    Scores of hits of a search which are comparable across searches: text match is divided by the best text match of
+    the search, so the top hit scores 1, and hits of vector queries score 1 - vector distance.
+    """
+    best = max((hit.text_match for hit in res.hits if hit.text_match), default=None)
+    scores = []
+    for hit in res.hits:
+        if hit.text_match is not None and best:
+            scores.append(hit.text_match / best)
+        elif hit.vector_distance is not None:
+            scores.append(1.0 - hit.vector_distance)
+        else:
+            scores.append(0.0)
+    return scores
+
+
+class FederatedHit(BaseModel):
+    """
+    A hit of a federated search.
+    Attributes:
+        collection (): a model of the collection the hit comes from
+        hit (Hit): the hit, its document is an instance of the model
+        score (float): a score hits are ranked by
+    """
+    collection: Any
+    hit: Hit
+    score: float
+
+    @property
+    def document(self) -> BaseModel:
+        return self.hit.document
+
+
+class FederatedRes(BaseModel):
+    """
+    Results of searches over several collections, which were made in one request.
+    Attributes:
+        results (list of SearchRes): a result of every search, in order of the searches
+        hits (list of FederatedHit): hits of all searches ranked by score, best first
+    """
+    results: Sequence[SearchRes]
+    hits: Sequence[FederatedHit]
+
+    @property
+    def found(self) -> int:
+        return sum(map(lambda r: r.found, self.results))
+
+    @property
+    def search_time_ms(self) -> int:
+        return max(map(lambda r: r.search_time_ms, self.results), default=0)
+
+
+class GetManyRes(GenericModel, Generic[T]):
+    """
+    Documents fetched by ids.
+    Attributes:
+        documents (list): a document for every requested id in order of the ids, None if there is no such document
+        missing (list of str): ids which have no documents
+    """
+    documents: Sequence[Optional[T]]
+    missing: Sequence[str]
@@ -0,0 +1,369 @@
+import asyncio
+import heapq
+import math
+import uuid
+from collections import deque
+from typing import Any, AsyncIterable, Callable, Deque, Dict, Generic, Iterable, List, Optional, Sequence, Tuple, \
+    Type, TypeVar, Union
+from zlib import crc32
+from asyncstdlib import enumerate as aenumerate
+from .higher_client import Client, EntryType, HandlerRetType, IMPORT_BATCH_SIZE, MAX_GET_PARAMS_SIZE
+from .schema import Schema
+from .search import SearchQuery, SearchRes, PaginatedQuery, Hit, FacetRes, Count, Stats
+from .exceptions import UnsupportedSortClause
+from .logging import logger
+
+C = TypeVar("C")
+
+TEXT_MATCH = "_text_match"
+VECTOR_DISTANCE = "_vector_distance"
+
+
+def split_sort_by(sort_by: str) -> List[str]:
+    """
+    Split sort_by into clauses on commas which are not inside parentheses or brackets, e.g. in location(48.8, 2.3).
+    """
+    clauses = []
+    depth = 0
+    start = 0
+    for i, char in enumerate(sort_by):
+        if char in "([":
+            depth += 1
+        elif char in ")]":
+            depth -= 1
+        elif char == "," and depth == 0:
+            clauses.append(sort_by[start:i].strip())
+            start = i + 1
+    clauses.append(sort_by[start:].strip())
+    return clauses
+
+
+def parse_sort_by(query: SearchQuery) -> List[Tuple[str, bool]]:
+    """
+    Get sort clauses of a query.
+    Returns:
+        list of tuples: field names and whether the order is descending. If the query has no sort_by, hits are
+        ordered by text match, or by vector distance for a pure vector query.
+
+    Raises:
+        UnsupportedSortClause: if a clause can't be ordered by values of hits, e.g. a geo distance, _eval or a clause
+        with parameters
+    """
+    if not query.sort_by:
+        if query.vector_query is not None and query.q == "*":
+            return [(VECTOR_DISTANCE, False)]
+        return [(TEXT_MATCH, True)]
+
+    clauses = []
+    for clause in split_sort_by(query.sort_by):
+        field, _, order = clause.rpartition(":")
+        field = field.strip()
+        order = order.strip().lower()
+        if not field or "(" in field or order not in ("asc", "desc") or \
+                (field.startswith("_") and field not in (TEXT_MATCH, VECTOR_DISTANCE)):
+            raise UnsupportedSortClause(clause)
+        clauses.append((field, order == "desc"))
+    return clauses
+
+
+def hit_value(hit: Hit, field: str) -> Any:
+    if field == TEXT_MATCH:
+        return hit.text_match
+    if field == VECTOR_DISTANCE:
+        return hit.vector_distance
+    return getattr(hit.document, field, None)
+
+
+class HitOrder:
+    """
+    A sort key of a hit, a hit which should come first is less. Missing values go last.
+    """
+    __slots__ = ("clauses", "values")
+
+    def __init__(self, clauses: List[Tuple[str, bool]], hit: Hit):
+        self.clauses = clauses
+        self.values = [hit_value(hit, field) for field, _ in clauses]
+
+    def __lt__(self, other: "HitOrder") -> bool:
+        for (_, descending), a, b in zip(self.clauses, self.values, other.values):
+            if a == b:
+                continue
+            if a is None:
+                return False
+            if b is None:
+                return True
+            return a > b if descending else a < b
+        return False
+
+    def __eq__(self, other: "HitOrder") -> bool:
+        return self.values == other.values
+
+
+def merge_facet_counts(results: Sequence[SearchRes], max_facet_values: Optional[int] = None) -> List[FacetRes]:
+    """
+    Merge facet counts of searches over disjoint sets of documents: counts of equal values are summed and stats are
+    aggregated.
+    """
+    counts: Dict[str, Dict[str, List[Any]]] = {}
+    stats: Dict[str, List[Stats]] = {}
+    for res in results:
+        for facet in res.facet_counts:
+            values = counts.setdefault(facet.field_name, {})
+            for count in facet.counts:
+                merged = values.setdefault(count.value, [0, count.highlighted])
+                merged[0] += count.count
+            stats.setdefault(facet.field_name, []).append(facet.stats)
+
+    ret = []
+    for field_name, values in counts.items():
+        ordered = sorted(values.items(), key=lambda v: -v[1][0])[:max_facet_values]
+        field_stats = stats[field_name]
+        total_values = sum(map(lambda s: s.total_values, field_stats))
+        total = sum(map(lambda s: s.sum, field_stats))
+        merged_stats = Stats.construct(avg=total / total_values if total_values else 0.0,
+                                       max=max(map(lambda s: s.max, field_stats)),
+                                       min=min(map(lambda s: s.min, field_stats)),
+                                       sum=total, total_values=total_values)
+        ret.append(FacetRes.construct(counts=[Count.construct(value=value, count=c, highlighted=h)
+                                              for value, (c, h) in ordered],
+                                      field_name=field_name, stats=merged_stats))
+    return ret
+
+
+class _ShardHits:
+    """
+    Hits of one shard, pages are fetched as the merge consumes them.
+    """
+    def __init__(self, fetch: Callable[[int], Any], first: SearchRes, per_page: int):
+        self.fetch = fetch
+        self.per_page = per_page
+        self.found = first.found
+        self.fetched = len(first.hits)
+        self.next_page = 2
+        self.exhausted = len(first.hits) < per_page
+        self.hits: Deque[Hit] = deque(first.hits)
+
+    async def next(self) -> Optional[Hit]:
+        if not self.hits and not self.exhausted and self.fetched < self.found:
+            res = await self.fetch(self.next_page)
+            self.next_page += 1
+            self.fetched += len(res.hits)
+            self.exhausted = len(res.hits) < self.per_page
+            self.hits.extend(res.hits)
+        return self.hits.popleft() if self.hits else None
+
+
+class ShardedClient(Generic[C]):
+    """
+    A client which partitions collections across several Typesense clusters. Documents are assigned to a shard by a
+    hash of their id or of a shard key field, writes go to the shard of a document, and searches are sent to all
+    shards concurrently and merged.
+
+    Notes:
+        shard clients should share an event loop, i.e. be created in the same thread. Models are bound to a sharded
+        client with create_base_model as to a plain one, and their collections are created in every shard.
+        Documents without an id get a random one when they are sharded by id, since ids generated by different
+        clusters may collide.
+
+    Attributes:
+        shards (list of Client): a client of every cluster
+        shard_key (str or None): a field documents are partitioned by, id if None
+    """
+    def __init__(self, shards: Sequence[Client[C]], shard_key: Optional[str] = None):
+        if not shards:
+            raise ValueError("a sharded client needs at least one shard")
+        self.shards = list(shards)
+        self.shard_key = shard_key
+
+    def start(self):
+        for shard in self.shards:
+            shard.start()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def close(self):
+        for shard in self.shards:
+            shard.close()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        if exc_val:
+            raise exc_val
+
+    @property
+    def api_caller(self):
+        return self.shards[0].api_caller
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self.api_caller.loop
+
+    def create_collection(self, schema: Schema) -> Optional[Schema]:
+        return [shard.create_collection(schema) for shard in self.shards][0]
+
+    def ensure_alias(self, schema: Schema):
+        for shard in self.shards:
+            shard.ensure_alias(schema)
+
+    def shard_index(self, entry: EntryType) -> int:
+        """
+        An index of a shard a document belongs to.
+        """
+        key = getattr(entry, self.shard_key or "id")
+        if key is None:
+            if self.shard_key is not None:
+                raise ValueError(f"shard key {self.shard_key} of a document is not set")
+            entry.id = key = uuid.uuid4().hex
+        return crc32(str(key).encode("utf-8")) % len(self.shards)
+
+    def shard(self, entry: EntryType) -> Client[C]:
+        return self.shards[self.shard_index(entry)]
+
+    def add(self, entry: EntryType, schedule=False, name=None,
+            on_added: Callable[[EntryType], HandlerRetType] = lambda a: a):
+        return self.shard(entry).add(entry, schedule=schedule, name=name, on_added=on_added)
+
+    def upsert(self, entry: EntryType, schedule=False, name=None,
+               on_upsert: Callable[[EntryType], HandlerRetType] = lambda a: a, tracker=None):
+        return self.shard(entry).upsert(entry, schedule=schedule, name=name, on_upsert=on_upsert, tracker=tracker)
+
+    async def _route_import(self, data: Union[AsyncIterable[EntryType], Iterable[EntryType]], batch_size: int,
+                            action: str,
+                            error_handler: Callable[[int, Dict[str, Any]], HandlerRetType],
+                            entry_handler: Callable[[int, EntryType], HandlerRetType],
+                            tracker) -> List[HandlerRetType]:
+        queues = [asyncio.Queue(maxsize=2 * batch_size) for _ in self.shards]
+        indices: List[List[int]] = [[] for _ in self.shards]
+
+        async def drain(queue: asyncio.Queue):
+            while True:
+                entry = await queue.get()
+                if entry is None:
+                    return
+                yield entry
+
+        def shard_handler(handler: Callable[[int, Any], HandlerRetType], shard: int):
+            return lambda i, a: handler(indices[shard][i], a)
+
+        imports = [self.loop.create_task(shard._route_import(drain(queue), batch_size, action,
+                                                             shard_handler(error_handler, i),
+                                                             shard_handler(entry_handler, i), tracker=tracker))
+                   for i, (shard, queue) in enumerate(zip(self.shards, queues))]
+
+        async def put(shard: int, item: Optional[EntryType]):
+            # a shard import which has failed stops reading its queue
+            queue = queues[shard]
+            if not queue.full():
+                queue.put_nowait(item)
+                return
+            put_task = self.loop.create_task(queue.put(item))
+            await asyncio.wait([put_task, imports[shard]], return_when=asyncio.FIRST_COMPLETED)
+            if not put_task.done():
+                put_task.cancel()
+
+        try:
+            async for index, entry in aenumerate(data):
+                if any(map(lambda i: i.done(), imports)):
+                    # a shard import only finishes early when it fails, the rest of the source is not read
+                    break
+                shard = self.shard_index(entry)
+                indices[shard].append(index)
+                await put(shard, entry)
+        finally:
+            for shard in range(len(queues)):
+                await put(shard, None)
+
+        results = await asyncio.gather(*imports)
+        merged = list(map(lambda r: r[1], sorted(((indices[shard][i], res)
+                                                  for shard, shard_results in enumerate(results)
+                                                  for i, res in enumerate(shard_results)), key=lambda r: r[0])))
+        return merged
+
+    def import_objects(self, data: Union[AsyncIterable[EntryType], Iterable[EntryType]], schedule=False, name=None,
+                       error_handler: Callable[[int, Dict[str, Any]], HandlerRetType] = lambda i, a: (i, a),
+                       action: str = "create",
+                       entry_handler: Callable[[int, EntryType], HandlerRetType] = lambda i, a: (i, a),
+                       batch_size: int = IMPORT_BATCH_SIZE,
+                       tracker=None):
+        """
+        Import a stream of documents, every document is routed to its shard and shards are imported concurrently.
+        Handlers get indices in the input stream, as with Client.import_objects.
+
+        Returns:
+            list or Task: handler results in order of the input stream
+        """
+        task = self.loop.create_task(self._route_import(data, batch_size, action, error_handler, entry_handler,
+                                                        tracker), name=name)
+        if schedule:
+            self.api_caller.tasks[task.get_name()] = task
+
+        if self.api_caller.sync():
+            return self.loop.run_until_complete(task)
+        else:
+            return task
+
+    async def _search(self, collection: Type[EntryType], query: SearchQuery, clauses: List[Tuple[str, bool]],
+                      max_get_size: int) -> AsyncIterable[SearchRes]:
+        def handler(resp: Dict[str, Any]):
+            return SearchRes[collection].parse_obj(resp)
+
+        def fetcher(shard: Client[C]):
+            def fetch(page: int):
+                params = PaginatedQuery(page=page, **query.__dict__).dict(exclude_none=True)
+                return shard._search_request(collection, params, False, None, handler, max_get_size, as_task=True)
+            return fetch
+
+        fetchers = list(map(fetcher, self.shards))
+        first = await asyncio.gather(*map(lambda fetch: fetch(1), fetchers))
+        streams = [_ShardHits(fetch, res, query.per_page) for fetch, res in zip(fetchers, first)]
+        found = sum(map(lambda r: r.found, first))
+        facets = merge_facet_counts(first, query.max_facet_values)
+
+        heap = []
+        for i, stream in enumerate(streams):
+            hit = await stream.next()
+            if hit is not None:
+                heap.append((HitOrder(clauses, hit), i, hit))
+        heapq.heapify(heap)
+
+        for page in range(1, max(math.ceil(found / query.per_page), 1) + 1):
+            hits = []
+            while heap and len(hits) < query.per_page:
+                _, i, hit = heapq.heappop(heap)
+                hits.append(hit)
+                next_hit = await streams[i].next()
+                if next_hit is not None:
+                    heapq.heappush(heap, (HitOrder(clauses, next_hit), i, next_hit))
+
+            if not hits and page > 1:
+                logger.debug(f"shards of {collection.schema_name} returned fewer hits than found")
+                return
+            yield SearchRes[collection].construct(facet_counts=facets, found=found,
+                                                  out_of=sum(map(lambda r: r.out_of, first)), page=page,
+                                                  request_params=first[0].request_params,
+                                                  search_time_ms=max(map(lambda r: r.search_time_ms, first)),
+                                                  hits=hits)
+
+    def search(self, collection: Type[EntryType], query: SearchQuery,
+               max_get_size: int = MAX_GET_PARAMS_SIZE) -> Union[Iterable[SearchRes], AsyncIterable[SearchRes]]:
+        """
+        Search all shards and merge the results page by page. Hits are merged by the query sort_by, or by text match,
+        found and out_of are summed and facet counts are merged. Every shard page is fetched once, when the merge
+        reaches it.
+        Args:
+            collection (): a collection to search in
+            query (SearchQuery): a query
+            max_get_size (int): maximal size of url-encoded parameters in bytes, larger queries are sent in a POST body
+
+        Returns:
+            Iterable or AsyncIterable of SearchRes: merged pages
+
+        Raises:
+            UnsupportedSortClause: if hits can't be merged by the query sort_by, see parse_sort_by
+        """
+        pages = self._search(collection, query, parse_sort_by(query), max_get_size)
+        if self.api_caller.sync():
+            return self.api_caller.synchronise_iterator(pages)
+        return pages
@@ -0,0 +1,88 @@
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Callable, Deque, Dict, Optional
+from pydantic import BaseModel
+from .logging import logger
+
+
+class RequestTrace:
+    """
+    Timings of a single request, filled by the api caller.
+    Attributes:
+        node (str or None): url of the node the request was sent to
+        queue (float): seconds the request waited for admission
+        network (float): seconds from admission until the response body was read, it includes server time
+        parse (float): seconds the response handler took
+    """
+    def __init__(self):
+        self.node: Optional[str] = None
+        self.queue = 0.0
+        self.network = 0.0
+        self.parse = 0.0
+
+
+class SlowQuery(BaseModel):
+    """
+    A search which took longer than a threshold.
+    Attributes:
+        collection (str): a collection name
+        query (dict): search parameters as they were sent
+        node (str or None): url of the node which served the search
+        timestamp (datetime): when the search finished
+        server_ms (float or None): search_time_ms reported by the server
+        total_ms (float): client wall time
+        queue_ms (float): time waiting for admission
+        network_ms (float): time from admission to the read response body, without server time
+        parse_ms (float): time parsing the response into SearchRes
+        other_ms (float): the rest of wall time, mostly waiting for the event loop
+    """
+    collection: str
+    query: Dict[str, Any]
+    node: Optional[str]
+    timestamp: datetime
+    server_ms: Optional[float]
+    total_ms: float
+    queue_ms: float
+    network_ms: float
+    parse_ms: float
+    other_ms: float
+
+    @classmethod
+    def from_trace(cls, collection: str, query: Dict[str, Any], trace: RequestTrace, total: float,
+                   server_ms: Optional[float]) -> "SlowQuery":
+        network_ms = trace.network * 1000
+        return cls(collection=collection, query=query, node=trace.node, timestamp=datetime.now(),
+                   server_ms=server_ms, total_ms=total * 1000, queue_ms=trace.queue * 1000,
+                   network_ms=max(network_ms - (server_ms or 0), 0.0), parse_ms=trace.parse * 1000,
+                   other_ms=max(total - trace.queue - trace.network - trace.parse, 0.0) * 1000)
+
+
+class SlowQueryLog:
+    """
+    A bounded log of slow searches, the oldest entries are dropped.
+    Attributes:
+        threshold (timedelta or None): searches with longer client wall time are logged, nothing is logged if None
+        entries (deque of SlowQuery): logged searches, oldest first
+        sink (callable or None): a callback which receives every logged search
+    """
+    def __init__(self, threshold: Optional[timedelta], max_entries: int = 1000,
+                 sink: Optional[Callable[[SlowQuery], Any]] = None):
+        self.threshold = threshold
+        self.entries: Deque[SlowQuery] = deque(maxlen=max_entries)
+        self.sink = sink
+
+    def is_slow(self, total: float) -> bool:
+        return self.threshold is not None and total > self.threshold.total_seconds()
+
+    def record(self, entry: SlowQuery):
+        self.entries.append(entry)
+        logger.info(f"slow search in {entry.collection}: {entry.total_ms:.1f}ms total, server {entry.server_ms}ms, "
+                    f"queue {entry.queue_ms:.1f}ms, network {entry.network_ms:.1f}ms, parse {entry.parse_ms:.1f}ms")
+        if self.sink:
+            self.sink(entry)
+
+    def __iter__(self):
+        return iter(list(self.entries))
+
+    def __len__(self):
+        return len(self.entries)
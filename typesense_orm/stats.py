@@ -0,0 +1,203 @@
+import asyncio
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence
+import aiohttp
+from pydantic import BaseModel, Field
+from .logging import logger
+
+STATS_PATH = "/stats.json"
+METRICS_PATH = "/metrics.json"
+DEBUG_PATH = "/debug"
+# a sample of pending write batches is used for this many poll intervals
+STALE_INTERVALS = 3
+
+
+class ServerStats(BaseModel):
+    """
+    Request statistics of a node, as reported by /stats.json.
+    Attributes:
+        latency_ms (dict of float): average latency of every endpoint, like "GET /collections"
+        requests_per_second (dict of float): request rate of every endpoint
+        pending_write_batches (int): number of write batches the node has not applied yet
+    """
+    latency_ms: Dict[str, float] = Field({})
+    requests_per_second: Dict[str, float] = Field({})
+    pending_write_batches: int = Field(0)
+    search_latency_ms: float = Field(0.0)
+    search_requests_per_second: float = Field(0.0)
+    write_latency_ms: float = Field(0.0)
+    write_requests_per_second: float = Field(0.0)
+    import_latency_ms: float = Field(0.0)
+    import_requests_per_second: float = Field(0.0)
+    delete_latency_ms: float = Field(0.0)
+    delete_requests_per_second: float = Field(0.0)
+    overloaded_requests_per_second: float = Field(0.0)
+    total_requests_per_second: float = Field(0.0)
+
+
+class ServerMetrics(BaseModel):
+    """
+    Resource usage of a node, as reported by /metrics.json. Per-cpu values are kept as extra attributes.
+    """
+    system_cpu_active_percentage: float = Field(0.0)
+    system_memory_used_bytes: int = Field(0)
+    system_memory_total_bytes: int = Field(0)
+    system_disk_used_bytes: int = Field(0)
+    system_disk_total_bytes: int = Field(0)
+    system_network_received_bytes: int = Field(0)
+    system_network_sent_bytes: int = Field(0)
+    typesense_memory_active_bytes: int = Field(0)
+    typesense_memory_allocated_bytes: int = Field(0)
+    typesense_memory_resident_bytes: int = Field(0)
+    typesense_memory_mapped_bytes: int = Field(0)
+    typesense_memory_metadata_bytes: int = Field(0)
+    typesense_memory_retained_bytes: int = Field(0)
+    typesense_memory_fragmentation_ratio: float = Field(0.0)
+
+    @property
+    def memory_usage(self) -> float:
+        return self.system_memory_used_bytes / self.system_memory_total_bytes if self.system_memory_total_bytes else 0.0
+
+    @property
+    def disk_usage(self) -> float:
+        return self.system_disk_used_bytes / self.system_disk_total_bytes if self.system_disk_total_bytes else 0.0
+
+    class Config:
+        extra = "allow"
+
+
+class NodeDebug(BaseModel):
+    """
+    Raft state and version of a node, as reported by /debug. State 1 is a leader, 4 is a follower.
+    """
+    state: int
+    version: str
+
+
+class NodeStats(BaseModel):
+    """
+    A sample of statistics of a node.
+    Attributes:
+        node (str): a node url
+        timestamp (datetime): when the sample was taken
+        stats (ServerStats): request statistics
+        metrics (ServerMetrics): resource usage
+        debug (NodeDebug or None): raft state, None if the endpoint is not available to the api key
+    """
+    node: str
+    timestamp: datetime
+    stats: ServerStats
+    metrics: ServerMetrics
+    debug: Optional[NodeDebug]
+
+
+async def fetch_node_stats(session: aiohttp.ClientSession, node: str) -> NodeStats:
+    """
+    Read /stats.json, /metrics.json and /debug of a node concurrently.
+    Args:
+        session (aiohttp.ClientSession): a session without a base url, with an api key header
+        node (str): a node url
+
+    Returns:
+        NodeStats
+    """
+    async def fetch(path: str) -> Optional[Dict[str, Any]]:
+        async with session.get(node + path) as response:
+            if response.status != 200:
+                logger.debug(f"{node}{path} responded with {response.status}")
+                return None
+            return await response.json(content_type=None)
+
+    stats, metrics, debug = await asyncio.gather(fetch(STATS_PATH), fetch(METRICS_PATH), fetch(DEBUG_PATH))
+    return NodeStats(node=node, timestamp=datetime.now(), stats=stats or {}, metrics=metrics or {},
+                     debug=debug)
+
+
+class StatsSeries:
+    """
+    A bounded in-memory time series of node statistics, the oldest samples are dropped.
+    Attributes:
+        max_samples (int): maximal number of samples kept for every node
+        samples (dict of deque): samples of every node, oldest first
+    """
+    def __init__(self, max_samples: int):
+        self.max_samples = max_samples
+        self.samples: Dict[str, Deque[NodeStats]] = {}
+
+    def append(self, sample: NodeStats):
+        if sample.node not in self.samples:
+            self.samples[sample.node] = deque(maxlen=self.max_samples)
+        self.samples[sample.node].append(sample)
+
+    def latest(self, node: str) -> Optional[NodeStats]:
+        samples = self.samples.get(node)
+        return samples[-1] if samples else None
+
+    def values(self, node: str, getter: Callable[[NodeStats], Any],
+               since: Optional[datetime] = None) -> List[Any]:
+        """
+        Extract a series of a single value.
+        Args:
+            node (str): a node url
+            getter (): a function which extracts a value from a sample, like lambda s: s.stats.search_latency_ms
+            since (datetime): only samples taken after this moment are used
+
+        Returns:
+            list of tuples: timestamps and values
+        """
+        return [(s.timestamp, getter(s)) for s in self.samples.get(node, ()) if since is None or s.timestamp > since]
+
+
+class StatsPoller:
+    """
+    Samples statistics of all nodes of a caller in the background. Every sample is appended to the caller's series,
+    and pending write batches are passed to its admission controller, so writes back off from a loaded node.
+
+    Notes:
+        the poller runs in the caller loop, so with a synchronous caller it only advances while requests are made.
+
+    Attributes:
+        interval (timedelta): time between samples
+        on_sample (callable or None): a callback called with every sample
+    """
+    def __init__(self, api_caller, interval: timedelta,
+                 on_sample: Optional[Callable[[NodeStats], Any]] = None):
+        self.api_caller = api_caller
+        self.interval = interval
+        self.on_sample = on_sample
+        self.task: Optional[asyncio.Task] = None
+
+    async def sample(self, session: aiohttp.ClientSession, nodes: Sequence[str]) -> List[NodeStats]:
+        results = await asyncio.gather(*map(lambda node: fetch_node_stats(session, node), nodes),
+                                       return_exceptions=True)
+        samples = []
+        for node, result in zip(nodes, results):
+            if isinstance(result, Exception):
+                logger.info(f"cannot read stats of {node}: {result!r}")
+                continue
+            self.api_caller.stats_series.append(result)
+            # a sample is trusted for a few poll intervals, so a stopped poller or a silent node doesn't block writes
+            self.api_caller.admission.report_pending_write_batches(node, result.stats.pending_write_batches,
+                                                                   STALE_INTERVALS * self.interval.total_seconds())
+            if self.on_sample:
+                self.on_sample(result)
+            samples.append(result)
+        return samples
+
+    async def run(self):
+        nodes = list(map(lambda node: node.url, self.api_caller.nodes))
+        async with self.api_caller.stats_session() as session:
+            while True:
+                await self.sample(session, nodes)
+                await asyncio.sleep(self.interval.total_seconds())
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = self.api_caller.loop.create_task(self.run(), name="stats_poller")
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        self.api_caller.admission.clear_pending_write_batches()
@@ -0,0 +1,203 @@
+import asyncio
+import json
+import os
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, AsyncIterable, List, Optional, Tuple, Type, Union
+from pydantic import BaseModel, Field
+from asyncstdlib import iter as aiter
+from asyncstdlib import islice as aislice
+from .change_tracker import ChangeTracker
+from .logging import logger
+
+Source = Union[Iterable[Any], AsyncIterable[Any]]
+
+
+class Checkpoint(BaseModel):
+    """
+    A state of a sync which is persisted after every acknowledged batch.
+    Attributes:
+        sync (int): a number of the sync, it grows every time a finished sync is started again
+        batches (int): number of acknowledged batches
+        offset (int): number of source documents which were consumed
+        cursor (): a source cursor of the last acknowledged document, if the runner has a cursor function
+        imported (int): number of imported documents
+        failed (int): number of documents sent to the dead letter file
+        finished (bool): whether the source is exhausted
+        updated_at (datetime or None): when the checkpoint was saved
+    """
+    sync: int = Field(0)
+    batches: int = Field(0)
+    offset: int = Field(0)
+    cursor: Any = Field(None)
+    imported: int = Field(0)
+    failed: int = Field(0)
+    finished: bool = Field(False)
+    updated_at: Optional[datetime] = Field(None)
+
+    @classmethod
+    def load(cls, path: str) -> "Checkpoint":
+        if not os.path.exists(path):
+            return cls()
+        return cls.parse_file(path)
+
+    def save(self, path: str):
+        self.updated_at = datetime.now()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.json())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+
+class SyncRunner:
+    """
+    A resumable bulk sync. Documents are consumed from a source in numbered batches and imported with
+    Client.import_batch, and a checkpoint is saved after every acknowledged batch. A restarted runner resumes from the
+    last checkpoint, documents which the server refused are appended to a dead letter JSONL file. A dead letter is
+    keyed by the sync number and the offset of the document, so a batch which is imported again after a crash doesn't
+    duplicate its dead letters. Running a finished sync starts the next one, from the saved cursor if the runner has
+    a cursor function and from the beginning of the source otherwise.
+
+    A source is either an iterable, which is skipped up to the checkpoint offset on resume, or a callable which takes
+    the checkpoint and returns an iterable starting right after it, e.g. a database query from the checkpoint cursor.
+
+    Attributes:
+        client (Client): a client the documents are imported with
+        source (): an iterable or an async iterable of documents, or a callable which makes one from a checkpoint
+        checkpoint_path (str): a path to the checkpoint file
+        dead_letter_path (str or None): a path to the dead letter file, failed documents are only counted if None
+        batch_size (int): number of documents in a batch
+        action (str): import action
+        cursor (callable or None): a function which gets a cursor from a document, it's saved in the checkpoint
+        tracker (ChangeTracker or None): a change tracker which skips unchanged documents, it's flushed with every
+        checkpoint
+        checkpoint (Checkpoint): the current checkpoint
+    """
+    def __init__(self, client, source: Union[Source, Callable[[Checkpoint], Source]], checkpoint_path: str,
+                 dead_letter_path: Optional[str] = None, batch_size: int = 1000, action: str = "upsert",
+                 cursor: Optional[Callable[[Any], Any]] = None, tracker: Optional[ChangeTracker] = None):
+        self.client = client
+        self.source = source
+        self.checkpoint_path = checkpoint_path
+        self.dead_letter_path = dead_letter_path
+        self.batch_size = batch_size
+        self.action = action
+        self.cursor = cursor
+        self.tracker = tracker
+        self.checkpoint = Checkpoint.load(checkpoint_path)
+
+    def _open_source(self) -> AsyncIterable[Any]:
+        if callable(self.source):
+            return aiter(self.source(self.checkpoint))
+        return aislice(aiter(self.source), self.checkpoint.offset, None)
+
+    def _last_dead_letter(self) -> int:
+        """
+        The largest offset of a dead letter of the current sync, -1 if there is none.
+        """
+        last = -1
+        if self.dead_letter_path is None or not os.path.exists(self.dead_letter_path):
+            return last
+        with open(self.dead_letter_path) as f:
+            for line in f:
+                try:
+                    letter = json.loads(line)
+                except ValueError:
+                    # a line torn by a crash
+                    continue
+                if letter.get("sync", 0) == self.checkpoint.sync:
+                    last = max(last, letter["index"])
+        return last
+
+    def _write_dead_letters(self, failures: List[Tuple[int, Any, Dict[str, Any]]]):
+        failures = [f for f in failures if f[0] > self.last_dead_letter]
+        if not failures or self.dead_letter_path is None:
+            return
+        with open(self.dead_letter_path, "a") as f:
+            for index, entry, resp in failures:
+                f.write(json.dumps({"sync": self.checkpoint.sync, "index": index,
+                                    "collection": entry.__class__.schema_name,
+                                    "error": resp.get("error"), "document": entry.document_dict()},
+                                   default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.last_dead_letter = failures[-1][0]
+
+    async def _import(self, batch: List[Tuple[int, Any]]) -> List[Tuple[int, Any, Dict[str, Any]]]:
+        failures = []
+        by_collection: Dict[Type, List[Tuple[int, Any]]] = {}
+        for index, entry in batch:
+            by_collection.setdefault(type(entry), []).append((index, entry))
+
+        def failure_handler(entries: List[Tuple[int, Any]]):
+            return lambda i, resp: failures.append((entries[i][0], resp))
+
+        imports = [self.client.import_batch(list(map(lambda e: e[1], entries)), action=self.action,
+                                            error_handler=failure_handler(entries),
+                                            entry_handler=lambda i, entry: None, tracker=self.tracker)
+                   for entries in by_collection.values()]
+        if not self.client.api_caller.sync():
+            await asyncio.gather(*imports)
+        entries = dict(batch)
+        return list(map(lambda f: (f[0], entries[f[0]], f[1]), sorted(failures, key=lambda f: f[0])))
+
+    async def _commit(self, batch: List[Tuple[int, Any]]):
+        failures = await self._import(batch)
+        self._write_dead_letters(failures)
+        self.checkpoint.batches += 1
+        self.checkpoint.offset += len(batch)
+        self.checkpoint.imported += len(batch) - len(failures)
+        self.checkpoint.failed += len(failures)
+        if self.cursor is not None:
+            self.checkpoint.cursor = self.cursor(batch[-1][1])
+        if self.tracker is not None:
+            self.tracker.flush()
+        self.checkpoint.save(self.checkpoint_path)
+        logger.debug(f"sync {self.checkpoint_path}: batch {self.checkpoint.batches} is acknowledged")
+
+    async def _run(self) -> Checkpoint:
+        if self.checkpoint.finished:
+            logger.info(f"sync {self.checkpoint_path} has finished, starting the next one")
+            self.checkpoint = Checkpoint(sync=self.checkpoint.sync + 1,
+                                         cursor=self.checkpoint.cursor if self.cursor is not None else None)
+            self.checkpoint.save(self.checkpoint_path)
+
+        self.last_dead_letter = self._last_dead_letter()
+        if self.checkpoint.batches:
+            logger.info(f"resuming sync {self.checkpoint_path} after batch {self.checkpoint.batches}, "
+                        f"offset {self.checkpoint.offset}")
+
+        batch = []
+        async for entry in self._open_source():
+            batch.append((self.checkpoint.offset + len(batch), entry))
+            if len(batch) >= self.batch_size:
+                await self._commit(batch)
+                batch = []
+        if batch:
+            await self._commit(batch)
+
+        self.checkpoint.finished = True
+        self.checkpoint.save(self.checkpoint_path)
+        return self.checkpoint
+
+    def run(self, schedule=False, name=None):
+        """
+        Run the sync from the last checkpoint until the source is exhausted. If the sync fails, e.g. because no node
+        is healthy, the checkpoint keeps the last acknowledged batch, and the next run resumes from it.
+        Args:
+            schedule (bool): whether a caller should memorize a task
+            name (str): a name of the task
+
+        Returns:
+            Checkpoint or Task: the final checkpoint
+        """
+        api_caller = self.client.api_caller
+        task = api_caller.loop.create_task(self._run(), name=name)
+        if schedule:
+            api_caller.tasks[task.get_name()] = task
+
+        if api_caller.sync():
+            return api_caller.loop.run_until_complete(task)
+        else:
+            return task
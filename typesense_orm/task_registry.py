@@ -0,0 +1,98 @@
+from asyncio import Task, CancelledError
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from functools import partial
+from typing import Dict, Optional, Callable, Any, Iterator, List, Tuple
+from .logging import logger
+
+
+def task_outcome(task: Task) -> Any:
+    """
+    Get a result of a finished task, or an exception it has raised.
+    Args:
+        task (Task): a finished task
+
+    Returns:
+        a task result or an exception instance
+    """
+    if task.cancelled():
+        return CancelledError()
+    exc = task.exception()
+    if exc is not None:
+        return exc
+    return task.result()
+
+
+class TaskRegistry(MutableMapping):
+    """
+    A registry of scheduled tasks, it keeps every pending task and at most max_done finished ones.
+    When there are more finished tasks, the oldest one is spilled: it's passed to on_spill callback if any, and
+    dropped from the registry.
+    Attributes:
+        max_done (int or None): maximal number of finished tasks kept, unlimited if None
+        on_spill (callable or None): a callback called with a name and an outcome of a spilled task
+        pending (dict of Task): tasks which are not finished yet
+        done (OrderedDict of Task): finished tasks in order of completion
+    """
+    def __init__(self, max_done: Optional[int] = None, on_spill: Optional[Callable[[str, Any], Any]] = None):
+        self.max_done = max_done
+        self.on_spill = on_spill
+        self.pending: Dict[str, Task] = {}
+        self.done: Dict[str, Task] = OrderedDict()
+        self.spilled = 0
+
+    def __setitem__(self, name: str, task: Task):
+        self.done.pop(name, None)
+        if task.done():
+            self._add_done(name, task)
+        else:
+            self.pending[name] = task
+            task.add_done_callback(partial(self._on_done, name))
+
+    def _on_done(self, name: str, task: Task):
+        if self.pending.get(name) is not task:
+            return
+        del self.pending[name]
+        self._add_done(name, task)
+
+    def _add_done(self, name: str, task: Task):
+        self.done[name] = task
+        while self.max_done is not None and len(self.done) > self.max_done:
+            spilled_name, spilled_task = self.done.popitem(last=False)
+            self.spilled += 1
+            if self.on_spill:
+                self.on_spill(spilled_name, task_outcome(spilled_task))
+            else:
+                logger.warning(f"task registry is full, result of {spilled_name} is dropped")
+
+    def __getitem__(self, name: str) -> Task:
+        if name in self.pending:
+            return self.pending[name]
+        return self.done[name]
+
+    def __delitem__(self, name: str):
+        if name in self.pending:
+            del self.pending[name]
+        else:
+            del self.done[name]
+
+    def __iter__(self) -> Iterator[str]:
+        yield from list(self.pending)
+        yield from list(self.done)
+
+    def __len__(self) -> int:
+        return len(self.pending) + len(self.done)
+
+    def pop_done(self) -> List[Tuple[str, Task]]:
+        """
+        Remove all finished tasks from the registry.
+        Returns:
+            list of tuples: names and tasks in order of completion
+        """
+        ret = list(self.done.items())
+        self.done.clear()
+        return ret
+
+    def clear(self):
+        self.pending.clear()
+        self.done.clear()
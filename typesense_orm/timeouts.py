@@ -0,0 +1,112 @@
+from contextvars import ContextVar
+from datetime import timedelta
+from time import monotonic
+from typing import Dict, Optional
+import aiohttp
+from pydantic import BaseModel, Field
+from .exceptions import DeadlineExceeded
+
+SEARCH = "search"
+WRITE = "write"
+IMPORT = "import"
+ADMIN = "admin"
+
+
+class OperationTimeouts(BaseModel):
+    """
+    Timeouts of a class of requests, None means no timeout.
+    Attributes:
+        connect (timedelta or None): time to get a connection, including waiting for a free one in the pool
+        sock_read (timedelta or None): maximal time between two reads of response data
+        total (timedelta or None): time of the whole request, including reading the response
+    """
+    connect: Optional[timedelta] = Field(None)
+    sock_read: Optional[timedelta] = Field(None)
+    total: Optional[timedelta] = Field(None)
+
+    def client_timeout(self, deadline: Optional["Deadline"] = None) -> aiohttp.ClientTimeout:
+        """
+        aiohttp timeout of a request, the total timeout is capped by the remaining time of a deadline.
+        """
+        total = self.total.total_seconds() if self.total is not None else None
+        if deadline is not None:
+            total = deadline.remaining() if total is None else min(total, deadline.remaining())
+        return aiohttp.ClientTimeout(total=total,
+                                     connect=self.connect.total_seconds() if self.connect is not None else None,
+                                     sock_read=self.sock_read.total_seconds() if self.sock_read is not None else None)
+
+
+def default_timeouts() -> Dict[str, OperationTimeouts]:
+    return {
+        SEARCH: OperationTimeouts(connect=timedelta(seconds=1), sock_read=timedelta(seconds=3),
+                                  total=timedelta(seconds=3)),
+        WRITE: OperationTimeouts(connect=timedelta(seconds=3), sock_read=timedelta(seconds=10),
+                                 total=timedelta(seconds=15)),
+        # bulk imports and exports stream for minutes, only a stalled stream is a failure
+        IMPORT: OperationTimeouts(connect=timedelta(seconds=3), sock_read=timedelta(seconds=120)),
+        ADMIN: OperationTimeouts(connect=timedelta(seconds=3), sock_read=timedelta(seconds=30),
+                                 total=timedelta(seconds=60)),
+    }
+
+
+def operation_class(method: str, url: str) -> str:
+    """
+    A class of a request by its method and path: search, write, import (bulk import and export) or admin.
+    """
+    path = url.split("?", 1)[0].rstrip("/")
+    if path.endswith("/import") or path.endswith("/export"):
+        return IMPORT
+    if path.endswith("/search") or path.endswith("/multi_search"):
+        return SEARCH
+    if "/documents" in path:
+        return SEARCH if method.lower() == "get" else WRITE
+    return ADMIN
+
+
+_current_deadline: ContextVar[Optional["Deadline"]] = ContextVar("typesense_orm_deadline", default=None)
+
+
+class Deadline:
+    """
+    A moment requests should be done by. Request timeouts are capped by the remaining time, and requests are not
+    retried past it. Used as a context manager, it applies to all requests made in the block, including tasks
+    created in it.
+    Attributes:
+        at (float): the moment on the monotonic clock
+    """
+    def __init__(self, timeout: timedelta):
+        self.at = monotonic() + timeout.total_seconds()
+        self._token = None
+
+    def remaining(self) -> float:
+        return max(self.at - monotonic(), 0.0)
+
+    def expired(self) -> bool:
+        return monotonic() >= self.at
+
+    def check(self):
+        """
+        Raises:
+            DeadlineExceeded: when the deadline has passed
+        """
+        if self.expired():
+            raise DeadlineExceeded(self)
+
+    def __enter__(self) -> "Deadline":
+        self._token = _current_deadline.set(earliest(self, _current_deadline.get()))
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _current_deadline.reset(self._token)
+
+
+def earliest(*deadlines: Optional[Deadline]) -> Optional[Deadline]:
+    deadlines = [d for d in deadlines if d is not None]
+    return min(deadlines, key=lambda d: d.at) if deadlines else None
+
+
+def current_deadline(deadline: Optional[Deadline] = None) -> Optional[Deadline]:
+    """
+    The earliest of a deadline and the deadline of the current context.
+    """
+    return earliest(deadline, _current_deadline.get())
@@ -0,0 +1,163 @@
+import asyncio
+import re
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Any, Dict, Hashable, Optional, Sequence, Type
+from .search import SearchQuery, SearchRes, FieldArgs
+from .higher_client import MAX_GET_PARAMS_SIZE
+from .logging import logger
+
+TOKEN = re.compile(r"\w+")
+
+
+def tokens(text: str) -> Sequence[str]:
+    return TOKEN.findall(text.lower())
+
+
+def narrows(query: str, previous: str) -> bool:
+    """
+    Whether every document matching a query also matches a previous one, i.e. the query only extends the previous
+    one with more characters.
+    """
+    return query.lower().startswith(previous.lower()) and bool(tokens(previous))
+
+
+def matches_prefix(document: Any, query_by: Sequence[FieldArgs], query: str) -> bool:
+    """
+    Whether every token of a query is a prefix of a token in one of the query_by fields of a document.
+    """
+    document_tokens = []
+    for field in query_by:
+        value = getattr(document, field.name, None)
+        if value is None:
+            continue
+        for item in (value if isinstance(value, (list, tuple)) else [value]):
+            document_tokens.extend(tokens(str(item)))
+    return all(any(t.startswith(q) for t in document_tokens) for q in tokens(query))
+
+
+class TypeaheadSession:
+    """
+    Searches issued while a user types. A new query supersedes the previous one: a search which is still debounced
+    or in flight is cancelled together with its response, so stale responses are never read or parsed.
+    When the last result held all matching documents and the new query only narrows it, hits are filtered locally
+    without a request.
+
+    Notes:
+        local filtering matches query tokens as prefixes of field tokens, so it doesn't reproduce typo tolerance.
+        Sessions of a synchronous client are not debounced, since a search blocks until it's done.
+
+    Attributes:
+        client (Client): a client to search with
+        collection (): a collection to search in
+        query (SearchQuery): a template query, q is replaced by typed text
+        debounce (timedelta): how long a query waits for a newer one before it's sent
+        reuse_prefix (bool): whether narrowing queries may be answered from the last result
+        max_get_size (int): maximal size of url-encoded parameters, larger queries are sent in a POST body
+        sent (int): number of searches sent to the server
+        cancelled (int): number of searches superseded before they finished
+        reused (int): number of searches answered locally
+    """
+    def __init__(self, client, collection: Type, query: SearchQuery, debounce: timedelta = timedelta(milliseconds=50),
+                 reuse_prefix: bool = True, max_get_size: int = MAX_GET_PARAMS_SIZE):
+        self.client = client
+        self.collection = collection
+        self.query = query
+        self.debounce = debounce
+        self.reuse_prefix = reuse_prefix
+        self.max_get_size = max_get_size
+        self.current: Optional[asyncio.Task] = None
+        self.last_q: Optional[str] = None
+        self.last_res: Optional[SearchRes] = None
+        self.sent = 0
+        self.cancelled = 0
+        self.reused = 0
+
+    def _narrowed(self, q: str) -> Optional[SearchRes]:
+        last = self.last_res
+        if not self.reuse_prefix or last is None or last.found > len(last.hits) or not narrows(q, self.last_q):
+            return None
+        hits = [hit for hit in last.hits if matches_prefix(hit.document, self.query.query_by, q)]
+        return last.copy(update={"hits": hits, "found": len(hits)})
+
+    async def _search(self, q: str, debounce: bool) -> SearchRes:
+        if debounce and self.debounce:
+            await asyncio.sleep(self.debounce.total_seconds())
+
+        res = self._narrowed(q)
+        if res is not None:
+            self.reused += 1
+        else:
+            def handler(resp: Dict[str, Any]):
+                return SearchRes[self.collection].parse_obj(resp)
+
+            self.sent += 1
+            params = self.query.copy(update={"q": q}).dict(exclude_none=True)
+            res = await self.client._search_request(self.collection, params, False, None, handler,
+                                                    self.max_get_size, as_task=True)
+
+        self.last_q, self.last_res = q, res
+        return res
+
+    def search(self, q: str):
+        """
+        Search for typed text, superseding the previous search of the session.
+        Args:
+            q (str): the text
+
+        Returns:
+            SearchRes or Task: a result of the search. A task of a superseded search is cancelled.
+        """
+        if self.current is not None and not self.current.done():
+            self.current.cancel()
+            self.cancelled += 1
+            logger.debug(f"typeahead search for {self.last_q} is superseded by {q}")
+
+        api_caller = self.client.api_caller
+        self.current = api_caller.loop.create_task(self._search(q, debounce=not api_caller.sync()))
+        if api_caller.sync():
+            return api_caller.loop.run_until_complete(self.current)
+        return self.current
+
+    def close(self):
+        if self.current is not None and not self.current.done():
+            self.current.cancel()
+
+
+class Typeahead:
+    """
+    Typeahead sessions keyed by a user or a session id, at most max_sessions recently used sessions are kept.
+    Attributes:
+        client (Client): a client to search with
+        collection (): a collection to search in
+        query (SearchQuery): a template query of the sessions
+        debounce (timedelta): debounce interval of the sessions
+        max_sessions (int): maximal number of sessions kept
+    """
+    def __init__(self, client, collection: Type, query: SearchQuery, debounce: timedelta = timedelta(milliseconds=50),
+                 max_sessions: int = 10000, reuse_prefix: bool = True):
+        self.client = client
+        self.collection = collection
+        self.query = query
+        self.debounce = debounce
+        self.max_sessions = max_sessions
+        self.reuse_prefix = reuse_prefix
+        self.sessions: Dict[Hashable, TypeaheadSession] = OrderedDict()
+
+    def session(self, key: Hashable) -> TypeaheadSession:
+        if key in self.sessions:
+            self.sessions.move_to_end(key)
+            return self.sessions[key]
+
+        session = TypeaheadSession(self.client, self.collection, self.query, self.debounce, self.reuse_prefix)
+        self.sessions[key] = session
+        while len(self.sessions) > self.max_sessions:
+            _, evicted = self.sessions.popitem(last=False)
+            evicted.close()
+        return session
+
+    def search(self, key: Hashable, q: str):
+        """
+        Search for text typed in a session, see TypeaheadSession.search.
+        """
+        return self.session(key).search(q)
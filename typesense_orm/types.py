@@ -1,7 +1,13 @@
-from typing import TypeVar, Dict, Sequence, Tuple, Union, get_args, get_origin, _GenericAlias, Iterable, Any, Optional
+from typing import TypeVar, Dict, Sequence, Tuple, Union, get_args, get_origin, _GenericAlias, Iterable, Any, Optional, \
+    ClassVar
 from pydantic import conint
 from enum import IntEnum
 
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
 
 def check_subclass(subclass, superclass):
     try:
@@ -15,6 +21,9 @@ def check_subclass(subclass, superclass):
     if superclass == Any:
         return True
 
+    if isinstance(superclass, TypeVar) or isinstance(subclass, TypeVar):
+        return False
+
     if (superclass is None) or (subclass is None):
         return False
 
@@ -61,10 +70,48 @@ int32 = conint(ge=-pow(2, 31), lt=pow(2, 31))
 int64 = conint(ge=-pow(2, 63), lt=pow(2, 63))
 geo = Tuple[float, float]
 
+
+class Vector:
+    """
+    An annotation for embedding fields, Vector[768] declares a float[] field with num_dim 768.
+    Values may be numpy arrays or sequences of numbers, they are stored as float32 numpy arrays if numpy is installed,
+    so vectors are never validated element by element.
+    """
+    num_dim: ClassVar[Optional[int]] = None
+    _dims: ClassVar[Dict[int, type]] = {}
+
+    def __class_getitem__(cls, num_dim: int) -> type:
+        if num_dim not in cls._dims:
+            cls._dims[num_dim] = type(f"Vector[{num_dim}]", (Vector,), {"num_dim": num_dim})
+        return cls._dims[num_dim]
+
+    @classmethod
+    def __get_validators__(cls):
+        yield cls.validate
+
+    @classmethod
+    def validate(cls, v):
+        if np is not None:
+            v = np.asarray(v, dtype=np.float32)
+            if v.ndim != 1:
+                raise ValueError("vector should be one-dimensional")
+        else:
+            v = list(map(float, v))
+
+        if cls.num_dim is not None and len(v) != cls.num_dim:
+            raise ValueError(f"vector should have {cls.num_dim} dimensions, got {len(v)}")
+        return v
+
+    @classmethod
+    def __modify_schema__(cls, field_schema):
+        field_schema.update(type="array", items={"type": "number"})
+
+
 allowed_types: Dict[Union[type, _GenericAlias], str] = {
     str: "string", Sequence[str]: "string[]",
     int32: "int32", Sequence[int32]: "int32[]",
     int64: "int64", Sequence[int64]: "int64[]",
+    Vector: "float[]",
     float: "float", Sequence[float]: "float[]",
     bool: "bool", Sequence[bool]: "bool[]",
     geo: "geopoint", Sequence[geo]: "geopoint[]",